@@ -3,10 +3,29 @@ Security Auditing API endpoints
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 import logging
+import time
+from typing import AsyncIterator, Dict, List
 
-from app.models.schemas import AuditRequest, AuditResponse
+from app.models.schemas import (
+    AuditRequest,
+    AuditResponse,
+    BatchAuditItem,
+    BatchAuditRequest,
+    BatchAuditResponse
+)
 from app.services.ai_service import ai_service
+from app.services.analysis import analyze
+from app.services.audit_cache import audit_cache, source_fingerprint
+from app.services.audit_pipeline import pipeline_metrics
+from app.services.incremental_audit import incremental_auditor
+from app.services.platform_stats import average_score, platform_stats
+from app.services.pubsub import audit_topic, pubsub
+from app.utils.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -33,16 +52,28 @@ async def audit_contract(request: AuditRequest):
         if not request.code or len(request.code.strip()) == 0:
             raise HTTPException(status_code=400, detail="Code cannot be empty")
 
-        result = await ai_service.audit_contract(
-            code=request.code,
-            contract_name=request.contract_name
-        )
+        if request.contract_id:
+            result = await incremental_auditor.audit(
+                contract_id=request.contract_id,
+                code=request.code,
+                contract_name=request.contract_name
+            )
+        else:
+            result = await ai_service.audit_contract(
+                code=request.code,
+                contract_name=request.contract_name
+            )
 
         if not result.success:
             raise HTTPException(status_code=500, detail="Failed to audit contract")
 
+        await run_in_threadpool(platform_stats.record_audit, result)
+        if request.contract_id:
+            await pubsub.publish(audit_topic(request.contract_id), audit_summary(result))
+
         logger.info(
-            f"✅ Audit complete in {result.execution_time:.2f}s. "
+            f"✅ Audit complete in {result.execution_time:.2f}s "
+            f"(cache {'hit' if result.cache_hit else 'miss'}). "
             f"Score: {result.score}/100, Issues: {len(result.issues)}"
         )
 
@@ -55,22 +86,190 @@ async def audit_contract(request: AuditRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/audit/stream")
+async def audit_contract_stream(request: AuditRequest):
+    """
+    Stream a security audit as Server-Sent Events
+
+    Events:
+    - issue: an Issue, sent as soon as it is found or parsed from the AI response
+    - done: the complete AuditResponse
+    - error: {"message": "..."}
+    """
+    if not request.code or len(request.code.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Code cannot be empty")
+
+    logger.info(f"Streaming audit of contract: {request.contract_name or 'unnamed'}")
+
+    topic = audit_topic(request.contract_id) if request.contract_id else None
+
+    async def event_stream():
+        async for event in ai_service.stream_audit(
+            code=request.code,
+            contract_name=request.contract_name
+        ):
+            if event["type"] == "error":
+                payload = json.dumps({"message": event["data"]})
+            else:
+                payload = event["data"].model_dump_json()
+            if event["type"] == "done":
+                await run_in_threadpool(platform_stats.record_audit, event["data"])
+            if topic:
+                await pubsub.publish(topic, audit_progress(event))
+            yield f"event: {event['type']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def audit_summary(result: AuditResponse) -> Dict:
+    """Audit outcome published to the contract's audit topic"""
+    return {
+        "event": "completed",
+        "score": result.score,
+        "passed": result.passed,
+        "issues": len(result.issues),
+        "summary": result.summary
+    }
+
+
+def audit_progress(event: Dict) -> Dict:
+    if event["type"] == "issue":
+        return {"event": "issue", "issue": event["data"].model_dump(mode="json")}
+    if event["type"] == "done":
+        return audit_summary(event["data"])
+    return {"event": "error", "message": event["data"]}
+
+
+@router.post("/audit/batch", response_model=BatchAuditResponse)
+async def audit_batch(request: BatchAuditRequest):
+    """
+    Audit many contracts in one request
+
+    Identical sources (ignoring comments and whitespace) are audited once.
+    Audits run concurrently up to `parallelism`; a failing item is reported
+    in its own result and does not fail the batch. With `stream: true` the
+    per-item results are sent as NDJSON lines as soon as each finishes,
+    followed by a final summary line.
+    """
+    if len(request.items) > settings.AUDIT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {settings.AUDIT_BATCH_MAX_ITEMS} items)"
+        )
+
+    parallelism = min(
+        request.parallelism or settings.AUDIT_BATCH_MAX_PARALLELISM,
+        settings.AUDIT_BATCH_MAX_PARALLELISM
+    )
+    groups = _group_identical_sources(request.items)
+    start_time = time.time()
+
+    logger.info(
+        f"Batch auditing {len(request.items)} contracts "
+        f"({len(groups)} unique, parallelism {parallelism})"
+    )
+
+    if request.stream:
+        async def ndjson_stream():
+            succeeded = 0
+            async for item in _run_batch(request.items, groups, parallelism):
+                succeeded += item.success
+                yield item.model_dump_json() + "\n"
+            yield BatchAuditResponse(
+                success=succeeded == len(request.items),
+                total=len(request.items),
+                succeeded=succeeded,
+                failed=len(request.items) - succeeded,
+                unique_sources=len(groups),
+                results=[],
+                execution_time=time.time() - start_time
+            ).model_dump_json() + "\n"
+
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+    results = [item async for item in _run_batch(request.items, groups, parallelism)]
+    results.sort(key=lambda item: item.index)
+    succeeded = sum(1 for item in results if item.success)
+
+    return BatchAuditResponse(
+        success=succeeded == len(results),
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        unique_sources=len(groups),
+        results=results,
+        execution_time=time.time() - start_time
+    )
+
+
+def _group_identical_sources(items: List[AuditRequest]) -> Dict[str, List[int]]:
+    """Map source fingerprint -> indices of the items sharing it"""
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(source_fingerprint(item.code), []).append(index)
+    return groups
+
+
+async def _run_batch(
+    items: List[AuditRequest],
+    groups: Dict[str, List[int]],
+    parallelism: int
+) -> AsyncIterator[BatchAuditItem]:
+    """Audit each unique source once, yielding per-item results as they finish"""
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def audit_group(indices: List[int]):
+        first = items[indices[0]]
+        async with semaphore:
+            try:
+                if not first.code or len(first.code.strip()) == 0:
+                    raise ValueError("Code cannot be empty")
+
+                result = await ai_service.audit_contract(
+                    code=first.code,
+                    contract_name=first.contract_name
+                )
+                if not result.success:
+                    raise RuntimeError("Failed to audit contract")
+
+                await run_in_threadpool(platform_stats.record_audit, result)
+                return indices, result, None
+
+            except Exception as e:
+                logger.warning(f"Batch item {indices[0]} failed: {e}")
+                return indices, None, str(e)
+
+    tasks = [asyncio.create_task(audit_group(indices)) for indices in groups.values()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indices, result, error = await finished
+            for position, index in enumerate(indices):
+                yield BatchAuditItem(
+                    index=index,
+                    contract_name=items[index].contract_name,
+                    success=error is None,
+                    result=result,
+                    error=error,
+                    deduplicated=position > 0
+                )
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 @router.post("/quick-scan")
 async def quick_scan(code: str):
     """
     Quick security scan (faster but less comprehensive)
     """
     try:
-        # Simplified scan for demo
-        issues_found = 0
-
-        if "delete" in code and "new" not in code:
-            issues_found += 1
-
-        if "require" not in code and "assert" not in code:
-            issues_found += 1
-
-        score = max(70, 100 - (issues_found * 10))
+        analysis = await run_in_threadpool(analyze, code)
+        issues_found = len(analysis.issues)
+        score = analysis.score
 
         return {
             "success": True,
@@ -88,13 +287,18 @@ async def quick_scan(code: str):
 @router.get("/security-stats")
 async def security_stats():
     """Get security statistics across all audited contracts"""
+    counters = await run_in_threadpool(platform_stats.snapshot)
+
     return {
         "success": True,
-        "total_audits": 157,
-        "average_score": 87.3,
-        "critical_issues_found": 12,
-        "high_issues_found": 45,
-        "medium_issues_found": 89,
-        "contracts_passed": 142,
-        "contracts_failed": 15
+        "total_audits": counters["audits_total"],
+        "average_score": average_score(counters),
+        "critical_issues_found": counters["issues_critical"],
+        "high_issues_found": counters["issues_high"],
+        "medium_issues_found": counters["issues_medium"],
+        "low_issues_found": counters["issues_low"],
+        "contracts_passed": counters["audits_passed"],
+        "contracts_failed": counters["audits_failed"],
+        "cache": audit_cache.stats(),
+        "pipeline": pipeline_metrics.stats()
     }
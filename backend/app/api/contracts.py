@@ -2,11 +2,12 @@
 Smart Contract Management API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, List
+from typing import List
 
 from app.models.schemas import (
     SmartContract,
@@ -14,13 +15,15 @@ from app.models.schemas import (
     UpdateContractRequest,
     ContractLanguage
 )
+from app.services.contract_store import contract_store
+from app.services.incremental_audit import incremental_auditor
+from app.services.pubsub import contract_topic, pubsub
+from app.services.platform_stats import average_score, platform_stats
+from app.services.semantic_cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# In-memory storage for demo (would be database in production)
-contracts_db: Dict[str, SmartContract] = {}
-
 
 @router.post("/contracts", response_model=SmartContract)
 async def create_contract(request: CreateContractRequest):
@@ -43,7 +46,7 @@ async def create_contract(request: CreateContractRequest):
             deployed=False
         )
 
-        contracts_db[contract_id] = contract
+        await run_in_threadpool(contract_store.create, contract)
 
         logger.info(f"✅ Contract created: {contract.name} ({contract_id})")
         return contract
@@ -56,30 +59,41 @@ async def create_contract(request: CreateContractRequest):
 @router.get("/contracts/{contract_id}", response_model=SmartContract)
 async def get_contract(contract_id: str):
     """Get contract by ID"""
-    if contract_id not in contracts_db:
+    contract = await run_in_threadpool(contract_store.get, contract_id)
+    if contract is None:
         raise HTTPException(status_code=404, detail="Contract not found")
 
-    return contracts_db[contract_id]
+    return contract
 
 
 @router.get("/contracts", response_model=List[SmartContract])
 async def list_contracts(
+    response: Response,
     author: str = None,
     deployed: bool = None,
-    limit: int = 100
+    compiled: bool = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str = None
 ):
-    """List all contracts with optional filters"""
-    contracts = list(contracts_db.values())
-
-    # Apply filters
-    if author:
-        contracts = [c for c in contracts if c.author == author]
+    """
+    List contracts (most recently updated first) with optional filters
 
-    if deployed is not None:
-        contracts = [c for c in contracts if c.deployed == deployed]
+    Paginate by passing the X-Next-Cursor response header back as `cursor`.
+    """
+    try:
+        contracts, next_cursor = await run_in_threadpool(
+            contract_store.list,
+            author=author,
+            deployed=deployed,
+            compiled=compiled,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Apply limit
-    contracts = contracts[:limit]
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     return contracts
 
@@ -87,24 +101,20 @@ async def list_contracts(
 @router.patch("/contracts/{contract_id}", response_model=SmartContract)
 async def update_contract(contract_id: str, request: UpdateContractRequest):
     """Update an existing contract"""
-    if contract_id not in contracts_db:
+    contract = await run_in_threadpool(
+        contract_store.update,
+        contract_id,
+        name=request.name,
+        description=request.description,
+        code=request.code
+    )
+    if contract is None:
         raise HTTPException(status_code=404, detail="Contract not found")
 
-    contract = contracts_db[contract_id]
-
-    # Update fields
-    if request.name is not None:
-        contract.name = request.name
-
-    if request.description is not None:
-        contract.description = request.description
-
-    if request.code is not None:
-        contract.code = request.code
-        contract.compiled = False  # Reset compiled status
-
-    contract.updated_at = datetime.now()
-
+    await pubsub.publish(contract_topic(contract_id), {
+        "event": "updated",
+        "contract": contract.model_dump(mode="json")
+    })
     logger.info(f"✅ Contract updated: {contract.name} ({contract_id})")
     return contract
 
@@ -112,11 +122,12 @@ async def update_contract(contract_id: str, request: UpdateContractRequest):
 @router.delete("/contracts/{contract_id}")
 async def delete_contract(contract_id: str):
     """Delete a contract"""
-    if contract_id not in contracts_db:
+    contract = await run_in_threadpool(contract_store.delete, contract_id)
+    if contract is None:
         raise HTTPException(status_code=404, detail="Contract not found")
 
-    contract = contracts_db.pop(contract_id)
-
+    incremental_auditor.forget(contract_id)
+    await pubsub.publish(contract_topic(contract_id), {"event": "deleted", "contract_id": contract_id})
     logger.info(f"🗑️ Contract deleted: {contract.name} ({contract_id})")
 
     return {
@@ -128,18 +139,19 @@ async def delete_contract(contract_id: str):
 @router.get("/stats")
 async def get_stats():
     """Get platform statistics"""
-    total = len(contracts_db)
-    deployed = sum(1 for c in contracts_db.values() if c.deployed)
-    compiled = sum(1 for c in contracts_db.values() if c.compiled)
+    counters = await run_in_threadpool(platform_stats.snapshot)
+    deployed = counters["contracts_deployed"]
 
     return {
         "success": True,
         "stats": {
-            "total_contracts": total,
+            "total_contracts": counters["contracts_total"],
             "deployed_contracts": deployed,
-            "compiled_contracts": compiled,
-            "average_security_score": 87.5,
-            "total_deployments": deployed,
+            "compiled_contracts": counters["contracts_compiled"],
+            "average_security_score": average_score(counters),
+            "total_deployments": counters["deployments_total"],
+            "total_audits": counters["audits_total"],
+            "generation_cache": semantic_cache.stats(),
             "platform_benefits": {
                 "total_audit_savings": f"${deployed * 75000:,}",  # $75K average audit cost
                 "deployment_fees_saved": "$0 (Qubic is feeless!)",
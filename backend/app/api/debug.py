@@ -0,0 +1,46 @@
+"""
+Debug diagnostics API endpoints
+Only mounted when LOOP_BLOCK_DETECTOR_ENABLED or PROFILING_ENABLED is set
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.services.diagnostics import loop_block_detector, request_profiler
+
+router = APIRouter()
+
+
+@router.get("/loop-blocks")
+async def loop_blocks():
+    """Recent event-loop blocks with the stack each was stuck in"""
+    return {
+        **loop_block_detector.stats(),
+        "recent": list(reversed(loop_block_detector.recent))
+    }
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Finished request profiles, newest first"""
+    return {
+        "profiles": [
+            {"id": p.id, "method": p.method, "path": p.path, "duration": round(p.duration, 4)}
+            for p in reversed(request_profiler.profiles.values())
+        ]
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json"):
+    """
+    Sampled profile of one request
+
+    format=collapsed returns folded stacks for flamegraph tools.
+    """
+    report = request_profiler.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found (still running or expired)")
+    if format == "collapsed":
+        return PlainTextResponse(report["collapsed"] + "\n")
+    return report
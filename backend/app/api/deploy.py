@@ -2,25 +2,51 @@
 Deployment API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+import asyncio
 import logging
 import time
 import uuid
 from datetime import datetime
-
+from typing import Optional
 from app.models.schemas import (
+    CompileDiagnostic,
+    CompileRequest,
+    CompileResult,
     DeployRequest,
     DeployResponse,
     Deployment,
     DeploymentStatus,
+    Job,
     NetworkType
 )
+from app.services.compiler import BuildTimeout, CompilerUnavailable, compiler_service
+from app.services.contract_store import contract_store
+from app.services.deployment_store import deployment_store
+from app.services.job_queue import job_queue, QueueFullError
+from app.services.pubsub import contract_topic, deployment_topic, job_topic, pubsub
 from app.utils.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+async def publish_deployment(deployment: Deployment):
+    """Push a deployment's current status to its own topic and its contract's"""
+    data = {"event": "deployment", "deployment": deployment.model_dump(mode="json")}
+    await pubsub.publish(deployment_topic(deployment.id), data)
+    await pubsub.publish(contract_topic(deployment.contract_id), data)
+
+
+async def publish_job(job: Job):
+    await pubsub.publish(job_topic(job.id), {"event": "job", "job": job.model_dump(mode="json")})
+
+
+job_queue.add_listener(publish_job)
+
+
 @router.post("/deploy/testnet", response_model=DeployResponse)
 async def deploy_to_testnet(request: DeployRequest):
     """
@@ -46,52 +72,58 @@ async def deploy_to_mainnet(request: DeployRequest):
 
 
 async def _deploy_contract(request: DeployRequest, network: NetworkType) -> DeployResponse:
-    """Internal deployment function"""
+    """Internal deployment function - submits a deploy job and returns immediately"""
     start_time = time.time()
 
     try:
         logger.info(f"Deploying contract {request.contract_id} to {network}")
 
-        if settings.MOCK_MODE:
-            logger.info("🎭 MOCK MODE: Simulating deployment")
-
-            # Simulate deployment (instant thanks to Qubic!)
-            deployment = Deployment(
-                id=str(uuid.uuid4()),
-                contract_id=request.contract_id,
-                network=network,
-                address=f"QUBIC{uuid.uuid4().hex[:40].upper()}",
-                transaction_hash=f"0x{uuid.uuid4().hex}",
-                timestamp=datetime.now(),
-                status=DeploymentStatus.CONFIRMED,
-                gas_used=0,  # Qubic is feeless!
-                ipo_config=request.ipo_config
-            )
-
-            # Simulate instant finality (but add small delay for realism)
-            time.sleep(0.5)
-
-            execution_time = time.time() - start_time
-
-            return DeployResponse(
-                success=True,
-                deployment=deployment,
-                message=f"✅ Contract deployed to {network} successfully! "
-                       f"Address: {deployment.address}. "
-                       f"Thanks to Qubic's instant finality, your contract is live immediately!",
-                execution_time=execution_time
-            )
-
-        else:
+        if not settings.MOCK_MODE:
             # Real deployment logic would go here
             # This would use Qubic SDK to actually deploy to the blockchain
-
-            # For now, return mock response with note
             raise HTTPException(
                 status_code=501,
                 detail="Real Qubic deployment not yet implemented. Use MOCK_MODE=true for demo."
             )
 
+        deployment = Deployment(
+            id=str(uuid.uuid4()),
+            contract_id=request.contract_id,
+            network=network,
+            address=f"QUBIC{uuid.uuid4().hex[:40].upper()}",
+            transaction_hash=f"0x{uuid.uuid4().hex}",
+            timestamp=datetime.now(),
+            status=DeploymentStatus.PENDING,
+            gas_used=0,  # Qubic is feeless!
+            ipo_config=request.ipo_config
+        )
+
+        await run_in_threadpool(deployment_store.create, deployment)
+        # Published before the job exists so subscribers never see confirmed before pending
+        await publish_deployment(deployment)
+        try:
+            await job_queue.submit("deploy", lambda: _run_deployment(deployment), job_id=deployment.id)
+        except QueueFullError as e:
+            failed = await run_in_threadpool(
+                deployment_store.set_status, deployment.id, DeploymentStatus.FAILED, str(e)
+            )
+            if failed is not None:
+                await publish_deployment(failed)
+            raise
+
+        execution_time = time.time() - start_time
+
+        return DeployResponse(
+            success=True,
+            deployment=deployment,
+            message=f"🚀 Deployment to {network} submitted. "
+                   f"Address: {deployment.address}. "
+                   f"Subscribe to {deployment_topic(deployment.id)} on /ws for confirmation.",
+            execution_time=execution_time
+        )
+
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except HTTPException:
         raise
     except Exception as e:
@@ -107,37 +139,61 @@ async def _deploy_contract(request: DeployRequest, network: NetworkType) -> Depl
         )
 
 
+async def _run_deployment(deployment: Deployment) -> dict:
+    """Deploy job body, executed on the job queue workers"""
+    try:
+        logger.info("🎭 MOCK MODE: Simulating deployment")
+
+        # Simulate instant finality (but add small delay for realism)
+        await asyncio.sleep(0.5)
+
+        confirmed = await run_in_threadpool(
+            deployment_store.set_status, deployment.id, DeploymentStatus.CONFIRMED
+        )
+        if confirmed is None:
+            raise RuntimeError(f"Deployment {deployment.id} no longer exists")
+        await run_in_threadpool(
+            contract_store.mark_deployed,
+            deployment.contract_id,
+            deployment.address,
+            deployment.network
+        )
+        logger.info(f"✅ Deployment {deployment.id} confirmed at {deployment.address}")
+        await publish_deployment(confirmed)
+        return confirmed.model_dump(mode="json")
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        failed = await run_in_threadpool(
+            deployment_store.set_status, deployment.id, DeploymentStatus.FAILED, str(e)
+        )
+        if failed is not None:
+            await publish_deployment(failed)
+        raise
+
+
 @router.get("/deployments/{deployment_id}")
 async def get_deployment(deployment_id: str):
     """Get deployment details by ID"""
-    # Mock deployment for demo
+    deployment = await run_in_threadpool(deployment_store.get, deployment_id)
+    if deployment is None:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+
     return {
         "success": True,
-        "deployment": {
-            "id": deployment_id,
-            "status": "confirmed",
-            "address": f"QUBIC{uuid.uuid4().hex[:40].upper()}",
-            "network": "testnet",
-            "timestamp": datetime.now().isoformat(),
-            "gas_used": 0  # Feeless!
-        }
+        "deployment": deployment
     }
 
 
 @router.get("/deployments")
-async def list_deployments(contract_id: str = None, network: str = None):
-    """List all deployments with optional filters"""
-    # Mock deployments for demo
-    deployments = [
-        {
-            "id": str(uuid.uuid4()),
-            "contract_id": contract_id or "contract_1",
-            "network": network or "testnet",
-            "address": f"QUBIC{uuid.uuid4().hex[:40].upper()}",
-            "status": "confirmed",
-            "timestamp": datetime.now().isoformat()
-        }
-    ]
+async def list_deployments(
+    contract_id: str = None,
+    network: str = None,
+    limit: int = Query(100, ge=1, le=500)
+):
+    """List deployments, newest first, with optional filters"""
+    deployments = await run_in_threadpool(deployment_store.list, contract_id, network, limit)
 
     return {
         "success": True,
@@ -146,37 +202,72 @@ async def list_deployments(contract_id: str = None, network: str = None):
     }
 
 
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    """Get the status (and result, once finished) of a compile or deploy job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
 @router.post("/compile")
-async def compile_contract(code: str):
+async def compile_contract(request: Optional[CompileRequest] = None, code: Optional[str] = None):
     """
     Compile C++ smart contract code
 
-    In production, this would use the Qubic compiler.
-    For demo, we simulate successful compilation.
+    Source goes in the JSON body ({"code": ...}; a code query parameter is also
+    accepted). The contract is built against the bundled QPI header stub with
+    the local toolchain as a background job; poll /api/jobs/{job_id} or
+    subscribe to its topic for the CompileResult. Recompiling unchanged source
+    is a lookup in the content-addressed artifact cache.
     """
+    code = request.code if request is not None else code
+    if not code or len(code.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Code cannot be empty")
+    if not compiler_service.available:
+        raise HTTPException(status_code=503, detail=f"C++ compiler '{settings.COMPILER}' is not installed")
+
     try:
-        if not code or len(code.strip()) == 0:
-            raise HTTPException(status_code=400, detail="Code cannot be empty")
-
-        # Mock compilation
-        logger.info("🎭 MOCK MODE: Compiling contract")
-        time.sleep(0.3)  # Simulate compilation time
-
-        return {
-            "success": True,
-            "compiled": True,
-            "bytecode": f"0x{uuid.uuid4().hex * 4}",
-            "size_bytes": len(code),
-            "warnings": [],
-            "errors": [],
-            "message": "✅ Compilation successful!"
-        }
+        job = await job_queue.submit("compile", lambda: _run_compile(code))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-    except Exception as e:
-        logger.error(f"Compilation failed: {e}")
-        return {
-            "success": False,
-            "compiled": False,
-            "errors": [str(e)],
-            "message": "Compilation failed"
-        }
+    return {
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "message": f"Compilation queued. Subscribe to {job_topic(job.id)} on /ws "
+                   f"or poll /api/jobs/{job.id} for the result."
+    }
+
+
+async def _run_compile(code: str) -> dict:
+    """Compile job body, executed on the job queue workers"""
+    try:
+        result = await compiler_service.compile(code)
+    except (BuildTimeout, CompilerUnavailable) as e:
+        logger.warning(f"Compilation failed: {e}")
+        result = CompileResult(
+            success=False,
+            compiled=False,
+            errors=[CompileDiagnostic(severity="error", message=str(e))],
+            message="❌ Compilation failed"
+        )
+    return result.model_dump(mode="json")
+
+
+@router.get("/artifacts/{artifact_id}")
+async def download_artifact(artifact_id: str):
+    """Object file of a successful build, by the artifact_id in its CompileResult"""
+    path = compiler_service.cache.artifact_path(artifact_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"{artifact_id[:16]}.o",
+        headers={"ETag": f'"{artifact_id}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    )
@@ -2,11 +2,28 @@
 AI Code Generation API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import json
 import logging
-
-from app.models.schemas import GenerateRequest, GenerateResponse
+import time
+
+from app.api.testing import profile_contract
+from app.models.schemas import (
+    GenerateRequest,
+    GenerateResponse,
+    OptimizeResponse,
+    ProfileRequest,
+    StateField,
+    StateFootprint
+)
 from app.services.ai_service import ai_service
+from app.services.analysis import analyze_performance, format_bytes
+from app.services.cost_profiler import cost_profiler
+from app.services.test_runner import HarnessBuildError, contract_struct
+from app.services.template_registry import template_registry
+from app.utils.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -43,67 +60,43 @@ async def generate_contract(request: GenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/generate/stream")
+async def generate_contract_stream(request: GenerateRequest):
+    """
+    Stream contract generation as Server-Sent Events
+
+    Events:
+    - token: {"text": "..."} code fragments as the model produces them
+    - done: the complete GenerateResponse
+    - error: {"message": "..."}
+    """
+    logger.info(f"Streaming contract from prompt: {request.prompt[:100]}...")
+
+    async def event_stream():
+        async for event in ai_service.stream_contract(
+            prompt=request.prompt,
+            template=request.template,
+            additional_context=request.additional_context
+        ):
+            if event["type"] == "token":
+                payload = {"text": event["data"]}
+            elif event["type"] == "done":
+                payload = event["data"].model_dump()
+            else:
+                payload = {"message": event["data"]}
+            yield f"event: {event['type']}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/templates")
 async def list_templates():
     """List available smart contract templates"""
-    templates = [
-        {
-            "id": "voting",
-            "name": "Decentralized Voting",
-            "description": "Multi-proposal voting with delegate support",
-            "category": "Governance",
-            "difficulty": "intermediate"
-        },
-        {
-            "id": "token",
-            "name": "Token Contract",
-            "description": "Fungible token with transfer and balance tracking",
-            "category": "Finance",
-            "difficulty": "beginner"
-        },
-        {
-            "id": "nft",
-            "name": "NFT Collection",
-            "description": "Non-fungible token with minting and transfers",
-            "category": "Collectibles",
-            "difficulty": "intermediate"
-        },
-        {
-            "id": "multisig",
-            "name": "Multi-Signature Wallet",
-            "description": "Wallet requiring multiple approvals",
-            "category": "Security",
-            "difficulty": "advanced"
-        },
-        {
-            "id": "escrow",
-            "name": "Escrow Service",
-            "description": "Trustless escrow with dispute resolution",
-            "category": "Finance",
-            "difficulty": "intermediate"
-        },
-        {
-            "id": "auction",
-            "name": "Auction Platform",
-            "description": "English auction with automatic bidding",
-            "category": "Marketplace",
-            "difficulty": "advanced"
-        },
-        {
-            "id": "lottery",
-            "name": "Decentralized Lottery",
-            "description": "Provably fair lottery system",
-            "category": "Gaming",
-            "difficulty": "intermediate"
-        },
-        {
-            "id": "staking",
-            "name": "Staking Contract",
-            "description": "Token staking with rewards",
-            "category": "DeFi",
-            "difficulty": "advanced"
-        }
-    ]
+    templates = [t.info() for t in template_registry.listed()]
 
     return {
         "success": True,
@@ -112,33 +105,111 @@ async def list_templates():
     }
 
 
+@router.get("/templates/{template_id}")
+async def get_template(template_id: str, request: Request):
+    """
+    Get a template's code
+
+    Responses carry an ETag and Cache-Control so browsers and CDNs can cache
+    them; a matching If-None-Match gets 304 Not Modified.
+    """
+    template = template_registry.get(template_id)
+    if template is None or not template.listed:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    headers = {
+        "ETag": template.etag,
+        "Cache-Control": f"public, max-age={settings.TEMPLATE_CACHE_MAX_AGE}"
+    }
+    if template.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(
+        content={"success": True, "template": template.info(), "code": template.code},
+        headers=headers
+    )
+
+
 @router.post("/explain")
 async def explain_code(code: str):
-    """Explain what a smart contract does"""
+    """
+    Explain what a smart contract does
+
+    complexity and estimated_gas come from the contract's cached cost profile
+    (see /api/profile): complexity follows the steepest per-method cost growth
+    as state grows, and estimated_gas is the most contract basic blocks a
+    single call executed. Qubic charges no fees; this is compute. Profiling
+    takes seconds, so without a cached profile one is queued instead and its
+    profile_job_id returned; explain again once the job has finished.
+    """
     # In production, this would use AI to explain the code
-    return {
+    response = {
         "success": True,
         "explanation": "This contract implements key functionality leveraging Qubic's features.",
-        "complexity": "medium",
-        "estimated_gas": 0,  # Qubic is feeless!
-        "key_functions": ["initialize", "execute", "query"]
+        "complexity": None,
+        "estimated_gas": None,
+        "key_functions": [],
     }
+    try:
+        _, methods, _ = await run_in_threadpool(contract_struct, code)
+    except HarnessBuildError as e:
+        response["profile_error"] = str(e)
+        return response
+    response["key_functions"] = list(dict.fromkeys(hm.method.name for hm in methods))
+
+    report = cost_profiler.cached(code)
+    if report is None:
+        try:
+            job = await profile_contract(ProfileRequest(code=code))
+        except HTTPException as e:
+            response["profile_error"] = str(e.detail)
+        else:
+            response["profile_job_id"] = job["job_id"]
+        return response
+
+    response.update({
+        "complexity": report.complexity,
+        "estimated_gas": report.max_blocks,
+        "cost_unit": "basic blocks",
+        "methods": [
+            {"method": m.method, "growth": m.growth, "state_driver": m.state_driver,
+             "unmeasured_reason": m.unmeasured_reason,
+             "blocks": m.samples[-1].blocks if m.samples else 0}
+            for m in report.methods
+        ],
+    })
+    return response
 
 
-@router.post("/optimize")
+@router.post("/optimize", response_model=OptimizeResponse)
 async def optimize_code(code: str):
-    """Suggest optimizations for smart contract code"""
-    return {
-        "success": True,
-        "original_code": code,
-        "optimized_code": code,  # Would be AI-optimized in production
-        "improvements": [
-            "Reduced computational complexity",
-            "Improved memory efficiency",
-            "Better error handling"
-        ],
-        "savings": {
-            "gas": 0,  # Qubic is feeless, but still good to optimize
-            "execution_time": "15%"
-        }
-    }
+    """
+    Suggest performance optimizations for smart contract code
+
+    A static pass over the parsed contract (a few milliseconds, cheap enough
+    to run on every save): the state footprint computed from struct fields
+    and array bounds, and findings for linear lookups, lookups repeated or
+    nested in loops, and redundant copyMemory calls, each with the rewrite
+    to make at its line. Use /api/profile to measure the costs instead.
+    """
+    start_time = time.perf_counter()
+    result = await run_in_threadpool(analyze_performance, code)
+    footprint = result.footprint
+
+    return OptimizeResponse(
+        success=True,
+        suggestions=result.issues,
+        improvements=[f"Line {i.line}: {i.fix}" for i in result.issues if i.fix],
+        state_footprint=StateFootprint(
+            contract=footprint.struct,
+            bytes=footprint.size,
+            human=format_bytes(footprint.size),
+            fields=[
+                StateField(name=f.name, type_name=f.type_name, line=f.line, offset=f.offset, bytes=f.size,
+                           count=f.count)
+                for f in sorted(footprint.fields, key=lambda f: -f.size)
+            ],
+            unresolved=footprint.unresolved
+        ),
+        execution_time=time.perf_counter() - start_time
+    )
@@ -0,0 +1,208 @@
+"""
+Contract testing API endpoints
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import logging
+import time
+
+from typing import List, Optional
+
+from app.models.schemas import (
+    CompileDiagnostic,
+    FuzzReport,
+    FuzzRequest,
+    ProfileReport,
+    ProfileRequest,
+    TestRequest,
+    TestResponse
+)
+from app.services.compiler import BuildTimeout, CompilerUnavailable, compiler_service
+from app.services.contract_store import contract_store
+from app.services.cost_profiler import ProfileTooLarge, cost_profiler
+from app.services.fuzzer import fuzzer
+from app.services.job_queue import QueueFullError, job_queue
+from app.services.pubsub import job_topic
+from app.services.test_runner import HarnessBuildError, test_runner
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.post("/test", response_model=TestResponse)
+async def run_tests(request: TestRequest):
+    """
+    Run test scenarios against a contract's PUBLIC methods
+
+    The contract (stored by contract_id, or the given code) is compiled once
+    into a native harness; scenarios then run in parallel on a pool of
+    harness processes, each starting from zeroed contract state. See
+    app/services/test_runner.py for the inputs / expected_outputs format.
+    With `stream: true` each TestResult is sent as an NDJSON line as soon as
+    it finishes, followed by a final summary line.
+    """
+    if len(request.scenarios) > settings.TEST_MAX_SCENARIOS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many scenarios (max {settings.TEST_MAX_SCENARIOS})"
+        )
+
+    code = await _contract_code(request.contract_id, request.code)
+
+    start_time = time.time()
+    try:
+        encoder, executable, build = await test_runner.prepare(code)
+    except HarnessBuildError as e:
+        detail = {"message": str(e)}
+        if e.result is not None:
+            detail["errors"] = [d.model_dump() for d in e.result.errors]
+        raise HTTPException(status_code=422, detail=detail)
+    except (BuildTimeout, CompilerUnavailable) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    logger.info(
+        f"🧪 Running {len(request.scenarios)} scenarios "
+        f"(harness {'cached' if build.cache_hit else 'built'} in {build.compile_time:.2f}s)"
+    )
+    results = test_runner.run(encoder, executable, request.scenarios)
+
+    if request.stream:
+        async def ndjson_stream():
+            passed = 0
+            async for result in results:
+                passed += result.passed
+                yield result.model_dump_json() + "\n"
+            yield TestResponse(
+                success=passed == len(request.scenarios),
+                total_tests=len(request.scenarios),
+                passed_tests=passed,
+                failed_tests=len(request.scenarios) - passed,
+                results=[],
+                overall_execution_time=time.time() - start_time
+            ).model_dump_json() + "\n"
+
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+    collected = [result async for result in results]
+    collected.sort(key=lambda result: result.index)
+    passed = sum(1 for result in collected if result.passed)
+
+    return TestResponse(
+        success=passed == len(collected),
+        total_tests=len(collected),
+        passed_tests=passed,
+        failed_tests=len(collected) - passed,
+        results=collected,
+        overall_execution_time=time.time() - start_time
+    )
+
+
+@router.post("/fuzz")
+async def fuzz_contract(request: FuzzRequest):
+    """
+    Fuzz a contract's PUBLIC methods
+
+    The contract is built with undefined-behaviour checks and edge coverage,
+    then driven with generated call sequences for `duration` seconds as a
+    background job on the fuzz lane (JOB_FUZZ_WORKERS campaigns at a time,
+    apart from the compile/deploy workers) sharing the harness slots. Poll /api/jobs/{job_id} or subscribe
+    to its topic for the FuzzReport: each unique crash or hang comes back as
+    an Issue at its source line with a /api/test reproducer.
+    """
+    code = await _contract_code(request.contract_id, request.code)
+    duration = min(request.duration or settings.FUZZ_DEFAULT_DURATION, settings.FUZZ_MAX_DURATION)
+    max_calls = min(request.max_calls or settings.FUZZ_MAX_CALLS, settings.FUZZ_MAX_CALLS)
+
+    try:
+        job = await job_queue.submit("fuzz", lambda: _run_fuzz(code, duration, request.seed, max_calls))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    return {
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "duration": duration,
+        "message": f"Fuzzing queued for {duration:g}s. Subscribe to {job_topic(job.id)} on /ws "
+                   f"or poll /api/jobs/{job.id} for the report."
+    }
+
+
+async def _run_fuzz(code: str, duration: float, seed: Optional[int], max_calls: int) -> dict:
+    """Fuzz job body, executed on the job queue workers"""
+    try:
+        report = await fuzzer.run(code, duration, seed=seed, max_calls=max_calls)
+    except HarnessBuildError as e:
+        report = FuzzReport(success=False, message=str(e), errors=e.result.errors if e.result else [])
+    except (BuildTimeout, CompilerUnavailable) as e:
+        report = FuzzReport(success=False, message=str(e), errors=[CompileDiagnostic(severity="error", message=str(e))])
+    return report.model_dump(mode="json")
+
+
+@router.post("/profile")
+async def profile_contract(request: ProfileRequest):
+    """
+    Profile the execution cost of a contract's PUBLIC methods
+
+    The contract's state is grown by repeating each mutating method, and every
+    method is measured at each state size (contract basic blocks executed,
+    plus instructions and wall time where the host exposes counters). Every
+    probe replays the growth from zeroed state, so requests that would
+    replay more than PROFILE_MAX_CALLS calls are rejected with 422. Runs
+    as a background job; the ProfileReport gives each method's cost samples
+    and its fitted growth order, e.g. O(n) in the number of holders.
+    """
+    code = await _contract_code(request.contract_id, request.code)
+    sizes = request.state_sizes
+    if sizes and (len(sizes) > 16 or max(sizes) > settings.TEST_MAX_CALLS_PER_SCENARIO or min(sizes) < 0):
+        raise HTTPException(
+            status_code=422,
+            detail=f"state_sizes: at most 16 sizes between 0 and {settings.TEST_MAX_CALLS_PER_SCENARIO}"
+        )
+    try:
+        await run_in_threadpool(cost_profiler.check_budget, code, sizes)
+    except (HarnessBuildError, ProfileTooLarge) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        job = await job_queue.submit("profile", lambda: _run_profile(code, sizes))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    return {
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "message": f"Profiling queued. Subscribe to {job_topic(job.id)} on /ws "
+                   f"or poll /api/jobs/{job.id} for the report."
+    }
+
+
+async def _run_profile(code: str, sizes: Optional[List[int]]) -> dict:
+    """Profile job body, executed on the job queue workers"""
+    try:
+        report = await cost_profiler.profile(code, sizes)
+    except HarnessBuildError as e:
+        report = ProfileReport(success=False, message=str(e), errors=e.result.errors if e.result else [])
+    except (BuildTimeout, CompilerUnavailable, ProfileTooLarge) as e:
+        report = ProfileReport(
+            success=False, message=str(e), errors=[CompileDiagnostic(severity="error", message=str(e))]
+        )
+    return report.model_dump(mode="json")
+
+
+async def _contract_code(contract_id: Optional[str], code: Optional[str]) -> str:
+    """Source of the stored contract, or the given code; checks a compiler is installed"""
+    if code is None:
+        if not contract_id:
+            raise HTTPException(status_code=400, detail="Provide contract_id or code")
+        contract = await run_in_threadpool(contract_store.get, contract_id)
+        if contract is None:
+            raise HTTPException(status_code=404, detail="Contract not found")
+        code = contract.code
+    if not compiler_service.available:
+        raise HTTPException(status_code=503, detail=f"C++ compiler '{settings.COMPILER}' is not installed")
+    return code
@@ -5,11 +5,23 @@ Main FastAPI application entry point
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
 
-from app.api import generate, audit, deploy, contracts
+from app.api import generate, audit, deploy, contracts, debug, testing
+from app.services.ai_service import ai_service
+from app.services.audit_cache import audit_cache
+from app.services.compiler import compiler_service
+from app.services.fuzzer import fuzzer
+from app.services.job_queue import job_queue
+from app.services.diagnostics import ProfilingMiddleware, loop_block_detector, request_profiler
+from app.services.metrics import CONTENT_TYPE, MetricsMiddleware, loop_lag_monitor, metrics
+from app.services.pubsub import CLIENT_TOPIC_PREFIX, MESSAGES_TOPIC, client_publishable, pubsub, valid_topic
+from app.services.semantic_cache import semantic_cache
+from app.services.ws_hub import ws_hub
 from app.utils.config import settings
 
 # Configure logging
@@ -25,8 +37,20 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Qubic Smart Contract Studio API starting...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"Mock Mode: {settings.MOCK_MODE}")
+    await job_queue.start()
+    await pubsub.start()
+    if settings.METRICS_ENABLED:
+        loop_lag_monitor.start()
+    if settings.LOOP_BLOCK_DETECTOR_ENABLED:
+        loop_block_detector.start()
     yield
     logger.info("Shutting down API...")
+    await loop_lag_monitor.stop()
+    await loop_block_detector.stop()
+    await job_queue.stop()
+    await ws_hub.close()
+    await pubsub.stop()
+    await ai_service.aclose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -45,31 +69,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request sampling profiler (not installed at all unless enabled)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
+# Request timing for every router (outermost, so it sees the final status)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(generate.router, prefix="/api", tags=["AI Code Generation"])
 app.include_router(audit.router, prefix="/api", tags=["Security Auditing"])
 app.include_router(deploy.router, prefix="/api", tags=["Deployment"])
 app.include_router(contracts.router, prefix="/api", tags=["Contracts"])
-
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
-
-manager = ConnectionManager()
+app.include_router(testing.router, prefix="/api", tags=["Testing"])
+if settings.LOOP_BLOCK_DETECTOR_ENABLED or settings.PROFILING_ENABLED:
+    app.include_router(debug.router, prefix="/debug", tags=["Debug"])
 
 @app.get("/")
 async def root():
@@ -103,22 +118,187 @@ async def health_check():
         "ai_provider": settings.AI_PROVIDER,
         "ai_model": settings.AI_MODEL,
         "huggingface_key_set": bool(settings.HUGGINGFACE_API_KEY),
-        "openai_key_set": bool(settings.OPENAI_API_KEY)
+        "openai_key_set": bool(settings.OPENAI_API_KEY),
+        "ai_providers": ai_service.llm.stats() if ai_service.llm else None,
+        "request_coalescing": ai_service.flights.stats(),
+        "compiler": compiler_service.stats(),
+        "websockets": ws_hub.stats(),
+        "pubsub": pubsub.stats()
+    }
+
+def _cache_stats() -> dict:
+    return {
+        "audit": audit_cache.stats(),
+        "generation": semantic_cache.stats(),
+        "compile": compiler_service.cache.stats()
     }
 
+
+def _provider_circuits() -> dict:
+    if ai_service.llm is None:
+        return {}
+    providers = ai_service.llm.stats()["providers"]
+    return {(name, p["circuit"]): 1 for name, p in providers.items()}
+
+
+metrics.counter(
+    "cache_requests_total", "Cache lookups by cache and result", ("cache", "result"),
+    callback=lambda: {
+        (name, result): stats[f"{result}es" if result == "miss" else "hits"]
+        for name, stats in _cache_stats().items() for result in ("hit", "miss")
+    }
+)
+metrics.gauge(
+    "cache_hit_ratio", "Share of cache lookups that hit", ("cache",),
+    callback=lambda: {
+        (name,): stats["hits"] / (stats["hits"] + stats["misses"]) if stats["hits"] + stats["misses"] else 0.0
+        for name, stats in _cache_stats().items()
+    }
+)
+metrics.gauge(
+    "cache_entries", "Entries held by each cache", ("cache",),
+    callback=lambda: {(name,): stats["entries"] for name, stats in _cache_stats().items()}
+)
+metrics.gauge("job_queue_depth", "Jobs waiting for a worker", callback=lambda: {(): job_queue.depth})
+metrics.gauge(
+    "compile_builds_active", "Toolchain processes currently running",
+    callback=lambda: {(): compiler_service.active}
+)
+metrics.counter(
+    "compile_builds_total", "Contract builds that ran the compiler (cache misses)",
+    callback=lambda: {(): compiler_service.builds}
+)
+metrics.counter(
+    "fuzz_executions_total", "Call sequences run by the contract fuzzer",
+    callback=lambda: {(): fuzzer.executions}
+)
+metrics.gauge("websocket_connections", "Open /ws connections", callback=lambda: {(): len(ws_hub)})
+metrics.gauge(
+    "websocket_queued_frames", "Frames waiting in per-connection send queues",
+    callback=lambda: {(): ws_hub.stats()["queued_frames"]}
+)
+metrics.counter(
+    "websocket_frames_dropped_total", "Frames dropped for slow consumers",
+    callback=lambda: {(): ws_hub.frames_dropped}
+)
+metrics.counter(
+    "ai_requests_coalesced_total", "Generate/audit calls served by an identical in-flight call",
+    callback=lambda: {(): ai_service.flights.coalesced}
+)
+metrics.gauge(
+    "ai_provider_circuit_state", "1 for the current circuit breaker state of each provider",
+    ("provider", "state"), callback=_provider_circuits
+)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+async def stream_generation(websocket: WebSocket, request: dict):
+    """Relay streamed generation to a single socket as typed frames"""
+    request_id = request.get("request_id")
+    await ws_hub.send_personal(websocket, {"type": "generate.start", "request_id": request_id})
+
+    async for event in ai_service.stream_contract(
+        prompt=request.get("prompt", ""),
+        template=request.get("template"),
+        additional_context=request.get("additional_context")
+    ):
+        data = event["data"]
+        if event["type"] == "done":
+            data = data.model_dump()
+        await ws_hub.send_personal(websocket, {
+            "type": f"generate.{event['type']}",
+            "request_id": request_id,
+            "data": data
+        })
+
+
+async def handle_subscription(websocket: WebSocket, request: dict):
+    """Apply a subscribe / unsubscribe frame and acknowledge it"""
+    topics = request.get("topics")
+    if not isinstance(topics, list):
+        topics = [request.get("topic")]
+    invalid = [t for t in topics if not valid_topic(t)]
+    if invalid:
+        await ws_hub.send_personal(websocket, {"type": "error", "message": f"Invalid topics: {invalid}"})
+        return
+
+    if request["type"] == "subscribe":
+        current = ws_hub.topics_of(websocket)
+        if len(current | set(topics)) > settings.WS_MAX_TOPICS_PER_CONNECTION:
+            await ws_hub.send_personal(websocket, {
+                "type": "error",
+                "message": f"At most {settings.WS_MAX_TOPICS_PER_CONNECTION} topics per connection"
+            })
+            return
+        for topic in topics:
+            await pubsub.subscribe(websocket, topic)
+    else:
+        for topic in topics:
+            pubsub.unsubscribe(websocket, topic)
+
+    await ws_hub.send_personal(websocket, {
+        "type": f"{request['type']}d",
+        "topics": sorted(ws_hub.topics_of(websocket))
+    })
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
-    await manager.connect(websocket)
+    """
+    WebSocket endpoint for real-time updates
+
+    Frames sent by the client:
+    - {"type": "subscribe" | "unsubscribe", "topics": [...]} manages topic
+      subscriptions, e.g. "contract:<id>", "audit:<id>", "deployment:<id>"
+    - {"type": "publish", "topic": ..., "data": ...} sends data to a topic's
+      subscribers on every worker; clients may only publish to "messages"
+      and "chat:<room>", the other topics belong to the server
+    - {"type": "generate", "prompt": ..., "request_id": ...} streams a
+      generation back to the sender as generate.start / generate.token /
+      generate.done / generate.error frames
+
+    Topic traffic arrives as {"type": "event", "topic": ..., "data": ...}.
+    Anything else is published as {"type": "message", "data": ...} on the
+    "messages" topic.
+    """
+    await ws_hub.connect(websocket)
+    tasks: set[asyncio.Task] = set()
     try:
         while True:
             data = await websocket.receive_text()
-            await manager.broadcast({
-                "type": "message",
-                "data": data
-            })
+
+            try:
+                request = json.loads(data)
+            except ValueError:
+                request = None
+            kind = request.get("type") if isinstance(request, dict) else None
+
+            if kind == "generate":
+                task = asyncio.create_task(stream_generation(websocket, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            elif kind in ("subscribe", "unsubscribe"):
+                await handle_subscription(websocket, request)
+            elif kind == "publish":
+                if not valid_topic(request.get("topic")):
+                    await ws_hub.send_personal(websocket, {"type": "error", "message": "Invalid topic"})
+                elif not client_publishable(request["topic"]):
+                    await ws_hub.send_personal(websocket, {
+                        "type": "error",
+                        "message": f"Clients may only publish to '{MESSAGES_TOPIC}' or '{CLIENT_TOPIC_PREFIX}<room>'"
+                    })
+                else:
+                    await pubsub.publish(request["topic"], request.get("data"))
+            else:
+                await pubsub.publish(MESSAGES_TOPIC, data, event_type="message")
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        ws_hub.disconnect(websocket)
+        for task in tasks:
+            task.cancel()
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
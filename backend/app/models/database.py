@@ -0,0 +1,125 @@
+"""
+SQLAlchemy models and engine for persistent storage
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, String, Table, Text, create_engine, event, inspect, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class ContractRecord(Base):
+    __tablename__ = "contracts"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    name: Mapped[str] = mapped_column(String(100))
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    code: Mapped[str] = mapped_column(Text)
+    language: Mapped[str] = mapped_column(String(16), default="cpp")
+    version: Mapped[str] = mapped_column(String(32), default="1.0.0")
+    author: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+    compiled: Mapped[bool] = mapped_column(Boolean, default=False)
+    deployed: Mapped[bool] = mapped_column(Boolean, default=False)
+    deployment_address: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    network: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+
+    # Every list query orders by (updated_at DESC, id DESC) for cursor pagination,
+    # so each filter column leads a composite index ending in that sort key.
+    __table_args__ = (
+        Index("ix_contracts_updated", "updated_at", "id"),
+        Index("ix_contracts_author_updated", "author", "updated_at", "id"),
+        Index("ix_contracts_author_deployed_updated", "author", "deployed", "updated_at", "id"),
+        Index("ix_contracts_deployed_updated", "deployed", "updated_at", "id"),
+        Index("ix_contracts_compiled_updated", "compiled", "updated_at", "id"),
+    )
+
+
+class DeploymentRecord(Base):
+    __tablename__ = "deployments"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    contract_id: Mapped[str] = mapped_column(String(36))
+    network: Mapped[str] = mapped_column(String(16))
+    address: Mapped[str] = mapped_column(String(128))
+    transaction_hash: Mapped[str] = mapped_column(String(128))
+    timestamp: Mapped[datetime] = mapped_column(DateTime)
+    status: Mapped[str] = mapped_column(String(16))
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    gas_used: Mapped[int] = mapped_column(BigInteger, default=0)
+    ipo_config: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # IPOConfig as JSON
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Listing filters on contract and/or network, newest first
+    __table_args__ = (
+        Index("ix_deployments_contract_timestamp", "contract_id", "timestamp"),
+        Index("ix_deployments_network_timestamp", "network", "timestamp"),
+    )
+
+
+class CounterRecord(Base):
+    """Named aggregate counter, updated in the same transaction as the event it counts"""
+
+    __tablename__ = "platform_counters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, _):
+            # WAL lets several uvicorn workers read while one writes
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return engine
+
+    return create_engine(url, pool_pre_ping=True)
+
+
+def add_missing_columns(bind, table: Table) -> List[str]:
+    """
+    ALTER TABLE ADD COLUMN for the nullable columns of a model that an existing
+    table lacks (create_all only creates missing tables); returns the names added
+    """
+    if not inspect(bind).has_table(table.name):
+        return []
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    preparer = bind.dialect.identifier_preparer
+    added = []
+    with bind.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                logger.error(f"❌ {table.name}.{column.name} is missing and NOT NULL; migrate it by hand")
+                continue
+            connection.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                f"{preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}"
+            ))
+            added.append(column.name)
+    if added:
+        logger.info(f"🛠️ Added columns to {table.name}: {', '.join(added)}")
+    return added
+
+
+engine = _create_engine(settings.DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
@@ -3,7 +3,7 @@ Pydantic models for request/response schemas
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Any, Optional, List, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -23,6 +23,13 @@ class DeploymentStatus(str, Enum):
     FAILED = "failed"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class IssueSeverity(str, Enum):
     CRITICAL = "critical"
     HIGH = "high"
@@ -54,12 +61,18 @@ class GenerateResponse(BaseModel):
     suggestions: List[str]
     estimated_complexity: str
     execution_time: float
+    cache_hit: bool = Field(False, description="Whether the code came from the semantic generation cache")
+    cache_similarity: Optional[float] = Field(None, description="Prompt similarity to the cached generation")
 
 
 # Security Auditing
 class AuditRequest(BaseModel):
     code: str = Field(..., description="Smart contract code to audit")
     contract_name: Optional[str] = Field(None, description="Name of the contract")
+    contract_id: Optional[str] = Field(
+        None,
+        description="Contract ID; when set, only methods changed since this contract's last audit are re-analyzed"
+    )
 
     class Config:
         json_schema_extra = {
@@ -88,6 +101,47 @@ class AuditResponse(BaseModel):
     recommendations: List[str]
     execution_time: float
     passed: bool = Field(..., description="Whether the contract passed the audit (score >= 80)")
+    cache_hit: bool = Field(False, description="Whether the result was served from the audit cache")
+    cache_age: Optional[float] = Field(None, description="Age of the cached result in seconds")
+    methods_reanalyzed: Optional[int] = Field(None, description="Incremental audits: methods analyzed in this run")
+    methods_reused: Optional[int] = Field(None, description="Incremental audits: methods served from the previous audit")
+
+
+class BatchAuditRequest(BaseModel):
+    items: List[AuditRequest] = Field(..., min_length=1)
+    parallelism: Optional[int] = Field(None, ge=1, description="Max audits running at once")
+    stream: bool = Field(False, description="Stream per-item results as NDJSON as they finish")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"code": "#include <qubic.h>\n\nstruct VotingContract { ... }", "contract_name": "Voting"},
+                    {"code": "#include <qubic.h>\n\nstruct QubicToken { ... }", "contract_name": "Token"}
+                ],
+                "parallelism": 8,
+                "stream": False
+            }
+        }
+
+
+class BatchAuditItem(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    contract_name: Optional[str] = None
+    success: bool
+    result: Optional[AuditResponse] = None
+    error: Optional[str] = None
+    deduplicated: bool = Field(False, description="Result shared with an identical source earlier in the batch")
+
+
+class BatchAuditResponse(BaseModel):
+    success: bool
+    total: int
+    succeeded: int
+    failed: int
+    unique_sources: int
+    results: List[BatchAuditItem]
+    execution_time: float
 
 
 # Smart Contract
@@ -159,13 +213,42 @@ class Deployment(BaseModel):
     network: NetworkType
     address: str
     transaction_hash: str
-    timestamp: datetime
+    timestamp: datetime  # when the deployment was submitted
     status: DeploymentStatus
+    updated_at: Optional[datetime] = None  # last status change
     gas_used: int = 0  # Always 0 for Qubic (feeless)
     ipo_config: Optional[IPOConfig] = None
     error_message: Optional[str] = None
 
 
+# Compilation
+class CompileRequest(BaseModel):
+    code: str = Field(..., description="C++ smart contract source")
+
+
+class CompileDiagnostic(BaseModel):
+    file: Optional[str] = None  # contract.cpp, qubic.h, or the tool name for location-less errors
+    line: Optional[int] = None
+    column: Optional[int] = None
+    severity: Literal["error", "warning", "note"]
+    message: str
+    option: Optional[str] = None  # flag that controls the warning, e.g. -Wunused-variable
+
+
+class CompileResult(BaseModel):
+    success: bool
+    compiled: bool
+    artifact_id: Optional[str] = Field(None, description="Content address of the object file, for /api/artifacts/{id}")
+    size_bytes: int = 0
+    warnings: List[CompileDiagnostic] = []
+    errors: List[CompileDiagnostic] = []
+    notes: List[CompileDiagnostic] = []
+    message: str
+    compiler: Optional[str] = None
+    cache_hit: bool = False
+    compile_time: float = 0.0
+
+
 class DeployResponse(BaseModel):
     success: bool
     deployment: Optional[Deployment] = None
@@ -173,6 +256,18 @@ class DeployResponse(BaseModel):
     execution_time: float
 
 
+# Background Jobs
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
 # Testing
 class TestScenario(BaseModel):
     name: str
@@ -182,11 +277,38 @@ class TestScenario(BaseModel):
 
 
 class TestRequest(BaseModel):
-    contract_id: str
-    scenarios: List[TestScenario]
+    contract_id: Optional[str] = Field(None, description="Stored contract to test")
+    code: Optional[str] = Field(None, description="Source to test instead of a stored contract")
+    scenarios: List[TestScenario] = Field(..., min_length=1)
+    stream: bool = Field(False, description="Stream per-scenario results as NDJSON as they finish")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "contract_id": "contract_123",
+                "scenarios": [
+                    {
+                        "name": "vote once",
+                        "inputs": {
+                            "calls": [
+                                {"method": "createProposal", "args": ["Upgrade", 1000], "invocator": "alice", "block": 1},
+                                {"method": "vote", "args": [0, True], "invocator": "bob", "block": 2},
+                                {"method": "vote", "args": [0, False], "invocator": "bob", "block": 3},
+                                {"method": "getProposal", "args": [0]}
+                            ]
+                        },
+                        "expected_outputs": {
+                            "reverts": [False, False, "Already voted", False],
+                            "result": {"votesFor": 1, "votesAgainst": 0}
+                        }
+                    }
+                ]
+            }
+        }
 
 
 class TestResult(BaseModel):
+    index: int = 0  # position of the scenario in the request
     scenario_name: str
     passed: bool
     actual_output: dict
@@ -203,6 +325,116 @@ class TestResponse(BaseModel):
     overall_execution_time: float
 
 
+# Fuzzing
+class FuzzRequest(BaseModel):
+    contract_id: Optional[str] = Field(None, description="Stored contract to fuzz")
+    code: Optional[str] = Field(None, description="Source to fuzz instead of a stored contract")
+    duration: Optional[float] = Field(None, gt=0, description="Time budget in seconds (capped by FUZZ_MAX_DURATION)")
+    seed: Optional[int] = Field(None, description="Random seed, for repeatable campaigns")
+    max_calls: Optional[int] = Field(None, ge=1, description="Longest call sequence to generate")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "contract_id": "contract_123",
+                "duration": 30
+            }
+        }
+
+
+class FuzzCrash(BaseModel):
+    kind: str  # sanitizer check (out_of_bounds, add_overflow, ...), signal or hang
+    method: str  # PUBLIC method of the crashing call
+    line: int
+    column: int
+    message: str
+    hits: int = Field(..., description="Generated sequences that hit this crash")
+    reproducer: TestScenario = Field(..., description="Shortest crashing sequence found; replay it with /api/test")
+    issue: Issue
+
+
+class FuzzReport(BaseModel):
+    success: bool
+    message: str
+    executions: int = 0
+    execs_per_second: float = 0.0
+    coverage: int = Field(0, description="Distinct edge / hit-count features reached")
+    corpus_size: int = 0
+    crashes: List[FuzzCrash] = []
+    issues: List[Issue] = []
+    errors: List[CompileDiagnostic] = []
+    duration: float = 0.0
+    cache_hit: bool = False
+
+
+# Cost profiling
+class ProfileRequest(BaseModel):
+    contract_id: Optional[str] = Field(None, description="Stored contract to profile")
+    code: Optional[str] = Field(None, description="Source to profile instead of a stored contract")
+    state_sizes: Optional[List[int]] = Field(
+        None, description="State sizes to measure at (defaults to PROFILE_STATE_SIZES)"
+    )
+
+
+class CostSample(BaseModel):
+    state_size: int = Field(..., description="Successful calls to the state-growing method so far")
+    blocks: int = Field(..., description="Contract basic blocks executed")
+    instructions: Optional[int] = Field(None, description="User-space instructions retired, where counters exist")
+    nanoseconds: Optional[int] = Field(None, description="Wall time: call round trip minus an empty round trip")
+    reverted: bool = False
+
+
+class MethodCost(BaseModel):
+    method: str
+    line: int
+    growth: Optional[Literal["O(1)", "O(log n)", "O(n)", "O(n log n)", "O(n^2)"]] = Field(
+        None, description="Fitted growth order; None when no growth run measured the method"
+    )
+    unmeasured_reason: Optional[str] = Field(None, description="Why growth is None")
+    state_driver: Optional[str] = Field(None, description="PUBLIC method whose repeated calls make up n")
+    blocks_per_unit: float = Field(0.0, description="Fitted cost slope, in blocks per unit of the growth term")
+    samples: List[CostSample] = []
+
+
+class ProfileReport(BaseModel):
+    success: bool
+    message: str
+    complexity: Optional[Literal["low", "medium", "high"]] = None
+    worst_growth: Optional[str] = None
+    max_blocks: int = Field(0, description="Most blocks a single call executed at any measured state size")
+    methods: List[MethodCost] = []
+    state_sizes: List[int] = []
+    errors: List[CompileDiagnostic] = []
+    duration: float = 0.0
+    cache_hit: bool = False
+
+
+# Performance linting
+class StateField(BaseModel):
+    name: str
+    type_name: str
+    line: int
+    offset: int = Field(..., description="Byte offset in the contract state")
+    bytes: int
+    count: int = Field(1, description="Array elements, 1 for scalars")
+
+
+class StateFootprint(BaseModel):
+    contract: Optional[str] = None
+    bytes: int = Field(..., description="Size of the contract state struct, with padding")
+    human: str  # e.g. "400 KB"
+    fields: List[StateField] = []  # largest first
+    unresolved: List[str] = Field([], description="Fields whose size could not be computed, counted as 0")
+
+
+class OptimizeResponse(BaseModel):
+    success: bool
+    suggestions: List[Issue] = Field(..., description="Performance findings with concrete rewrites, by line")
+    improvements: List[str]
+    state_footprint: StateFootprint
+    execution_time: float
+
+
 # Templates
 class Template(BaseModel):
     id: str
@@ -1,74 +1,30 @@
 """
 AI Service for code generation and auditing
-Supports both OpenAI and mock mode
+Supports OpenAI, Anthropic and Hugging Face (via the provider router) and mock mode
 """
 
+import asyncio
+import re
 import time
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import logging
 
+from fastapi.concurrency import run_in_threadpool
+
 from app.utils.config import settings
 from app.models.schemas import GenerateResponse, AuditResponse, Issue, IssueSeverity
+from app.services.analysis import ANALYZER_VERSION, analyze, score_issues
+from app.services.audit_parser import StreamingAuditParser, parse_audit_response
+from app.services.audit_pipeline import Snippet, is_unstructured, pipeline_metrics, select_escalations
+from app.services.audit_cache import audit_cache, audit_cache_key
+from app.services.providers import ProviderRouter, create_router
+from app.services.semantic_cache import generation_text, semantic_cache
+from app.services.single_flight import SingleFlight, flight_key
+from app.services.template_registry import template_registry
 
 logger = logging.getLogger(__name__)
 
-
-class AIService:
-    """AI service for code generation and security auditing"""
-
-    def __init__(self):
-        self.mock_mode = settings.MOCK_MODE
-        self.provider = settings.AI_PROVIDER
-        self.client = None
-
-        logger.info(f"🔧 Initializing AI Service - Mock Mode: {self.mock_mode}, Provider: {self.provider}")
-
-        if not self.mock_mode:
-            try:
-                if self.provider == "openai":
-                    if not settings.OPENAI_API_KEY:
-                        raise ValueError("OPENAI_API_KEY not set")
-                    import openai
-                    self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-                    logger.info("✅ OpenAI client initialized")
-                    
-                elif self.provider == "huggingface":
-                    if not settings.HUGGINGFACE_API_KEY:
-                        raise ValueError("HUGGINGFACE_API_KEY not set")
-                    from huggingface_hub import InferenceClient
-                    self.client = InferenceClient(token=settings.HUGGINGFACE_API_KEY)
-                    logger.info("✅ Hugging Face client initialized")
-                    
-                elif self.provider == "anthropic":
-                    if not settings.ANTHROPIC_API_KEY:
-                        raise ValueError("ANTHROPIC_API_KEY not set")
-                    import anthropic
-                    self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-                    logger.info("✅ Anthropic client initialized")
-                else:
-                    raise ValueError(f"Unsupported AI provider: {self.provider}")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize {self.provider} client: {e}")
-                logger.warning("⚠️ Falling back to mock mode")
-                self.mock_mode = True
-        else:
-            logger.info("🎭 Running in MOCK MODE")
-
-    async def generate_contract(
-        self,
-        prompt: str,
-        template: str = None,
-        additional_context: str = None
-    ) -> GenerateResponse:
-        """Generate smart contract code from natural language prompt"""
-        start_time = time.time()
-
-        if self.mock_mode:
-            return self._mock_generate_contract(prompt, template, additional_context, start_time)
-
-        try:
-            # Build the system prompt
-            system_prompt = """You are an expert Qubic smart contract developer.
+GENERATE_SYSTEM_PROMPT = """You are an expert Qubic smart contract developer.
 Generate clean, secure, and efficient C++ smart contracts for the Qubic blockchain.
 
 Key Qubic Features to leverage:
@@ -88,90 +44,18 @@ Follow Qubic best practices:
 
 Generate ONLY the C++ code with inline comments explaining key sections."""
 
-            # Build user prompt
-            user_prompt = f"Create a Qubic smart contract: {prompt}"
-            if template:
-                user_prompt += f"\n\nBase it on the {template} template pattern."
-            if additional_context:
-                user_prompt += f"\n\nAdditional requirements: {additional_context}"
-
-            # Call AI API based on provider
-            if self.provider == "openai":
-                response = self.client.chat.completions.create(
-                    model=settings.AI_MODEL,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=settings.AI_TEMPERATURE,
-                    max_tokens=settings.AI_MAX_TOKENS
-                )
-                code = response.choices[0].message.content.strip()
-            
-            elif self.provider == "huggingface":
-                # Use Hugging Face Inference API (FREE!)
-                logger.info(f"🤗 Using Hugging Face model: {settings.AI_MODEL}")
-                full_prompt = f"{system_prompt}\n\n{user_prompt}\n\nC++ Code:"
-                try:
-                    response = self.client.text_generation(
-                        full_prompt,
-                        model=settings.AI_MODEL,
-                        max_new_tokens=settings.AI_MAX_TOKENS,
-                        temperature=settings.AI_TEMPERATURE,
-                        return_full_text=False
-                    )
-                    code = response.strip()
-                    logger.info(f"✅ Hugging Face generated {len(code)} characters")
-                except Exception as hf_error:
-                    logger.error(f"❌ Hugging Face error: {hf_error}")
-                    raise
-            
-            else:
-                raise ValueError(f"Unsupported provider: {self.provider}")
-
-            # Extract code from markdown if present
-            if "```cpp" in code:
-                code = code.split("```cpp")[1].split("```")[0].strip()
-            elif "```" in code:
-                code = code.split("```")[1].split("```")[0].strip()
+AUDIT_RECOMMENDATIONS = [
+    "✅ Contract structure follows Qubic best practices",
+    "✅ Leverages Qubic's feeless transactions efficiently",
+    "💡 Consider adding more comprehensive input validation",
+    "💡 Add event emissions for important state changes",
+    "🔒 Conduct thorough testing before mainnet deployment"
+]
 
-            execution_time = time.time() - start_time
+# Bump whenever AUDIT_SYSTEM_PROMPT changes so cached audits are invalidated
+AUDIT_PROMPT_VERSION = "1"
 
-            return GenerateResponse(
-                success=True,
-                code=code,
-                explanation=f"Generated {prompt} smart contract using AI.",
-                suggestions=[
-                    "Review the contract logic thoroughly",
-                    "Run security audit before deployment",
-                    "Test all edge cases",
-                    "Consider gas optimization (though Qubic is feeless)"
-                ],
-                estimated_complexity="medium",
-                execution_time=execution_time
-            )
-
-        except Exception as e:
-            logger.error(f"Error generating contract: {e}")
-            return GenerateResponse(
-                success=False,
-                code="// Error generating contract",
-                explanation=f"Error: {str(e)}",
-                suggestions=[],
-                estimated_complexity="unknown",
-                execution_time=time.time() - start_time
-            )
-
-    async def audit_contract(self, code: str, contract_name: str = None) -> AuditResponse:
-        """Audit smart contract for security vulnerabilities"""
-        start_time = time.time()
-
-        if self.mock_mode:
-            return self._mock_audit_contract(code, contract_name, start_time)
-
-        try:
-            # Build audit prompt
-            system_prompt = """You are a security expert for Qubic smart contracts.
+AUDIT_SYSTEM_PROMPT = """You are a security expert for Qubic smart contracts.
 Analyze the provided C++ smart contract code for security vulnerabilities and best practice violations.
 
 Check for:
@@ -204,36 +88,543 @@ Format your response as JSON with this structure:
   "recommendations": ["Use SafeMath", "Add input validation"]
 }"""
 
-            user_prompt = f"Audit this Qubic smart contract:\n\n{code}"
 
-            response = self.client.chat.completions.create(
-                model=settings.AI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Lower temperature for more consistent analysis
-                max_tokens=1500
+class CodeFenceStripper:
+    """
+    Incrementally strip markdown code fences from streamed model output
+
+    Prose before an opening ``` fence and everything after the closing fence
+    are dropped. Output that starts with code (no fence) passes through as-is.
+    """
+
+    PREAMBLE_LIMIT = 2000
+    _CODE_START = re.compile(r"\s*(#|//|/\*|struct\b|class\b|namespace\b|using\b|template\b|typedef\b|enum\b)")
+
+    def __init__(self):
+        self.state = "preamble"  # preamble -> lang -> code -> done, or preamble -> raw
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk and return the code text that is safe to emit"""
+        self._buffer += chunk
+        out = []
+
+        while self._buffer:
+            if self.state == "preamble":
+                fence = self._buffer.find("```")
+                if fence >= 0:
+                    self._buffer = self._buffer[fence + 3:]
+                    self.state = "lang"
+                    continue
+                first_line, newline, _ = self._buffer.lstrip().partition("\n")
+                if newline and self._CODE_START.match(first_line):
+                    self.state = "raw"
+                elif len(self._buffer) > self.PREAMBLE_LIMIT:
+                    self.state = "raw"
+                else:
+                    break
+
+            elif self.state == "lang":
+                # Skip the language tag line after the opening fence
+                newline = self._buffer.find("\n")
+                if newline < 0:
+                    break
+                self._buffer = self._buffer[newline + 1:]
+                self.state = "code"
+
+            elif self.state == "code":
+                fence = self._buffer.find("```")
+                if fence >= 0:
+                    out.append(self._buffer[:fence])
+                    self._buffer = ""
+                    self.state = "done"
+                    break
+                # Hold back trailing backticks that may start a fence
+                safe = len(self._buffer.rstrip("`"))
+                out.append(self._buffer[:safe])
+                self._buffer = self._buffer[safe:]
+                break
+
+            elif self.state == "raw":
+                out.append(self._buffer)
+                self._buffer = ""
+
+            else:  # done
+                self._buffer = ""
+
+        return "".join(out)
+
+    def finish(self) -> str:
+        """Flush whatever is still buffered at end of stream"""
+        text = "" if self.state in ("lang", "done") else self._buffer
+        self._buffer = ""
+        self.state = "done"
+        return text
+
+
+def strip_code_fences(text: str) -> str:
+    """Extract code from markdown if present (non-streaming helper)"""
+    stripper = CodeFenceStripper()
+    return (stripper.feed(text) + stripper.finish()).strip()
+
+
+class AIService:
+    """AI service for code generation and security auditing"""
+
+    def __init__(self):
+        self.mock_mode = settings.MOCK_MODE
+        self.provider = settings.AI_PROVIDER
+        self.llm: Optional[ProviderRouter] = None
+        self.flights = SingleFlight()
+
+        logger.info(f"🔧 Initializing AI Service - Mock Mode: {self.mock_mode}, Provider: {self.provider}")
+
+        if not self.mock_mode:
+            # Failing providers are circuit-broken per call rather than swapped for mocks
+            self.llm = create_router(self.provider)
+            if not self.llm.providers:
+                logger.error("❌ No AI provider could be initialized; AI calls will fail until one is configured")
+        else:
+            logger.info("🎭 Running in MOCK MODE")
+
+    async def aclose(self):
+        """Close pooled provider connections"""
+        if self.llm is not None:
+            await self.llm.aclose()
+
+    async def generate_contract(
+        self,
+        prompt: str,
+        template: str = None,
+        additional_context: str = None
+    ) -> GenerateResponse:
+        """Generate smart contract code from natural language prompt (identical concurrent calls share one)"""
+        return await self.flights.do(
+            flight_key("generate", prompt, template, additional_context),
+            lambda: self._generate_contract(prompt, template, additional_context)
+        )
+
+    async def _generate_contract(
+        self,
+        prompt: str,
+        template: Optional[str],
+        additional_context: Optional[str]
+    ) -> GenerateResponse:
+        start_time = time.time()
+
+        if self.mock_mode:
+            return self._mock_generate_contract(prompt, template, additional_context, start_time)
+
+        cached = self._cached_generation(prompt, template, additional_context, start_time)
+        if cached is not None:
+            return cached
+
+        try:
+            user_prompt = self._build_generate_prompt(prompt, template, additional_context)
+
+            # Call AI API (async, bounded per provider)
+            code = await self.llm.complete(
+                GENERATE_SYSTEM_PROMPT,
+                user_prompt,
+                temperature=settings.AI_TEMPERATURE,
+                max_tokens=settings.AI_MAX_TOKENS
             )
+            logger.info(f"✅ {self.provider} generated {len(code)} characters")
+
+            # Extract code from markdown if present
+            code = strip_code_fences(code)
+
+            result = self._generated_response(prompt, code, start_time)
+            self._store_generation(prompt, template, additional_context, result)
+            return result
 
-            # Parse response (simplified - in production use JSON parsing)
-            audit_result = self._parse_audit_response(response.choices[0].message.content)
+        except Exception as e:
+            logger.error(f"Error generating contract: {e}")
+            return GenerateResponse(
+                success=False,
+                code="// Error generating contract",
+                explanation=f"Error: {str(e)}",
+                suggestions=[],
+                estimated_complexity="unknown",
+                execution_time=time.time() - start_time
+            )
+
+    async def stream_contract(
+        self,
+        prompt: str,
+        template: str = None,
+        additional_context: str = None
+    ) -> AsyncIterator[dict]:
+        """
+        Stream contract generation as typed events
+
+        Yields {"type": "token", "data": str} as code arrives (markdown fences
+        stripped on the fly) and finishes with {"type": "done", "data": GenerateResponse}
+        or {"type": "error", "data": str}.
+        """
+        start_time = time.time()
+
+        if self.mock_mode:
+            result = self._mock_generate_contract(prompt, template, additional_context, start_time)
+            for line in result.code.splitlines(keepends=True):
+                yield {"type": "token", "data": line}
+                await asyncio.sleep(0)
+            yield {"type": "done", "data": result}
+            return
+
+        cached = self._cached_generation(prompt, template, additional_context, start_time)
+        if cached is not None:
+            for line in cached.code.splitlines(keepends=True):
+                yield {"type": "token", "data": line}
+            yield {"type": "done", "data": cached}
+            return
+
+        stripper = CodeFenceStripper()
+        parts: List[str] = []
+        try:
+            user_prompt = self._build_generate_prompt(prompt, template, additional_context)
+            async for chunk in self.llm.stream(
+                GENERATE_SYSTEM_PROMPT,
+                user_prompt,
+                temperature=settings.AI_TEMPERATURE,
+                max_tokens=settings.AI_MAX_TOKENS
+            ):
+                text = stripper.feed(chunk)
+                if text:
+                    parts.append(text)
+                    yield {"type": "token", "data": text}
+
+            text = stripper.finish()
+            if text:
+                parts.append(text)
+                yield {"type": "token", "data": text}
+
+            code = "".join(parts).strip()
+            logger.info(f"✅ {self.provider} streamed {len(code)} characters")
+            result = self._generated_response(prompt, code, start_time)
+            self._store_generation(prompt, template, additional_context, result)
+            yield {"type": "done", "data": result}
+
+        except Exception as e:
+            logger.error(f"Error streaming contract: {e}")
+            yield {"type": "error", "data": str(e)}
+
+    def _build_generate_prompt(self, prompt: str, template: str, additional_context: str) -> str:
+        """Build the user prompt for contract generation"""
+        user_prompt = f"Create a Qubic smart contract: {prompt}"
+        if template:
+            user_prompt += f"\n\nBase it on the {template} template pattern."
+        if additional_context:
+            user_prompt += f"\n\nAdditional requirements: {additional_context}"
+        return user_prompt
+
+    def _cached_generation(
+        self,
+        prompt: str,
+        template: Optional[str],
+        additional_context: Optional[str],
+        start_time: float
+    ) -> Optional[GenerateResponse]:
+        """Past generation for a near-identical request, if the semantic cache has one"""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+
+        found = semantic_cache.lookup(
+            generation_text(prompt, additional_context),
+            partition=self._generation_partition(template)
+        )
+        if found is None:
+            return None
 
-            execution_time = time.time() - start_time
+        value, similarity = found
+        logger.info(f"♻️ Semantic cache hit ({similarity:.2f}) for prompt: {prompt[:100]}")
+        return GenerateResponse(
+            **value,
+            execution_time=time.time() - start_time,
+            cache_hit=True,
+            cache_similarity=round(similarity, 4)
+        )
 
-            return AuditResponse(
-                success=True,
-                score=audit_result["score"],
-                issues=audit_result["issues"],
-                summary=audit_result["summary"],
-                recommendations=audit_result["recommendations"],
-                execution_time=execution_time,
-                passed=audit_result["score"] >= 80
+    def _store_generation(
+        self,
+        prompt: str,
+        template: Optional[str],
+        additional_context: Optional[str],
+        result: GenerateResponse
+    ):
+        if settings.SEMANTIC_CACHE_ENABLED and result.success and result.code:
+            semantic_cache.store(
+                generation_text(prompt, additional_context),
+                result.model_dump(exclude={"execution_time", "cache_hit", "cache_similarity"}),
+                partition=self._generation_partition(template)
             )
 
+    def _generation_partition(self, template: Optional[str]) -> str:
+        """Only generations from the same model and template are interchangeable"""
+        return f"{self.provider}:{settings.AI_MODEL}:{template or ''}"
+
+    def _generated_response(self, prompt: str, code: str, start_time: float) -> GenerateResponse:
+        """Wrap AI-generated code in a GenerateResponse"""
+        return GenerateResponse(
+            success=True,
+            code=code,
+            explanation=f"Generated {prompt} smart contract using AI.",
+            suggestions=[
+                "Review the contract logic thoroughly",
+                "Run security audit before deployment",
+                "Test all edge cases",
+                "Consider gas optimization (though Qubic is feeless)"
+            ],
+            estimated_complexity="medium",
+            execution_time=time.time() - start_time
+        )
+
+    async def audit_contract(self, code: str, contract_name: str = None) -> AuditResponse:
+        """Audit smart contract for security vulnerabilities (cached by normalized source)"""
+        start_time = time.time()
+        cache_key = audit_cache_key(code, self._audit_model(), AUDIT_PROMPT_VERSION)
+
+        cached = await audit_cache.get(cache_key)
+        if cached is not None:
+            cached.execution_time = time.time() - start_time
+            return cached
+
+        # Concurrent audits of the same source share one run
+        return await self.flights.do(
+            f"audit:{cache_key}",
+            lambda: self._audit_uncached(code, contract_name, cache_key, start_time)
+        )
+
+    async def _audit_uncached(
+        self,
+        code: str,
+        contract_name: Optional[str],
+        cache_key: str,
+        start_time: float
+    ) -> AuditResponse:
+        if self.mock_mode:
+            result = await self._mock_audit_contract(code, contract_name, start_time)
+        else:
+            try:
+                if settings.AUDIT_TIERED:
+                    result = await self._tiered_audit_contract(code, start_time)
+                else:
+                    result = await self._llm_audit_contract(code, start_time)
+            except Exception as e:
+                # Fallback results are not cached so the next call retries the provider
+                logger.error(f"Error auditing contract: {e}")
+                if settings.AUDIT_TIERED:
+                    pipeline_metrics.provider_errors += 1
+                return await self._mock_audit_contract(code, contract_name, start_time)
+
+        await audit_cache.set(cache_key, result)
+        return result
+
+    async def stream_audit(self, code: str, contract_name: str = None) -> AsyncIterator[dict]:
+        """
+        Stream a security audit as typed events
+
+        Yields {"type": "issue", "data": Issue} as findings become available
+        (static findings first, AI findings as soon as each one is parsed from
+        the provider stream) and finishes with {"type": "done", "data": AuditResponse}
+        or {"type": "error", "data": str}.
+        """
+        start_time = time.time()
+        cache_key = audit_cache_key(code, self._audit_model(), AUDIT_PROMPT_VERSION)
+
+        cached = await audit_cache.get(cache_key)
+        if cached is not None:
+            for issue in cached.issues:
+                yield {"type": "issue", "data": issue}
+            cached.execution_time = time.time() - start_time
+            yield {"type": "done", "data": cached}
+            return
+
+        result = None
+        try:
+            if self.mock_mode:
+                result = await self._mock_audit_contract(code, contract_name, start_time)
+                for issue in result.issues:
+                    yield {"type": "issue", "data": issue}
+            else:
+                events = (
+                    self._stream_tiered_audit(code, start_time) if settings.AUDIT_TIERED
+                    else self._stream_llm_audit(code, start_time)
+                )
+                async for event in events:
+                    if event["type"] == "done":
+                        result = event["data"]
+                    else:
+                        yield event
         except Exception as e:
-            logger.error(f"Error auditing contract: {e}")
-            return self._mock_audit_contract(code, contract_name, start_time)
+            logger.error(f"Error streaming audit: {e}")
+            if settings.AUDIT_TIERED and not self.mock_mode:
+                pipeline_metrics.provider_errors += 1
+            yield {"type": "error", "data": str(e)}
+            return
+
+        await audit_cache.set(cache_key, result)
+        yield {"type": "done", "data": result}
+
+    def _audit_model(self) -> str:
+        """Identifies what produced an audit, for cache keys"""
+        if self.mock_mode:
+            return f"static:{ANALYZER_VERSION}"
+        if settings.AUDIT_TIERED:
+            return f"tiered:{self.provider}:{settings.AI_MODEL}:{ANALYZER_VERSION}"
+        return f"{self.provider}:{settings.AI_MODEL}"
+
+    async def _tiered_audit_contract(self, code: str, start_time: float) -> AuditResponse:
+        """Static rules first; AI review only for the methods they cannot vouch for"""
+        async for event in self._stream_tiered_audit(code, start_time):
+            if event["type"] == "done":
+                return event["data"]
+
+    async def _stream_tiered_audit(self, code: str, start_time: float) -> AsyncIterator[dict]:
+        """Tiered audit as events: static findings at once, then AI findings as they are parsed"""
+        analysis = await run_in_threadpool(analyze, code)
+        lines = code.splitlines()
+
+        if is_unstructured(analysis):
+            # Nothing the analyzer can reason about: the provider sees the whole file
+            pipeline_metrics.record(len(lines), [], len(lines))
+            async for event in self._stream_llm_audit(code, start_time):
+                yield event
+            return
+
+        snippets = select_escalations(
+            analysis,
+            lines,
+            min_severity=IssueSeverity(settings.AUDIT_ESCALATE_SEVERITY),
+            max_snippets=settings.AUDIT_ESCALATE_MAX_SNIPPETS
+        )
+        pipeline_metrics.record(len(lines), snippets, sum(len(s.line_map) for s in snippets))
+
+        issues = list(analysis.issues)
+        for issue in issues:
+            yield {"type": "issue", "data": issue}
+
+        seen = {(i.line, i.category) for i in issues}
+        async for snippet, issue in self._stream_reviews(snippets):
+            line = snippet.source_line(issue.line)
+            if (line, issue.category) in seen:
+                continue
+            seen.add((line, issue.category))
+            issue = issue.model_copy(update={
+                "line": line,
+                "code_snippet": issue.code_snippet or lines[line - 1].strip()
+            })
+            issues.append(issue)
+            yield {"type": "issue", "data": issue}
+        issues.sort(key=lambda i: (i.line, i.column))
+
+        if snippets:
+            logger.info(
+                f"🔎 Escalated {len(snippets)} methods to {self.provider}: "
+                + ", ".join(f"{s.method.name}() ({s.reason})" for s in snippets)
+            )
+
+        score = score_issues(issues)
+        reviewed = f" + AI review of {len(snippets)} methods" if snippets else ""
+
+        yield {"type": "done", "data": AuditResponse(
+            success=True,
+            score=score,
+            issues=issues,
+            summary=f"Security audit complete (static analysis{reviewed}). "
+                   f"Overall security score: {score}/100. "
+                   f"Found {len(issues)} potential issues. "
+                   f"Contract {'PASSED' if score >= 80 else 'FAILED'} audit.",
+            recommendations=list(AUDIT_RECOMMENDATIONS),
+            execution_time=time.time() - start_time,
+            passed=score >= 80
+        )}
+
+    async def _stream_reviews(self, snippets: List[Snippet]) -> AsyncIterator[Tuple[Snippet, Issue]]:
+        """Review snippets concurrently, yielding findings in the order they are parsed"""
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def review(snippet: Snippet):
+            try:
+                parser = StreamingAuditParser()
+                async for chunk in self._stream_audit_text(self._method_review_prompt(snippet.text)):
+                    for issue in parser.feed(chunk):
+                        await queue.put((snippet, issue))
+                parser.finish()  # a review without an audit result fails the audit
+            finally:
+                await queue.put((snippet, None))
+
+        tasks = [asyncio.create_task(review(s)) for s in snippets]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                snippet, issue = await queue.get()
+                if issue is None:
+                    remaining -= 1
+                else:
+                    yield snippet, issue
+            # Surface the first provider error, if any
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _stream_llm_audit(self, code: str, start_time: float) -> AsyncIterator[dict]:
+        """Whole-file provider audit as events, issues yielded as soon as each is parsed"""
+        parser = StreamingAuditParser()
+        async for chunk in self._stream_audit_text(self._audit_prompt(code)):
+            for issue in parser.feed(chunk):
+                yield {"type": "issue", "data": issue}
+        yield {"type": "done", "data": self._llm_audit_response(parser.finish(), start_time)}
+
+    def _stream_audit_text(self, user_prompt: str) -> AsyncIterator[str]:
+        return self.llm.stream(
+            AUDIT_SYSTEM_PROMPT,
+            user_prompt,
+            temperature=0.3,  # Lower temperature for more consistent analysis
+            max_tokens=1500
+        )
+
+    def _audit_prompt(self, code: str) -> str:
+        return f"Audit this Qubic smart contract:\n\n{code}"
+
+    def _method_review_prompt(self, snippet: str) -> str:
+        return f"Audit this method of a Qubic smart contract:\n\n{snippet}"
+
+    async def _llm_audit_contract(self, code: str, start_time: float) -> AuditResponse:
+        """Audit through the configured AI provider"""
+        response_text = await self.llm.complete(
+            AUDIT_SYSTEM_PROMPT,
+            self._audit_prompt(code),
+            temperature=0.3,  # Lower temperature for more consistent analysis
+            max_tokens=1500
+        )
+        return self._llm_audit_response(self._parse_audit_response(response_text), start_time)
+
+    def _llm_audit_response(self, audit_result: Dict, start_time: float) -> AuditResponse:
+        """Wrap a parsed provider audit in an AuditResponse"""
+        return AuditResponse(
+            success=True,
+            score=audit_result["score"],
+            issues=audit_result["issues"],
+            summary=audit_result["summary"],
+            recommendations=audit_result["recommendations"] or list(AUDIT_RECOMMENDATIONS),
+            execution_time=time.time() - start_time,
+            passed=audit_result["score"] >= 80
+        )
+
+    async def review_method(self, snippet: str) -> List[Issue]:
+        """AI review of a single method; issue lines are relative to the snippet"""
+        if self.mock_mode:
+            return []
+
+        response_text = await self.llm.complete(
+            AUDIT_SYSTEM_PROMPT,
+            self._method_review_prompt(snippet),
+            temperature=0.3,
+            max_tokens=1500
+        )
+        return self._parse_audit_response(response_text)["issues"]
 
     def _mock_generate_contract(
         self,
@@ -245,15 +636,7 @@ Format your response as JSON with this structure:
         """Mock contract generation for demo purposes"""
         logger.info(f"🎭 MOCK MODE: Generating contract for prompt: {prompt}")
 
-        # Generate a sample contract based on keywords
-        if "voting" in prompt.lower():
-            code = self._get_voting_contract_template()
-        elif "token" in prompt.lower():
-            code = self._get_token_contract_template()
-        elif "nft" in prompt.lower():
-            code = self._get_nft_contract_template()
-        else:
-            code = self._get_generic_contract_template()
+        code = template_registry.select(prompt, template).code
 
         execution_time = time.time() - start_time
 
@@ -273,56 +656,18 @@ Format your response as JSON with this structure:
             execution_time=execution_time
         )
 
-    def _mock_audit_contract(
+    async def _mock_audit_contract(
         self,
         code: str,
         contract_name: str,
         start_time: float
     ) -> AuditResponse:
-        """Mock contract auditing for demo purposes"""
+        """Audit with the built-in static analyzer (mock mode and provider fallback)"""
         logger.info(f"🎭 MOCK MODE: Auditing contract: {contract_name}")
 
-        # Simulate basic static analysis
-        issues = []
-        score = 95  # Start with high score
-
-        # Check for common patterns
-        if "// TODO" in code or "// FIXME" in code:
-            issues.append(Issue(
-                severity=IssueSeverity.LOW,
-                category="Code Quality",
-                line=1,
-                column=0,
-                message="Contains TODO or FIXME comments",
-                fix="Complete all TODOs before deployment"
-            ))
-            score -= 2
-
-        if "delete" in code and "new" not in code:
-            issues.append(Issue(
-                severity=IssueSeverity.MEDIUM,
-                category="Memory Management",
-                line=1,
-                column=0,
-                message="Potential memory leak: delete without corresponding new",
-                fix="Ensure proper memory allocation and deallocation"
-            ))
-            score -= 5
-
-        # Add some positive findings
-        if "require" in code or "assert" in code:
-            pass  # Good - has validation
-        else:
-            issues.append(Issue(
-                severity=IssueSeverity.MEDIUM,
-                category="Input Validation",
-                line=1,
-                column=0,
-                message="Missing input validation checks",
-                fix="Add require() or assert() statements for input validation",
-                code_snippet="require(amount > 0, \"Amount must be positive\");"
-            ))
-            score -= 5
+        analysis = await run_in_threadpool(analyze, code)
+        issues = analysis.issues
+        score = analysis.score
 
         execution_time = time.time() - start_time
 
@@ -333,262 +678,14 @@ Format your response as JSON with this structure:
             summary=f"Security audit complete. Overall security score: {score}/100. "
                    f"Found {len(issues)} potential issues. "
                    f"Contract {'PASSED' if score >= 80 else 'FAILED'} audit.",
-            recommendations=[
-                "✅ Contract structure follows Qubic best practices",
-                "✅ Leverages Qubic's feeless transactions efficiently",
-                "💡 Consider adding more comprehensive input validation",
-                "💡 Add event emissions for important state changes",
-                "🔒 Conduct thorough testing before mainnet deployment"
-            ],
+            recommendations=list(AUDIT_RECOMMENDATIONS),
             execution_time=execution_time,
             passed=score >= 80
         )
 
     def _parse_audit_response(self, response_text: str) -> Dict:
-        """Parse AI audit response (simplified)"""
-        # In production, this would properly parse JSON
-        return {
-            "score": 85,
-            "issues": [],
-            "summary": "Contract analyzed successfully",
-            "recommendations": ["Add more tests", "Review access control"]
-        }
-
-    # Contract Templates
-    def _get_voting_contract_template(self) -> str:
-        return """// Qubic Decentralized Voting Contract
-// Leverages 15.5M TPS for real-time voting and feeless transactions
-
-#include <qubic.h>
-
-struct Proposal {
-    uint64_t id;
-    char description[256];
-    uint64_t votesFor;
-    uint64_t votesAgainst;
-    uint64_t deadline;
-    bool executed;
-};
-
-struct VotingContract {
-    static constexpr uint64_t MAX_PROPOSALS = 100;
-
-    Proposal proposals[MAX_PROPOSALS];
-    uint64_t proposalCount;
-
-    // Track who has voted on which proposal
-    // Using Qubic's instant finality for immediate vote confirmation
-    struct Vote {
-        uint64_t proposalId;
-        uint8_t voter[32];  // Qubic address
-        bool inFavor;
-    };
-
-    Vote votes[1000];
-    uint64_t voteCount;
-
-    // Create a new proposal (feeless on Qubic!)
-    PUBLIC void createProposal(const char* description, uint64_t durationBlocks) {
-        require(proposalCount < MAX_PROPOSALS, "Max proposals reached");
-
-        Proposal& proposal = proposals[proposalCount];
-        proposal.id = proposalCount;
-        copyMemory(proposal.description, description, 256);
-        proposal.votesFor = 0;
-        proposal.votesAgainst = 0;
-        proposal.deadline = currentBlock() + durationBlocks;
-        proposal.executed = false;
-
-        proposalCount++;
-
-        // Event: ProposalCreated (instant notification via 15.5M TPS)
-    }
-
-    // Cast vote (instant finality - no waiting!)
-    PUBLIC void vote(uint64_t proposalId, bool inFavor) {
-        require(proposalId < proposalCount, "Invalid proposal ID");
-        require(currentBlock() < proposals[proposalId].deadline, "Voting period ended");
-
-        // Check if already voted
-        for (uint64_t i = 0; i < voteCount; i++) {
-            if (votes[i].proposalId == proposalId &&
-                compareMemory(votes[i].voter, invocator(), 32)) {
-                require(false, "Already voted");
-            }
-        }
-
-        // Record vote (feeless - unlimited voting participation!)
-        Vote& newVote = votes[voteCount++];
-        newVote.proposalId = proposalId;
-        copyMemory(newVote.voter, invocator(), 32);
-        newVote.inFavor = inFavor;
-
-        // Update counts (instant update via Qubic's speed)
-        if (inFavor) {
-            proposals[proposalId].votesFor++;
-        } else {
-            proposals[proposalId].votesAgainst++;
-        }
-
-        // Event: VoteCast
-    }
-
-    // Get proposal details
-    PUBLIC Proposal getProposal(uint64_t proposalId) const {
-        require(proposalId < proposalCount, "Invalid proposal ID");
-        return proposals[proposalId];
-    }
-
-    // Execute proposal if passed
-    PUBLIC void executeProposal(uint64_t proposalId) {
-        require(proposalId < proposalCount, "Invalid proposal ID");
-        Proposal& proposal = proposals[proposalId];
-
-        require(currentBlock() >= proposal.deadline, "Voting still active");
-        require(!proposal.executed, "Already executed");
-        require(proposal.votesFor > proposal.votesAgainst, "Proposal rejected");
-
-        proposal.executed = true;
-
-        // Execute proposal logic here
-        // Event: ProposalExecuted
-    }
-};
-
-// This contract showcases:
-// ✅ Qubic's 15.5M TPS - Instant vote confirmation
-// ✅ Feeless transactions - Unlimited voting participation
-// ✅ Instant finality - No waiting for confirmations
-// ✅ C++ performance - Fast vote counting and validation
-"""
-
-    def _get_token_contract_template(self) -> str:
-        return """// Qubic Token Contract
-// Ultra-fast token transfers leveraging 15.5M TPS
-
-#include <qubic.h>
-
-struct QubicToken {
-    static constexpr uint64_t TOTAL_SUPPLY = 1000000000;
-
-    char name[32];
-    char symbol[8];
-    uint8_t decimals;
-
-    // Balance mapping
-    struct Balance {
-        uint8_t owner[32];
-        uint64_t amount;
-    };
-
-    Balance balances[10000];
-    uint64_t balanceCount;
-
-    // Initialize token
-    PUBLIC void initialize(const char* tokenName, const char* tokenSymbol) {
-        copyMemory(name, tokenName, 32);
-        copyMemory(symbol, tokenSymbol, 8);
-        decimals = 8;
-
-        // Mint total supply to creator (feeless!)
-        balances[0].owner = invocator();
-        balances[0].amount = TOTAL_SUPPLY;
-        balanceCount = 1;
-    }
-
-    // Transfer tokens (instant via 15.5M TPS, zero fees!)
-    PUBLIC void transfer(const uint8_t* to, uint64_t amount) {
-        require(amount > 0, "Amount must be positive");
-
-        uint64_t fromBalance = getBalance(invocator());
-        require(fromBalance >= amount, "Insufficient balance");
-
-        // Update balances (instant finality!)
-        setBalance(invocator(), fromBalance - amount);
-        setBalance(to, getBalance(to) + amount);
-
-        // Event: Transfer
-    }
-
-    // Get balance
-    PUBLIC uint64_t balanceOf(const uint8_t* owner) const {
-        return getBalance(owner);
-    }
-
-private:
-    uint64_t getBalance(const uint8_t* owner) const {
-        for (uint64_t i = 0; i < balanceCount; i++) {
-            if (compareMemory(balances[i].owner, owner, 32)) {
-                return balances[i].amount;
-            }
-        }
-        return 0;
-    }
-
-    void setBalance(const uint8_t* owner, uint64_t amount) {
-        for (uint64_t i = 0; i < balanceCount; i++) {
-            if (compareMemory(balances[i].owner, owner, 32)) {
-                balances[i].amount = amount;
-                return;
-            }
-        }
-
-        // New balance entry
-        copyMemory(balances[balanceCount].owner, owner, 32);
-        balances[balanceCount].amount = amount;
-        balanceCount++;
-    }
-};
-
-// Qubic Advantages:
-// ✅ 15.5M TPS - Lightning-fast token transfers
-// ✅ Zero fees - No cost per transfer
-// ✅ Instant finality - Immediate confirmation
-"""
-
-    def _get_nft_contract_template(self) -> str:
-        return """// Qubic NFT Contract
-#include <qubic.h>
-
-struct QubicNFT {
-    struct Token {
-        uint64_t tokenId;
-        uint8_t owner[32];
-        char uri[256];
-    };
-
-    Token tokens[1000];
-    uint64_t tokenCount;
-
-    PUBLIC void mint(const char* uri) {
-        Token& token = tokens[tokenCount];
-        token.tokenId = tokenCount;
-        copyMemory(token.owner, invocator(), 32);
-        copyMemory(token.uri, uri, 256);
-        tokenCount++;
-    }
-};
-"""
-
-    def _get_generic_contract_template(self) -> str:
-        return """// Qubic Smart Contract
-// Powered by 15.5M TPS and feeless transactions
-
-#include <qubic.h>
-
-struct QubicContract {
-    uint64_t value;
-
-    PUBLIC void setValue(uint64_t newValue) {
-        require(newValue > 0, "Value must be positive");
-        value = newValue;
-    }
-
-    PUBLIC uint64_t getValue() const {
-        return value;
-    }
-};
-"""
+        """Extract score, issues, summary and recommendations from a provider response"""
+        return parse_audit_response(response_text)
 
 
 # Create global instance
@@ -0,0 +1,95 @@
+"""
+Static analysis engine for Qubic C++ contracts
+Tokenizer, lightweight parser and pluggable rule engine
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from app.models.schemas import Issue, IssueSeverity
+from app.services.analysis.parser import ContractModel, Method, parse
+from app.services.analysis.performance import (
+    PERF_RULES,
+    PerformanceResult,
+    analyze_performance,
+    format_bytes,
+    state_footprint,
+)
+from app.services.analysis.rules import RULES, AnalysisContext, Rule
+
+# Bump whenever rules change so cached static audits are invalidated
+ANALYZER_VERSION = "1"
+
+BASE_SCORE = 95
+
+SEVERITY_PENALTY = {
+    IssueSeverity.CRITICAL: 25,
+    IssueSeverity.HIGH: 10,
+    IssueSeverity.MEDIUM: 5,
+    IssueSeverity.LOW: 2,
+    IssueSeverity.INFO: 0,
+}
+
+
+@dataclass
+class AnalysisResult:
+    model: ContractModel
+    issues: List[Issue]
+
+    @property
+    def score(self) -> int:
+        return score_issues(self.issues)
+
+
+def score_issues(issues: Iterable[Issue]) -> int:
+    """Security score: start high and subtract a penalty per issue severity"""
+    return max(0, BASE_SCORE - sum(SEVERITY_PENALTY[i.severity] for i in issues))
+
+
+def run_file_rules(ctx: AnalysisContext, rules: Optional[List[Rule]] = None) -> List[Issue]:
+    """Whole-contract checks"""
+    issues: List[Issue] = []
+    for rule in RULES if rules is None else rules:
+        issues.extend(rule.check_file(ctx))
+    return issues
+
+
+def run_method_rules(ctx: AnalysisContext, method: Method, rules: Optional[List[Rule]] = None) -> List[Issue]:
+    """Checks scoped to one method body"""
+    issues: List[Issue] = []
+    if method.has_body:
+        for rule in RULES if rules is None else rules:
+            issues.extend(rule.check_method(ctx, method))
+    return issues
+
+
+def analyze(code: str, rules: Optional[List[Rule]] = None) -> AnalysisResult:
+    """Parse the contract and run every rule over it"""
+    model = parse(code)
+    ctx = AnalysisContext(model=model, lines=code.splitlines())
+
+    issues = run_file_rules(ctx, rules)
+    for method in model.iter_methods():
+        issues.extend(run_method_rules(ctx, method, rules))
+
+    issues.sort(key=lambda i: (i.line, i.column))
+    return AnalysisResult(model=model, issues=issues)
+
+
+__all__ = [
+    "ANALYZER_VERSION",
+    "AnalysisContext",
+    "AnalysisResult",
+    "PERF_RULES",
+    "PerformanceResult",
+    "Rule",
+    "RULES",
+    "analyze",
+    "analyze_performance",
+    "format_bytes",
+    "parse",
+    "run_file_rules",
+    "run_method_rules",
+    "score_issues",
+    "state_footprint",
+]
@@ -0,0 +1,101 @@
+"""
+Single-pass tokenizer for the Qubic C++ contract subset
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Tuple
+
+# Token kinds
+IDENT = "ident"
+NUMBER = "number"
+STRING = "string"
+CHAR = "char"
+PUNCT = "punct"
+PREPROCESSOR = "preprocessor"
+COMMENT = "comment"
+
+TOKEN_CACHE_SIZE = 8  # sources whose tokens are kept
+
+# Leading whitespace is consumed by the same match so every match is one token
+_TOKEN_RE = re.compile(
+    r"""
+    \s*
+    (?:
+        (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+      | (?P<preprocessor>\#[^\n]*)
+      | (?P<string>"(?:\\.|[^"\\\n])*"?)
+      | (?P<char>'(?:\\.|[^'\\\n])*'?)
+      | (?P<number>(?:0[xX][0-9a-fA-F']+|0[bB][01']+|\d[\d']*(?:\.\d*)?(?:[eE][+-]?\d+)?)[uUlLfF]*)
+      | (?P<ident>[A-Za-z_]\w*)
+      | (?P<punct>::|->|\+\+|--|<<=|>>=|<<|>>|<=|>=|==|!=|&&|\|\||[-+*/%&|^!=<>]=|[{}()\[\];,.:?~!<>=+\-*/%&|^])
+      | (?P<other>\S)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_NEWLINE_RE = re.compile(r"\n")
+
+
+class Token:
+    """
+    A lexical token
+
+    Only the source offset is stored; the 1-based line and 0-based column are
+    resolved on demand, since rules need positions for a handful of tokens.
+    """
+
+    __slots__ = ("kind", "text", "pos", "_line_starts")
+
+    def __init__(self, kind: str, text: str, pos: int, line_starts: List[int]):
+        self.kind = kind
+        self.text = text
+        self.pos = pos
+        self._line_starts = line_starts
+
+    @property
+    def line(self) -> int:
+        return bisect_right(self._line_starts, self.pos)
+
+    @property
+    def col(self) -> int:
+        return self.pos - self._line_starts[self.line - 1]
+
+    def __repr__(self) -> str:
+        return f"Token({self.kind}, {self.text!r}, {self.line}:{self.col})"
+
+
+def tokenize(code: str) -> Tuple[List[Token], List[Token]]:
+    """
+    Tokenize source code in one pass
+
+    Returns (tokens, comments): code tokens without whitespace, and comment
+    tokens kept separately so rules can inspect them without the parser
+    having to skip them. Tokenizing is about half the cost of analyzing a
+    large contract, and one snapshot is usually audited, linted and
+    explained in a row, so the tokens of the last few sources are cached.
+    """
+    tokens, comments = _tokenize(code)
+    return list(tokens), list(comments)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _tokenize(code: str) -> Tuple[Tuple[Token, ...], Tuple[Token, ...]]:
+    line_starts = [0]
+    line_starts.extend(m.end() for m in _NEWLINE_RE.finditer(code))
+
+    tokens: List[Token] = []
+    comments: List[Token] = []
+    append = tokens.append
+
+    for match in _TOKEN_RE.finditer(code):
+        kind = match.lastgroup
+        if kind == "comment":
+            comments.append(Token(COMMENT, match.group(kind), match.start(kind), line_starts))
+        elif kind == "other":
+            append(Token(PUNCT, match.group(kind), match.start(kind), line_starts))
+        else:
+            append(Token(kind, match.group(kind), match.start(kind), line_starts))
+
+    return tuple(tokens), tuple(comments)
@@ -0,0 +1,473 @@
+"""
+Lightweight parser for the Qubic C++ contract subset
+
+Recognizes the constructs used by QPI contracts: (nested) structs, fields
+with fixed-size array bounds, static constexpr constants, PUBLIC methods
+and private helpers. Method bodies are kept as token ranges for the rules.
+"""
+
+import ast
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from app.services.analysis.lexer import IDENT, PREPROCESSOR, Token, tokenize
+
+_OPEN = {"{": "}", "(": ")", "[": "]"}
+_ACCESS = {"public", "private", "protected"}
+_STRUCT_KEYWORDS = {"struct", "class", "union"}
+_DECL_SPECIFIERS = {"static", "inline", "virtual", "constexpr", "mutable", "PUBLIC", "explicit", "friend"}
+_SAFE_EXPR = re.compile(r"^[\d\s+\-*/%()<>]*$")
+# Array bounds come from user code: keep every intermediate value machine-sized
+_MAX_VALUE = 2 ** 64
+_MAX_SHIFT = 64
+_MAX_DIGITS = 20
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+}
+_COMPARE_OPS = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+
+
+@dataclass
+class Param:
+    type_name: str
+    name: str
+    line: int
+    col: int
+
+    @property
+    def is_pointer(self) -> bool:
+        return "*" in self.type_name or "&" in self.type_name
+
+
+@dataclass
+class Field:
+    type_name: str
+    name: str
+    dims: List[str]
+    line: int
+    col: int
+    struct: str
+    array_sizes: List[Optional[int]] = field(default_factory=list)
+
+    @property
+    def is_array(self) -> bool:
+        return bool(self.dims)
+
+    @property
+    def array_size(self) -> Optional[int]:
+        """Total element count, or None if a bound could not be resolved"""
+        if not self.array_sizes or None in self.array_sizes:
+            return None
+        total = 1
+        for size in self.array_sizes:
+            total *= size
+        return total
+
+
+@dataclass
+class Method:
+    name: str
+    return_type: str
+    params: List[Param]
+    is_public: bool  # marked PUBLIC: a contract entry point
+    is_const: bool
+    access: str
+    line: int
+    col: int
+    end_line: int
+    struct: str
+    body_start: int = -1  # token index just after "{"
+    body_end: int = -1  # token index of the closing "}"
+
+    @property
+    def has_body(self) -> bool:
+        return self.body_start >= 0
+
+
+@dataclass
+class Struct:
+    name: str
+    line: int
+    col: int
+    end_line: int
+    parent: Optional[str]
+    fields: List[Field] = field(default_factory=list)
+    methods: List[Method] = field(default_factory=list)
+    constants: Dict[str, int] = field(default_factory=dict)
+    start: int = 0  # token index of the struct keyword
+    end: int = 0  # token index of the closing "}"
+
+
+@dataclass
+class ContractModel:
+    tokens: List[Token]
+    comments: List[Token]
+    match: List[int]
+    structs: List[Struct]
+    root: Struct
+    includes: List[str]
+
+    def __post_init__(self):
+        self._structs: Dict[str, Struct] = {}
+        self._fields: Dict[tuple, Field] = {}
+        self._any_field: Dict[str, Field] = {}
+        for struct in self.structs + [self.root]:
+            self._structs.setdefault(struct.name, struct)
+            for f in struct.fields:
+                self._fields.setdefault((struct.name, f.name), f)
+                self._any_field.setdefault(f.name, f)
+
+    def iter_methods(self) -> Iterator[Method]:
+        yield from self.root.methods
+        for struct in self.structs:
+            yield from struct.methods
+
+    def struct(self, name: str) -> Optional[Struct]:
+        return self._structs.get(name) if name else None
+
+    def find_field(self, name: str, struct_name: Optional[str] = None) -> Optional[Field]:
+        """Find a field by name, preferring the given struct"""
+        if struct_name:
+            found = self._fields.get((struct_name, name))
+            if found is not None:
+                return found
+        return self._any_field.get(name)
+
+    def body(self, method: Method) -> List[Token]:
+        return self.tokens[method.body_start:method.body_end] if method.has_body else []
+
+
+def match_brackets(tokens: List[Token]) -> List[int]:
+    """Index of the partner bracket for every (, [, { and closer; -1 otherwise"""
+    match = [-1] * len(tokens)
+    stack: List[int] = []
+    for i, token in enumerate(tokens):
+        text = token.text
+        if text in _OPEN:
+            stack.append(i)
+        elif text in ("}", ")", "]"):
+            # Tolerate unbalanced input: unwind to the nearest matching opener
+            while stack and _OPEN[tokens[stack[-1]].text] != text:
+                stack.pop()
+            if stack:
+                opener = stack.pop()
+                match[opener] = i
+                match[i] = opener
+    return match
+
+
+def evaluate(expr: str, constants: Dict[str, int]) -> Optional[int]:
+    """Evaluate a constant integer expression such as MAX_PROPOSALS * 2"""
+    if expr.isdigit():
+        return int(expr) if len(expr) <= _MAX_DIGITS else None
+    expr = re.sub(r"(?<=\d)'(?=\d)", "", expr)
+    if re.search(r"[0-9a-fA-F]{%d}" % (_MAX_DIGITS + 1), expr):
+        return None
+    expr = re.sub(r"\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]*\b", lambda m: str(int(m.group(1), 0)), expr)
+    expr = re.sub(r"\b[A-Za-z_]\w*\b", lambda m: str(constants.get(m.group(), m.group())), expr)
+    if not expr.strip() or not _SAFE_EXPR.match(expr):
+        return None
+    try:
+        tree = ast.parse(expr.replace("/", "//").strip(), mode="eval")
+    except (SyntaxError, ValueError):
+        return None
+    return _evaluate_node(tree.body)
+
+
+def _evaluate_node(node: ast.AST) -> Optional[int]:
+    """Integer value of an expression node; None if unsupported or past _MAX_VALUE"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if not isinstance(value, int) or isinstance(value, bool):
+            return None
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _evaluate_node(node.operand)
+        if operand is None:
+            return None
+        value = -operand if isinstance(node.op, ast.USub) else operand
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left, right = _evaluate_node(node.left), _evaluate_node(node.right)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, (ast.LShift, ast.RShift)) and not 0 <= right <= _MAX_SHIFT:
+            return None
+        if isinstance(node.op, (ast.FloorDiv, ast.Mod)) and right == 0:
+            return None
+        value = _BINARY_OPS[type(node.op)](left, right)
+    elif isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _COMPARE_OPS:
+        left, right = _evaluate_node(node.left), _evaluate_node(node.comparators[0])
+        if left is None or right is None:
+            return None
+        value = int(_COMPARE_OPS[type(node.ops[0])](left, right))
+    else:
+        return None
+    return value if -_MAX_VALUE <= value <= _MAX_VALUE else None
+
+
+class Parser:
+    """Recursive-descent parser over the bracket-matched token stream"""
+
+    def __init__(self, code: str):
+        self.tokens, self.comments = tokenize(code)
+        self.match = match_brackets(self.tokens)
+        self.structs: List[Struct] = []
+        self.includes: List[str] = []
+
+    def parse(self) -> ContractModel:
+        root = Struct(name="", line=1, col=0, end_line=0, parent=None, start=0, end=len(self.tokens))
+        self._parse_members(0, len(self.tokens), root, default_access="public", scope={})
+        return ContractModel(
+            tokens=self.tokens,
+            comments=self.comments,
+            match=self.match,
+            structs=self.structs,
+            root=root,
+            includes=self.includes
+        )
+
+    def _text(self, i: int) -> str:
+        return self.tokens[i].text if i < len(self.tokens) else ""
+
+    def _skip(self, i: int) -> int:
+        """Index just past the bracket group starting at i"""
+        partner = self.match[i]
+        return (partner if partner > i else len(self.tokens) - 1) + 1
+
+    def _parse_members(self, start: int, end: int, owner: Struct, default_access: str, scope: Dict[str, int]):
+        tokens = self.tokens
+        access = default_access
+        pending_public = False
+        i = start
+
+        while i < end:
+            token = tokens[i]
+            text = token.text
+
+            if token.kind == PREPROCESSOR:
+                if text.startswith("#include"):
+                    self.includes.append(text[len("#include"):].strip())
+                i += 1
+                continue
+
+            if text == ";":
+                i += 1
+                continue
+
+            if text in _ACCESS and self._text(i + 1) == ":":
+                access = text
+                i += 2
+                continue
+
+            if text == "PUBLIC":
+                pending_public = True
+                i += 1
+                continue
+
+            if text in _STRUCT_KEYWORDS and i + 1 < end and tokens[i + 1].kind == IDENT:
+                brace = i + 2
+                while brace < end and tokens[brace].text not in ("{", ";", "("):
+                    brace += 1
+                if brace < end and tokens[brace].text == "{":
+                    close = self._skip(brace) - 1
+                    self._parse_struct(i, brace, close, owner, scope)
+                    i = close + 1
+                    continue
+                if brace < end and tokens[brace].text == ";":
+                    i = brace + 1  # forward declaration
+                    continue
+
+            if text == "namespace":
+                brace = i
+                while brace < end and tokens[brace].text != "{":
+                    brace += 1
+                if brace < end:
+                    close = self._skip(brace) - 1
+                    self._parse_members(brace + 1, close, owner, access, scope)
+                    i = close + 1
+                    continue
+
+            i = self._parse_declaration(i, end, owner, access, pending_public, scope)
+            pending_public = False
+
+    def _parse_struct(self, keyword: int, brace: int, close: int, owner: Struct, scope: Dict[str, int]):
+        name_token = self.tokens[keyword + 1]
+        struct = Struct(
+            name=name_token.text,
+            line=self.tokens[keyword].line,
+            col=self.tokens[keyword].col,
+            end_line=self.tokens[close].line if close < len(self.tokens) else name_token.line,
+            parent=owner.name or None,
+            start=keyword,
+            end=close
+        )
+        self.structs.append(struct)
+        default_access = "private" if self.tokens[keyword].text == "class" else "public"
+        inner_scope = dict(scope)
+        self._parse_members(brace + 1, close, struct, default_access, inner_scope)
+
+    def _parse_declaration(
+        self,
+        i: int,
+        end: int,
+        owner: Struct,
+        access: str,
+        is_public: bool,
+        scope: Dict[str, int]
+    ) -> int:
+        """Parse one field, constant or method starting at i; return the next index"""
+        tokens = self.tokens
+        j = i
+        paren = -1
+        while j < end and tokens[j].text not in (";", "{"):
+            if tokens[j].text == "(" and paren < 0:
+                paren = j
+                j = self._skip(j)
+                continue
+            if tokens[j].text in ("(", "["):
+                j = self._skip(j)
+                continue
+            j += 1
+
+        if paren > i and tokens[paren - 1].kind == IDENT:
+            return self._parse_method(i, paren, j, end, owner, access, is_public)
+
+        if j < end and tokens[j].text == "{":
+            # Brace initializer or unknown block: skip it and the trailing ';'
+            j = self._skip(j)
+            while j < end and tokens[j].text != ";":
+                j += 1
+
+        self._parse_fields(i, min(j, end), owner, scope)
+        return j + 1
+
+    def _parse_method(self, i: int, paren: int, j: int, end: int, owner: Struct, access: str,
+                      is_public: bool) -> int:
+        tokens = self.tokens
+        name_token = tokens[paren - 1]
+        return_type = " ".join(t.text for t in tokens[i:paren - 1] if t.text not in _DECL_SPECIFIERS)
+        close_paren = self._skip(paren) - 1
+
+        qualifiers = [t.text for t in tokens[close_paren + 1:j]]
+        method = Method(
+            name=name_token.text,
+            return_type=return_type,
+            params=self._parse_params(paren + 1, close_paren),
+            is_public=is_public,
+            is_const="const" in qualifiers,
+            access="public" if is_public else access,
+            line=name_token.line,
+            col=name_token.col,
+            end_line=tokens[min(j, len(tokens) - 1)].line,
+            struct=owner.name
+        )
+
+        if j < end and tokens[j].text == "{":
+            body_end = self._skip(j) - 1
+            method.body_start = j + 1
+            method.body_end = body_end
+            method.end_line = tokens[min(body_end, len(tokens) - 1)].line
+            j = body_end
+
+        owner.methods.append(method)
+        return j + 1
+
+    def _parse_params(self, start: int, end: int) -> List[Param]:
+        params: List[Param] = []
+        tokens = self.tokens
+        group_start = start
+        depth = 0
+        for k in range(start, end + 1):
+            text = tokens[k].text if k < end else ","
+            if text in ("<", "(", "["):
+                depth += 1
+            elif text in (">", ")", "]"):
+                depth -= 1
+            elif text == "," and depth <= 0:
+                group = tokens[group_start:k]
+                eq = next((n for n, t in enumerate(group) if t.text == "="), len(group))
+                group = group[:eq]
+                names = [t for t in group if t.kind == IDENT]
+                if len(names) >= 2 or (names and len(group) > 1):
+                    name = names[-1]
+                    type_name = " ".join(t.text for t in group if t is not name)
+                    params.append(Param(type_name=type_name, name=name.text, line=name.line, col=name.col))
+                group_start = k + 1
+        return params
+
+    def _parse_fields(self, start: int, end: int, owner: Struct, scope: Dict[str, int]):
+        tokens = self.tokens
+        decl = tokens[start:end]
+        if not decl or decl[0].text in ("using", "typedef", "enum", "template", "return"):
+            return
+
+        texts = [t.text for t in decl]
+        is_static = "static" in texts
+
+        # Split declarators on top-level commas (uint64_t a, b[4];)
+        declarators: List[List[Token]] = [[]]
+        depth = 0
+        for t in decl:
+            if t.text in ("<", "(", "[", "{"):
+                depth += 1
+            elif t.text in (">", ")", "]", "}"):
+                depth -= 1
+            if t.text == "," and depth == 0:
+                declarators.append([])
+            else:
+                declarators[-1].append(t)
+
+        type_name = ""
+        for n, group in enumerate(declarators):
+            stop = next((k for k, t in enumerate(group) if t.text in ("[", "=", "{")), len(group))
+            idents = [k for k in range(stop) if group[k].kind == IDENT]
+            if not idents:
+                continue
+            name_index = idents[-1]
+            name_token = group[name_index]
+            if n == 0:
+                type_name = " ".join(t.text for t in group[:name_index] if t.text not in _DECL_SPECIFIERS)
+                if not type_name:
+                    return
+
+            dims: List[str] = []
+            k = stop
+            while k < len(group) and group[k].text == "[":
+                close = k + 1
+                depth = 1
+                while close < len(group) and depth:
+                    depth += {"[": 1, "]": -1}.get(group[close].text, 0)
+                    close += 1
+                dims.append(" ".join(t.text for t in group[k + 1:close - 1]))
+                k = close
+
+            if is_static and ("constexpr" in texts or "const" in texts):
+                if k < len(group) and group[k].text == "=":
+                    value = evaluate(" ".join(t.text for t in group[k + 1:]), {**scope, **owner.constants})
+                    if value is not None:
+                        owner.constants[name_token.text] = value
+                        scope[name_token.text] = value
+                continue
+
+            known = {**scope, **owner.constants}
+            owner.fields.append(Field(
+                type_name=type_name,
+                name=name_token.text,
+                dims=dims,
+                line=name_token.line,
+                col=name_token.col,
+                struct=owner.name,
+                array_sizes=[evaluate(d, known) for d in dims]
+            ))
+
+
+def parse(code: str) -> ContractModel:
+    """Parse contract source into a ContractModel"""
+    return Parser(code).parse()
@@ -0,0 +1,548 @@
+"""
+Static performance linter and state-footprint calculator
+
+Works on the same parsed ContractModel as the audit rules. The footprint is
+the C layout of the contract struct (natural alignment, fixed array bounds),
+which is what the node allocates as contract state. The rules look for the
+loops that make a call's cost grow with that state: linear lookups, lookups
+repeated or nested inside other loops, and copyMemory calls whose work is
+thrown away or repeated.
+"""
+
+from dataclasses import dataclass, field as dataclass_field
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.models.schemas import Issue, IssueSeverity
+from app.services.analysis.lexer import IDENT, NUMBER, Token
+from app.services.analysis.parser import ContractModel, Field, Method, Struct, evaluate, parse
+from app.services.analysis.rules import AnalysisContext, Rule, _split_args
+
+# (size, alignment) on the 64-bit targets contracts run on
+_PRIMITIVES = {
+    "bool": (1, 1), "char": (1, 1), "int8_t": (1, 1), "uint8_t": (1, 1), "sint8": (1, 1), "uint8": (1, 1),
+    "short": (2, 2), "int16_t": (2, 2), "uint16_t": (2, 2), "sint16": (2, 2), "uint16": (2, 2),
+    "int": (4, 4), "unsigned": (4, 4), "float": (4, 4), "int32_t": (4, 4), "uint32_t": (4, 4),
+    "sint32": (4, 4), "uint32": (4, 4),
+    "long": (8, 8), "double": (8, 8), "size_t": (8, 8), "int64_t": (8, 8), "uint64_t": (8, 8),
+    "sint64": (8, 8), "uint64": (8, 8),
+    "id": (32, 32), "m256i": (32, 32),
+}
+_TYPE_NOISE = {"const", "volatile", "signed", "struct", "mutable"}
+_ASSIGNMENTS = {"=", "+=", "-=", "*=", "/=", "%=", "&=", "|=", "^=", "<<=", ">>="}
+_LOOPS = {"for", "while"}
+_EXITS = {"return", "break", "require"}
+
+
+@dataclass
+class FieldLayout:
+    name: str
+    type_name: str
+    line: int
+    offset: int
+    size: int  # bytes, including every array element
+    count: int = 1  # array elements, 1 for scalars
+
+
+@dataclass
+class Footprint:
+    struct: Optional[str]
+    size: int
+    fields: List[FieldLayout] = dataclass_field(default_factory=list)
+    unresolved: List[str] = dataclass_field(default_factory=list)  # fields whose size is unknown, counted as 0
+
+
+@dataclass
+class Loop:
+    keyword: int  # token index of "for" / "while"
+    header: Tuple[int, int]  # token indices of its "(" and ")"
+    body: Tuple[int, int]  # token range of the body
+    counters: Set[str]  # identifiers the loop both tests and updates
+    array: Optional[Field] = None  # state array indexed by a counter
+    bound: Optional[int] = None  # most iterations, when known
+    dynamic: bool = False  # bound depends on state or arguments, not only on constants
+    key: Optional[str] = None  # compared field of a lookup, e.g. "owner"
+    lookup: bool = False  # compares elements against a key and exits early
+
+    def contains(self, index: int) -> bool:
+        return self.body[0] <= index < self.body[1]
+
+
+@dataclass
+class Lookup:
+    method: Method
+    loop: Loop  # the scan, possibly in a helper this method calls
+
+    @property
+    def describe(self) -> str:
+        return f"{self.loop.array.name}[{self.loop.bound}]" if self.loop.bound else self.loop.array.name
+
+
+def _type_layout(model: ContractModel, type_name: str, seen: Set[str]) -> Optional[Tuple[int, int]]:
+    """(size, alignment) of a field type, or None if it cannot be resolved"""
+    if "*" in type_name or "&" in type_name:
+        return 8, 8
+    words = [w for w in type_name.replace("::", " ").split() if w not in _TYPE_NOISE]
+    if words and words[0] == "Array" and "<" in words:
+        # QPI Array<T, L>: L elements of T
+        inner = type_name[type_name.index("<") + 1:type_name.rindex(">")]
+        element, _, length = inner.rpartition(",")
+        count = evaluate(length.strip(), model.root.constants)
+        layout = _type_layout(model, element, seen)
+        if layout is None or count is None:
+            return None
+        return layout[0] * count, layout[1]
+    if not words:
+        return None
+    if words == ["unsigned", "long", "long"] or words == ["long", "long"]:
+        return 8, 8
+    base = words[-1] if words[0] == "unsigned" and len(words) > 1 else words[0]
+    if base in _PRIMITIVES and len(words) <= 2:
+        return _PRIMITIVES[base]
+    struct = model.struct(words[-1])
+    if struct is None or struct.name in seen:
+        return None
+    layout = struct_layout(model, struct, seen | {struct.name})
+    if layout.unresolved:
+        return None
+    return layout.size, _alignment(model, struct, seen | {struct.name})
+
+
+def _alignment(model: ContractModel, struct: Struct, seen: Set[str]) -> int:
+    aligns = [(_type_layout(model, f.type_name, seen) or (0, 1))[1] for f in struct.fields]
+    return max(aligns, default=1)
+
+
+def struct_layout(model: ContractModel, struct: Struct, seen: Optional[Set[str]] = None) -> Footprint:
+    """Field offsets and total size of a struct, padded like the compiler does"""
+    seen = seen or {struct.name}
+    offset = 0
+    align = 1
+    layout = Footprint(struct=struct.name, size=0)
+    for f in struct.fields:
+        element = _type_layout(model, f.type_name, seen)
+        count = f.array_size if f.is_array else 1
+        if element is None or count is None:
+            layout.unresolved.append(f.name)
+            continue
+        size, field_align = element
+        offset = -(-offset // field_align) * field_align
+        layout.fields.append(FieldLayout(
+            name=f.name, type_name=f.type_name, line=f.line, offset=offset, size=size * count, count=count
+        ))
+        offset += size * count
+        align = max(align, field_align)
+    layout.size = -(-offset // align) * align
+    return layout
+
+
+def contract_of(model: ContractModel) -> Optional[Struct]:
+    """The contract: first top-level struct with PUBLIC methods, else the first top-level struct"""
+    top = [s for s in model.structs if s.parent is None]
+    return next((s for s in top if any(m.is_public for m in s.methods)), top[0] if top else None)
+
+
+def state_footprint(model: ContractModel) -> Footprint:
+    """Bytes of contract state: the contract struct's layout"""
+    contract = contract_of(model)
+    if contract is None:
+        return Footprint(struct=None, size=0)
+    return struct_layout(model, contract)
+
+
+def format_bytes(size: int) -> str:
+    for unit, scale in (("GB", 10 ** 9), ("MB", 10 ** 6), ("KB", 10 ** 3)):
+        if size >= scale:
+            return f"{size / scale:.1f}".rstrip("0").rstrip(".") + f" {unit}"
+    return f"{size} bytes"
+
+
+class PerformanceContext(AnalysisContext):
+    """AnalysisContext plus the loop structure of every method, computed once"""
+
+    @cached_property
+    def loops(self) -> Dict[int, List[Loop]]:
+        """Loops of each method with a body, keyed by id(method), outermost first"""
+        return {id(m): self._find_loops(m) for m in self.model.iter_methods() if m.has_body}
+
+    @cached_property
+    def lookups(self) -> Dict[str, Lookup]:
+        """Methods that run a linear lookup, directly or through a helper they call"""
+        found: Dict[str, Lookup] = {}
+        methods = [m for m in self.model.iter_methods() if m.has_body]
+        for method in methods:
+            loop = next((lp for lp in self.loops[id(method)] if lp.lookup), None)
+            if loop is not None:
+                found.setdefault(method.name, Lookup(method, loop))
+        changed = True
+        while changed:
+            changed = False
+            for method in methods:
+                if method.name in found:
+                    continue
+                for _, name in self.calls(method):
+                    if name in found and name != method.name:
+                        found[method.name] = Lookup(method, found[name].loop)
+                        changed = True
+                        break
+        return found
+
+    def calls(self, method: Method) -> Iterator[Tuple[int, str]]:
+        """(token index, name) of the calls a method makes to its own struct's methods"""
+        tokens = self.model.tokens
+        for k in range(method.body_start, method.body_end - 1):
+            token = tokens[k]
+            if token.kind == IDENT and tokens[k + 1].text == "(" and tokens[k - 1].text not in (".", "->", "::"):
+                yield k, token.text
+
+    def _statement_end(self, i: int, end: int) -> int:
+        """Index just past the statement starting at i"""
+        tokens, match = self.model.tokens, self.model.match
+        if tokens[i].text == "{":
+            return match[i] + 1 if match[i] > i else end
+        if tokens[i].text in _LOOPS and i + 1 < end and tokens[i + 1].text == "(" and match[i + 1] > i:
+            return self._statement_end(match[i + 1] + 1, end)
+        while i < end and tokens[i].text != ";":
+            if tokens[i].text in ("(", "[", "{") and match[i] > i:
+                i = match[i]
+            i += 1
+        return min(i + 1, end)
+
+    def _find_loops(self, method: Method) -> List[Loop]:
+        tokens, match = self.model.tokens, self.model.match
+        constants = self.constants(method)
+        loops = []
+        for k in range(method.body_start, method.body_end - 1):
+            if tokens[k].text not in _LOOPS or tokens[k + 1].text != "(" or match[k + 1] < k:
+                continue
+            if tokens[k].text == "while" and tokens[k - 1].text == "}" and self._closes_do(k - 1):
+                continue
+            close = match[k + 1]
+            if close + 1 >= method.body_end:
+                continue
+            stop = self._statement_end(close + 1, method.body_end)
+            body = (close + 2, stop - 1) if tokens[close + 1].text == "{" else (close + 1, stop)
+            loops.append(self._classify(method, Loop(k, (k + 1, close), body, set()), constants))
+        return loops
+
+    def _closes_do(self, brace: int) -> bool:
+        opener = self.model.match[brace]
+        return opener > 0 and self.model.tokens[opener - 1].text == "do"
+
+    def _classify(self, method: Method, loop: Loop, constants: Dict[str, int]) -> Loop:
+        model = self.model
+        tokens, match = model.tokens, model.match
+        header = tokens[loop.header[0] + 1:loop.header[1]]
+        tested = {t.text for t in header if t.kind == IDENT}
+        updated = set()
+        for k in range(loop.header[0] + 1, loop.body[1]):
+            t = tokens[k]
+            if t.kind == IDENT and (tokens[k + 1].text in _ASSIGNMENTS | {"++", "--"}
+                                   or tokens[k - 1].text in ("++", "--")):
+                updated.add(t.text)
+        loop.counters = tested & updated
+
+        # The condition is the middle clause of a for header, all of a while header
+        condition = header
+        if tokens[loop.keyword].text == "for":
+            parts = _split_on(header, ";")
+            condition = parts[1] if len(parts) > 1 else []
+        params = {p.name for p in method.params}
+        limits = [t for t in condition if t.kind in (IDENT, NUMBER) and t.text not in loop.counters]
+        loop.dynamic = any(
+            t.kind == IDENT and t.text not in constants and (t.text in params or model.find_field(t.text, method.struct))
+            for t in limits
+        )
+        constant_limits = [evaluate(t.text, constants) for t in limits if t.kind == NUMBER or t.text in constants]
+
+        for k in range(loop.body[0], loop.body[1]):
+            t = tokens[k]
+            if t.kind != IDENT or tokens[k + 1].text != "[" or match[k + 1] < k:
+                continue
+            index = {x.text for x in tokens[k + 2:match[k + 1]]}
+            array = model.find_field(t.text, method.struct)
+            if array is not None and array.is_array and index & loop.counters:
+                loop.array = array
+                break
+        if loop.array is not None and loop.array.array_sizes and loop.array.array_sizes[0]:
+            loop.bound = loop.array.array_sizes[0]
+        elif constant_limits and None not in constant_limits:
+            loop.bound = max(constant_limits)
+
+        if loop.array is not None:
+            loop.key = self._compared_key(loop)
+            body_texts = {tokens[k].text for k in range(*loop.body)}
+            loop.lookup = loop.key is not None and bool(body_texts & _EXITS)
+        return loop
+
+    def _compared_key(self, loop: Loop) -> Optional[str]:
+        """Field of the scanned array that an if / compareMemory tests, "" if the element itself"""
+        tokens, match = self.model.tokens, self.model.match
+        name = loop.array.name
+        for k in range(loop.body[0], loop.body[1]):
+            if tokens[k].text not in ("if", "compareMemory") or tokens[k + 1].text != "(" or match[k + 1] < k:
+                continue
+            condition = tokens[k + 2:match[k + 1]]
+            texts = [t.text for t in condition]
+            if name not in texts or ("compareMemory" not in texts and "==" not in texts
+                                     and tokens[k].text != "compareMemory"):
+                continue
+            # Something other than the element and constants must be compared: a key
+            if not any(t.kind == IDENT and t.text not in (name, "compareMemory") and t.text not in loop.counters
+                       and texts[n - 1:n] != ["."] for n, t in enumerate(condition)):
+                continue
+            at = texts.index(name)
+            close = next((n for n in range(at, len(texts)) if texts[n] == "]"), len(texts) - 1)
+            if close + 2 < len(texts) and texts[close + 1] == "." and condition[close + 2].kind == IDENT:
+                return texts[close + 2]
+            return ""
+        return None
+
+
+def _split_on(tokens: List[Token], separator: str) -> List[List[Token]]:
+    parts: List[List[Token]] = [[]]
+    depth = 0
+    for t in tokens:
+        if t.text in ("(", "[", "{"):
+            depth += 1
+        elif t.text in (")", "]", "}"):
+            depth -= 1
+        if t.text == separator and depth == 0:
+            parts.append([])
+        else:
+            parts[-1].append(t)
+    return parts
+
+
+def _hash_map(loop: Loop) -> str:
+    capacity = 1
+    while capacity < (loop.bound or 1024):
+        capacity *= 2
+    if not loop.key:
+        return f"HashMap<id, uint64, {capacity}> from each entry to its slot in {loop.array.name}"
+    return f"HashMap<id, {loop.array.type_name}, {capacity}> keyed by {loop.key}"
+
+
+class PerformanceRule(Rule):
+    """Base class for performance rules; they get a PerformanceContext"""
+
+    category = "Performance"
+
+
+PERF_RULES: List[PerformanceRule] = []
+
+
+def register_perf_rule(rule_class):
+    """Class decorator adding a rule to the performance rule set"""
+    PERF_RULES.append(rule_class())
+    return rule_class
+
+
+@register_perf_rule
+class LinearLookupRule(PerformanceRule):
+    id = "linear-lookup"
+    severity = IssueSeverity.MEDIUM
+
+    def check_method(self, ctx, method):
+        tokens = ctx.model.tokens
+        for loop in ctx.loops[id(method)]:
+            if not loop.lookup:
+                continue
+            keyword = tokens[loop.keyword]
+            bound = f"up to {loop.bound:,} iterations" if loop.bound else "one iteration per element"
+            yield ctx.issue(
+                self, keyword.line, keyword.col,
+                f"Linear lookup over {loop.array.name} in {method.name}(): {bound} per call",
+                fix=f"Index the entries by key instead of scanning, e.g. a QPI {_hash_map(loop)} "
+                    f"(lines {keyword.line}-{tokens[loop.body[1] - 1].line})"
+            )
+
+
+@register_perf_rule
+class NestedScanRule(PerformanceRule):
+    id = "nested-scan"
+    severity = IssueSeverity.HIGH
+
+    def check_method(self, ctx, method):
+        tokens = ctx.model.tokens
+        loops = ctx.loops[id(method)]
+        reported: Set[int] = set()
+        for outer in loops:
+            if outer.keyword in reported:
+                continue
+            over = f"over {outer.array.name}[{outer.bound}]" if outer.array is not None and outer.bound \
+                else f"at line {tokens[outer.keyword].line}"
+
+            inner = next((lp for lp in loops if lp is not outer and outer.contains(lp.keyword)
+                          and lp.array is not None and (lp.dynamic or lp.lookup)), None)
+            if inner is not None:
+                reported.add(inner.keyword)
+                at = tokens[inner.keyword]
+                yield ctx.issue(
+                    self, at.line, at.col,
+                    f"Nested scan in {method.name}(): the loop over {inner.array.name} runs on every iteration "
+                    f"of the loop {over}{self._product(outer.bound, inner.bound)}",
+                    fix=f"Hoist the inner scan out of the loop at line {tokens[outer.keyword].line}, "
+                        f"or index {inner.array.name} by key so each step is O(1)"
+                )
+                continue
+
+            for k, name in ctx.calls(method):
+                lookup = ctx.lookups.get(name)
+                if lookup is None or name == method.name or not outer.contains(k):
+                    continue
+                at = tokens[k]
+                yield ctx.issue(
+                    self, at.line, at.col,
+                    f"{name}() scans {lookup.describe} on every iteration of the loop {over} in "
+                    f"{method.name}(){self._product(outer.bound, lookup.loop.bound)}",
+                    fix=f"Look the entries up once before the loop at line {tokens[outer.keyword].line}, "
+                        f"or index {lookup.loop.array.name} with a QPI {_hash_map(lookup.loop)}"
+                )
+                break
+
+    @staticmethod
+    def _product(outer: Optional[int], inner: Optional[int]) -> str:
+        return f" (up to {outer * inner:,} iterations)" if outer and inner else ""
+
+
+@register_perf_rule
+class RepeatedLookupRule(PerformanceRule):
+    id = "repeated-lookup"
+    severity = IssueSeverity.MEDIUM
+
+    def check_method(self, ctx, method):
+        model = ctx.model
+        tokens = model.tokens
+        seen: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+        for k, name in ctx.calls(method):
+            lookup = ctx.lookups.get(name)
+            if lookup is None or name == method.name or model.match[k + 1] < k:
+                continue
+            args = _split_args(tokens, k + 2, model.match[k + 1], model.match)
+            key = "".join(t.text for t in args[0]) if args and args[0] else ""
+            if key:
+                seen.setdefault((lookup.loop.array.name, key), []).append((k, name))
+
+        for (array, key), calls in seen.items():
+            if len(calls) < 2:
+                continue
+            lookup = ctx.lookups[calls[0][1]]
+            first, repeat = tokens[calls[0][0]], tokens[calls[1][0]]
+            names = ", ".join(f"{name}() at line {tokens[k].line}" for k, name in calls)
+            bound = f" (up to {len(calls) * lookup.loop.bound:,} iterations)" if lookup.loop.bound else ""
+            yield ctx.issue(
+                self, repeat.line, repeat.col,
+                f"{method.name}() scans {array} {len(calls)} times for the same key {key}: {names}{bound}",
+                fix=f"Find the index of {key} once at line {first.line} (a helper returning the slot) "
+                    f"and read / update {array}[index] directly"
+            )
+
+
+@register_perf_rule
+class RedundantCopyMemoryRule(PerformanceRule):
+    id = "redundant-copymemory"
+    severity = IssueSeverity.LOW
+
+    def check_method(self, ctx, method):
+        model = ctx.model
+        tokens, match = model.tokens, model.match
+        copies = []  # (token index, destination, source, size, enclosing brace)
+        for k in range(method.body_start, method.body_end - 1):
+            if tokens[k].text != "copyMemory" or tokens[k + 1].text != "(" or match[k + 1] < k:
+                continue
+            args = _split_args(tokens, k + 2, match[k + 1], match)
+            if len(args) != 3 or not args[0]:
+                continue
+            copies.append((k, *("".join(t.text for t in arg) for arg in args), self._block(model, k, method)))
+
+        for k, destination, source, size, _ in copies:
+            if destination == source:
+                yield ctx.issue(
+                    self, tokens[k].line, tokens[k].col,
+                    f"copyMemory copies {destination} onto itself",
+                    fix="Remove the call"
+                )
+
+        for n, (k, destination, _, size, block) in enumerate(copies):
+            later = next((c for c in copies[n + 1:] if c[1] == destination), None)
+            if later is None or later[4] != block or later[3] != size:
+                continue
+            between = tokens[match[k + 1] + 1:later[0]]
+            root = self._root(destination)
+            if any(t.text == root for t in between):
+                continue
+            yield ctx.issue(
+                self, tokens[k].line, tokens[k].col,
+                f"copyMemory into {destination} is overwritten at line {tokens[later[0]].line} before it is read",
+                fix=f"Remove the copy at line {tokens[k].line}"
+            )
+
+        for loop in ctx.loops[id(method)]:
+            inside = [c for c in copies if loop.contains(c[0])]
+            written = {self._root(c[1]) for c in inside}
+            for k, destination, source, size, _ in inside:
+                assigned = self._assigned(model, loop) | loop.counters | (written - {self._root(destination)})
+                used = {t.text for t in tokens[k + 2:match[k + 1]] if t.kind == IDENT}
+                calls = {tokens[j].text for j in range(k + 2, match[k + 1])
+                         if tokens[j].kind == IDENT and tokens[j + 1].text == "("}
+                if used & assigned or calls - {"invocator", "sizeof"}:
+                    continue
+                yield ctx.issue(
+                    self, tokens[k].line, tokens[k].col,
+                    f"copyMemory({destination}, {source}, {size}) copies the same bytes on every iteration "
+                    f"of the loop at line {tokens[loop.keyword].line}",
+                    fix=f"Move it before the loop at line {tokens[loop.keyword].line}"
+                )
+
+    @staticmethod
+    def _root(destination: str) -> str:
+        return destination.lstrip("&*").split("[")[0].split(".")[0].split("->")[0]
+
+    @staticmethod
+    def _block(model: ContractModel, k: int, method: Method) -> int:
+        """Token index of the "{" of the innermost block holding k"""
+        depth = 0
+        for j in range(k - 1, method.body_start - 2, -1):
+            text = model.tokens[j].text
+            if text == "}":
+                depth += 1
+            elif text == "{":
+                if depth == 0:
+                    return j
+                depth -= 1
+        return method.body_start - 1
+
+    @staticmethod
+    def _assigned(model: ContractModel, loop: Loop) -> Set[str]:
+        tokens = model.tokens
+        names = set()
+        for k in range(loop.body[0], loop.body[1]):
+            t = tokens[k]
+            if t.kind == IDENT and (tokens[k + 1].text in _ASSIGNMENTS | {"++", "--", "["}
+                                   or tokens[k - 1].text in ("++", "--", "&")):
+                names.add(t.text)
+        return names
+
+
+@dataclass
+class PerformanceResult:
+    model: ContractModel
+    issues: List[Issue]
+    footprint: Footprint
+
+
+def analyze_performance(code: str, rules: Optional[List[PerformanceRule]] = None) -> PerformanceResult:
+    """Parse the contract, compute its state footprint and run the performance rules"""
+    model = parse(code)
+    ctx = PerformanceContext(model=model, lines=code.splitlines())
+
+    issues: List[Issue] = []
+    for rule in PERF_RULES if rules is None else rules:
+        issues.extend(rule.check_file(ctx))
+        for method in model.iter_methods():
+            if method.has_body:
+                issues.extend(rule.check_method(ctx, method))
+
+    issues.sort(key=lambda i: (i.line, i.column))
+    return PerformanceResult(model=model, issues=issues, footprint=state_footprint(model))
@@ -0,0 +1,326 @@
+"""
+Pluggable audit rules over the parsed contract model
+
+A rule subclasses Rule, is registered with @register_rule, and implements
+check_file (whole-contract checks) and/or check_method (checks scoped to a
+single method body). Method-scoped rules only see their own method, which
+is what lets the incremental auditor re-run them per changed method.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set
+
+from app.models.schemas import Issue, IssueSeverity
+from app.services.analysis.lexer import IDENT, NUMBER, Token
+from app.services.analysis.parser import ContractModel, Field, Method, evaluate
+
+_BYTE_TYPES = {"char", "uint8_t", "int8_t", "uint8", "sint8", "bool", "unsigned char", "signed char"}
+_STRING_TYPES = {"const char *", "char *"}
+# Loop headers are not guards: "for (i = 0; i < count; i++)" says nothing about count
+_GUARDS = {"require", "assert", "if", "while"}
+_COMPARISONS = {"<", "<=", ">", ">=", "==", "!="}
+_TODO_RE = re.compile(r"\b(TODO|FIXME)\b")
+
+
+@dataclass
+class AnalysisContext:
+    model: ContractModel
+    lines: List[str]
+
+    def issue(
+        self,
+        rule: "Rule",
+        line: int,
+        col: int,
+        message: str,
+        fix: Optional[str] = None,
+        severity: Optional[IssueSeverity] = None
+    ) -> Issue:
+        snippet = self.lines[line - 1].strip() if 0 < line <= len(self.lines) else None
+        return Issue(
+            severity=severity or rule.severity,
+            category=rule.category,
+            line=line,
+            column=col,
+            message=message,
+            fix=fix,
+            code_snippet=snippet
+        )
+
+    def constants(self, method: Method) -> Dict[str, int]:
+        """Constants visible from a method (inner structs shadow outer ones)"""
+        chain = []
+        struct = self.model.struct(method.struct)
+        while struct is not None:
+            chain.append(struct)
+            struct = self.model.struct(struct.parent) if struct.parent else None
+
+        known = dict(self.model.root.constants)
+        for struct in reversed(chain):
+            known.update(struct.constants)
+        return known
+
+
+class Rule:
+    """Base class for audit rules"""
+
+    id = "rule"
+    severity = IssueSeverity.INFO
+    category = "General"
+
+    def check_file(self, ctx: AnalysisContext) -> Iterator[Issue]:
+        return iter(())
+
+    def check_method(self, ctx: AnalysisContext, method: Method) -> Iterator[Issue]:
+        return iter(())
+
+
+RULES: List[Rule] = []
+
+
+def register_rule(rule_class):
+    """Class decorator adding a rule to the default rule set"""
+    RULES.append(rule_class())
+    return rule_class
+
+
+def _split_args(tokens: List[Token], start: int, end: int, match: List[int]) -> List[List[Token]]:
+    """Split tokens[start:end] on top-level commas"""
+    args: List[List[Token]] = [[]]
+    i = start
+    while i < end:
+        token = tokens[i]
+        if token.text in ("(", "[", "{") and match[i] > i:
+            args[-1].extend(tokens[i:match[i] + 1])
+            i = match[i] + 1
+            continue
+        if token.text == ",":
+            args.append([])
+        else:
+            args[-1].append(token)
+        i += 1
+    return args
+
+
+@register_rule
+class TodoCommentRule(Rule):
+    id = "todo-comment"
+    severity = IssueSeverity.LOW
+    category = "Code Quality"
+
+    def check_file(self, ctx):
+        for comment in ctx.model.comments:
+            match = _TODO_RE.search(comment.text)
+            if not match:
+                continue
+            before = comment.text[:match.start()]
+            newlines = before.count("\n")
+            col = comment.col + match.start() if not newlines else len(before) - before.rfind("\n") - 1
+            yield ctx.issue(
+                self,
+                comment.line + newlines,
+                col,
+                f"Contains {match.group(1)} comment",
+                fix="Complete all TODOs before deployment"
+            )
+
+
+@register_rule
+class DeleteWithoutNewRule(Rule):
+    id = "delete-without-new"
+    severity = IssueSeverity.MEDIUM
+    category = "Memory Management"
+
+    def check_file(self, ctx):
+        tokens = ctx.model.tokens
+        if any(t.text == "new" and t.kind == IDENT for t in tokens):
+            return
+        for token in tokens:
+            if token.text == "delete" and token.kind == IDENT:
+                yield ctx.issue(
+                    self,
+                    token.line,
+                    token.col,
+                    "Potential memory leak: delete without corresponding new",
+                    fix="Ensure proper memory allocation and deallocation"
+                )
+
+
+@register_rule
+class MissingInputValidationRule(Rule):
+    id = "missing-input-validation"
+    severity = IssueSeverity.MEDIUM
+    category = "Input Validation"
+    snippet = "require(amount > 0, \"Amount must be positive\");"
+
+    def check_file(self, ctx):
+        # Fragments without any method bodies: fall back to a contract-wide check
+        if any(m.has_body for m in ctx.model.iter_methods()):
+            return
+        if not any(t.text in ("require", "assert") for t in ctx.model.tokens):
+            issue = ctx.issue(
+                self, 1, 0,
+                "Missing input validation checks",
+                fix="Add require() or assert() statements for input validation"
+            )
+            issue.code_snippet = self.snippet
+            yield issue
+
+    def check_method(self, ctx, method):
+        if not method.is_public or method.is_const or not method.params or not method.has_body:
+            return
+        if any(t.text in ("require", "assert") for t in ctx.model.body(method)):
+            return
+        names = ", ".join(p.name for p in method.params)
+        issue = ctx.issue(
+            self,
+            method.line,
+            method.col,
+            f"PUBLIC method {method.name}() does not validate its inputs ({names})",
+            fix="Add require() or assert() statements for input validation"
+        )
+        issue.code_snippet = self.snippet
+        yield issue
+
+
+@register_rule
+class UncheckedArrayIndexRule(Rule):
+    id = "unchecked-array-index"
+    severity = IssueSeverity.HIGH
+    category = "Bounds Checking"
+
+    def check_method(self, ctx, method):
+        model = ctx.model
+        tokens = model.tokens
+        match = model.match
+        params = {p.name for p in method.params}
+        struct = model.struct(method.struct)
+        state = {f.name for f in struct.fields} if struct else set()
+        constants = ctx.constants(method)
+
+        guards: List[tuple] = []  # (token index, identifiers compared in the condition)
+        reported: Set[tuple] = set()
+
+        for k in range(method.body_start, method.body_end):
+            token = tokens[k]
+
+            if token.text in _GUARDS and k + 1 < len(tokens) and tokens[k + 1].text == "(":
+                close = match[k + 1]
+                condition = tokens[k + 2:close]
+                if any(t.text in _COMPARISONS for t in condition):
+                    guards.append((k, {t.text for t in condition if t.kind == IDENT}))
+                continue
+
+            if token.text != "[" or k == 0 or tokens[k - 1].kind != IDENT or match[k] < k:
+                continue
+
+            array = model.find_field(tokens[k - 1].text, method.struct)
+            if array is None or not array.is_array:
+                continue
+
+            index = tokens[k + 1:match[k]]
+            size = array.array_sizes[0] if array.array_sizes else None
+
+            if index and all(t.kind == NUMBER or t.text in constants for t in index):
+                value = evaluate(" ".join(t.text for t in index), constants)
+                if value is not None and size is not None and value >= size:
+                    yield ctx.issue(
+                        self, token.line, token.col,
+                        f"Index {value} is out of bounds for {array.name}[{size}]",
+                        severity=IssueSeverity.CRITICAL
+                    )
+                continue
+
+            for t in index:
+                if t.kind != IDENT or t.text not in params and t.text not in state:
+                    continue
+                if any(t.text in names for _, names in guards):
+                    continue
+                key = (array.name, t.text)
+                if key in reported:
+                    continue
+                reported.add(key)
+                bound = f"{array.name}[{size}]" if size is not None else array.name
+                kind = "state counter" if t.text in state else "parameter"
+                yield ctx.issue(
+                    self, t.line, t.col,
+                    f"Unchecked {kind} '{t.text}' indexes fixed-size array {bound} in {method.name}()",
+                    fix=f"Add require({t.text} < {size or 'capacity'}, \"{array.name} full\"); before indexing"
+                )
+
+
+@register_rule
+class CopyMemoryBoundsRule(Rule):
+    id = "copymemory-bounds"
+    severity = IssueSeverity.HIGH
+    category = "Memory Safety"
+
+    def check_method(self, ctx, method):
+        model = ctx.model
+        tokens = model.tokens
+        constants = ctx.constants(method)
+        string_params = {p.name for p in method.params if p.type_name in _STRING_TYPES}
+
+        for k in range(method.body_start, method.body_end):
+            token = tokens[k]
+            if token.text != "copyMemory" or tokens[k + 1].text != "(":
+                continue
+            close = model.match[k + 1]
+            args = _split_args(tokens, k + 2, close, model.match)
+            if len(args) != 3 or not args[0]:
+                continue
+
+            size = evaluate(" ".join(t.text for t in args[2]), constants)
+            if size is None:
+                continue
+
+            destination = self._array_field(model, args[0], method)
+            if destination is not None and destination.array_size is not None \
+                    and destination.type_name in _BYTE_TYPES and size > destination.array_size:
+                yield ctx.issue(
+                    self, token.line, token.col,
+                    f"copyMemory writes {size} bytes into {destination.name}[{destination.array_size}]",
+                    fix=f"Copy at most sizeof({destination.name}) bytes"
+                )
+
+            source = args[1]
+            if len(source) == 1 and source[0].text in string_params:
+                yield ctx.issue(
+                    self, token.line, token.col,
+                    f"copyMemory reads a fixed {size} bytes from string parameter "
+                    f"'{source[0].text}' of unchecked length",
+                    fix="Pass fixed-size arrays (e.g. id or Array<uint8, N>) instead of raw char pointers",
+                    severity=IssueSeverity.MEDIUM
+                )
+
+    def _array_field(self, model: ContractModel, expr: List[Token], method: Method) -> Optional[Field]:
+        idents = [t for t in expr if t.kind == IDENT]
+        if not idents or expr[-1].text == "]":
+            return None
+        return model.find_field(idents[-1].text, None if len(idents) > 1 else method.struct)
+
+
+@register_rule
+class ArrayAssignmentRule(Rule):
+    id = "array-assignment"
+    severity = IssueSeverity.HIGH
+    category = "Correctness"
+
+    def check_method(self, ctx, method):
+        model = ctx.model
+        tokens = model.tokens
+        for k in range(method.body_start, method.body_end - 1):
+            token = tokens[k]
+            if token.kind != IDENT or tokens[k + 1].text != "=":
+                continue
+            if tokens[k - 1].text not in (".", "->", ";", "{", "}"):
+                continue
+            target = model.find_field(token.text, None if tokens[k - 1].text in (".", "->") else method.struct)
+            if target is None or not target.is_array:
+                continue
+            yield ctx.issue(
+                self, token.line, token.col,
+                f"Array {target.name} cannot be assigned with '='",
+                fix=f"Use copyMemory({target.name}, source, sizeof({target.name}))"
+            )
@@ -0,0 +1,183 @@
+"""
+Content-addressed cache for audit results
+In-process LRU tier (TTL + size bounded) with an optional Redis tier
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.models.schemas import AuditResponse
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# String/char literals are kept verbatim; comments are dropped
+_COMMENT_RE = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|//[^\n]*|/\*.*?\*/',
+    re.DOTALL
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_source(code: str) -> str:
+    """Strip comments and collapse whitespace so cosmetic edits hash identically"""
+    code = _COMMENT_RE.sub(lambda m: m.group(1) or " ", code)
+    return _WHITESPACE_RE.sub(" ", code).strip()
+
+
+def source_fingerprint(code: str) -> str:
+    """Hash of the normalized source, identical for cosmetically different code"""
+    return hashlib.sha256(normalize_source(code).encode("utf-8")).hexdigest()
+
+
+def audit_cache_key(code: str, model: str, prompt_version: str) -> str:
+    """Cache key: hash of the normalized source plus model and prompt version"""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, normalize_source(code)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MemoryTier:
+    """LRU tier with TTL, bounded by entry count and total payload bytes"""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, stored_at: float, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (stored_at, payload)
+        self.total_bytes += len(payload)
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self.total_bytes -= len(payload)
+
+
+class RedisTier:
+    """Shared Redis tier; failures are logged and treated as misses"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = "qubic:audit:"):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis audit cache get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        stored_at, _, payload = raw.partition(b"\n")
+        return float(stored_at), payload
+
+    async def set(self, key: str, stored_at: float, payload: bytes):
+        try:
+            await self.client.set(
+                self.prefix + key,
+                f"{stored_at}\n".encode() + payload,
+                ex=int(self.ttl)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Redis audit cache set failed: {e}")
+
+
+class AuditCache:
+    """Two-tier audit result cache (memory, then Redis if enabled)"""
+
+    def __init__(self):
+        self.enabled = settings.AUDIT_CACHE_ENABLED
+        self.memory = MemoryTier(
+            ttl=settings.AUDIT_CACHE_TTL,
+            max_entries=settings.AUDIT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.AUDIT_CACHE_MAX_BYTES
+        )
+        self.redis: Optional[RedisTier] = None
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled and settings.REDIS_ENABLED:
+            try:
+                self.redis = RedisTier(settings.REDIS_URL, ttl=settings.AUDIT_CACHE_TTL)
+                logger.info("✅ Redis audit cache tier enabled")
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize Redis audit cache: {e}")
+
+    async def get(self, key: str) -> Optional[AuditResponse]:
+        """Look up a cached result, annotated with cache_hit and cache_age"""
+        if not self.enabled:
+            return None
+
+        entry = self.memory.get(key)
+        if entry is None and self.redis is not None:
+            entry = await self.redis.get(key)
+            if entry is not None:
+                self.memory.set(key, *entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        stored_at, payload = entry
+        result = AuditResponse.model_validate_json(payload)
+        result.cache_hit = True
+        result.cache_age = round(time.time() - stored_at, 3)
+        return result
+
+    async def set(self, key: str, result: AuditResponse):
+        """Store a freshly computed result in every tier"""
+        if not self.enabled:
+            return
+
+        stored_at = time.time()
+        payload = result.model_dump_json(exclude={"cache_hit", "cache_age"}).encode("utf-8")
+        self.memory.set(key, stored_at, payload)
+        if self.redis is not None:
+            await self.redis.set(key, stored_at, payload)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.memory),
+            "bytes": self.memory.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "redis": self.redis is not None
+        }
+
+
+# Create global instance
+audit_cache = AuditCache()
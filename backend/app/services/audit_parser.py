@@ -0,0 +1,248 @@
+"""
+Tolerant incremental parser for LLM audit responses
+Finds the JSON object inside prose or markdown fences and yields each issue
+as soon as its object closes, without waiting for the rest of the response
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.models.schemas import Issue, IssueSeverity
+from app.services.analysis import score_issues
+
+# A JSON object that starts with a key, so braces in prose are not mistaken for it
+_ROOT_RE = re.compile(r'\{\s*"')
+_STRUCTURAL_RE = re.compile(r'[{}\[\]":]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+_SEVERITY_ALIASES = {
+    **{s.value: s for s in IssueSeverity},
+    "informational": IssueSeverity.INFO,
+    "minor": IssueSeverity.LOW,
+    "moderate": IssueSeverity.MEDIUM,
+    "warning": IssueSeverity.MEDIUM,
+    "major": IssueSeverity.HIGH,
+    "error": IssueSeverity.HIGH,
+    "severe": IssueSeverity.CRITICAL,
+}
+
+
+class AuditParseError(ValueError):
+    """Raised when a provider response holds no usable audit result"""
+
+
+def _loads(text: str) -> Any:
+    """json.loads that also accepts trailing commas; None if it still fails"""
+    for candidate in (text, _TRAILING_COMMA_RE.sub(r"\1", text)):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+def coerce_issue(data: Any) -> Optional[Issue]:
+    """Validate a loosely shaped issue object into an Issue, or None if unusable"""
+    if not isinstance(data, dict):
+        return None
+    message = data.get("message") or data.get("description") or data.get("title")
+    if not message:
+        return None
+
+    severity = _SEVERITY_ALIASES.get(str(data.get("severity", "")).strip().lower(), IssueSeverity.MEDIUM)
+    try:
+        return Issue(
+            severity=severity,
+            category=str(data.get("category") or "General"),
+            line=_as_int(data.get("line"), 1) or 1,
+            column=_as_int(data.get("column"), 0),
+            message=str(message),
+            fix=data.get("fix") or data.get("recommendation"),
+            code_snippet=data.get("code_snippet") or data.get("snippet")
+        )
+    except ValidationError:
+        return None
+
+
+def coerce_score(value: Any) -> Optional[int]:
+    try:
+        return min(max(int(round(float(value))), 0), 100)
+    except (TypeError, ValueError):
+        return None
+
+
+class StreamingAuditParser:
+    """
+    Incremental scanner for {"score": .., "issues": [..], ...} in a text stream
+
+    feed() returns the issues completed by each chunk; finish() returns the
+    whole result, repairing output that was cut off mid-object.
+    """
+
+    def __init__(self):
+        self.issues: List[Issue] = []
+        self._buffer = ""
+        self._pos = 0
+        self._root = -1
+        self._end = -1
+        self._stack: List[str] = []
+        self._in_string = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._issues_depth = 0  # stack depth inside the "issues" array, 0 when outside it
+        self._item_start = -1
+        self._last_item_end = -1
+
+    @property
+    def done(self) -> bool:
+        return self._end >= 0
+
+    def feed(self, chunk: str) -> List[Issue]:
+        self._buffer += chunk
+        if self.done:
+            return []
+        if self._root < 0 and not self._find_root():
+            return []
+        return self._scan()
+
+    def finish(self) -> Dict:
+        """
+        The whole result; raises AuditParseError when the response has no
+        audit object, or was cut off before giving a score. Issues only come
+        from objects that closed: a truncated issue is dropped, not repaired.
+        """
+        data = None
+        if self.done:
+            data = _loads(self._buffer[self._root:self._end])
+        elif self._root >= 0:
+            data = _loads(self._repaired())
+            if data is None and self._last_item_end >= 0:
+                # Cut off inside an issue: keep everything up to the last complete one
+                data = _loads(self._buffer[self._root:self._last_item_end] + "]}")
+        if not isinstance(data, dict) or not ("score" in data or "issues" in data):
+            raise AuditParseError("Provider response contains no audit result")
+
+        issues = self.issues
+        if not issues and self.done and isinstance(data.get("issues"), list):
+            issues = [i for i in map(coerce_issue, data["issues"]) if i is not None]
+
+        score = coerce_score(data.get("score"))
+        if score is None:
+            if not self.done:
+                # Cut off before the score: the issues seen so far may not be all of them
+                raise AuditParseError("Provider response was truncated before the audit score")
+            score = score_issues(issues)
+
+        recommendations = data.get("recommendations")
+        return {
+            "score": score,
+            "issues": issues,
+            "summary": str(data.get("summary") or f"AI audit found {len(issues)} potential issues"),
+            "recommendations": [str(r) for r in recommendations if r] if isinstance(recommendations, list) else []
+        }
+
+    def _find_root(self) -> bool:
+        match = _ROOT_RE.search(self._buffer, self._pos)
+        if match is None:
+            # Keep a trailing "{" whose key has not arrived yet
+            brace = self._buffer.rfind("{", self._pos)
+            if brace >= 0 and not self._buffer[brace + 1:].strip():
+                self._pos = brace
+            else:
+                self._pos = len(self._buffer)
+            return False
+        self._root = match.start()
+        self._stack = ["{"]
+        self._pos = match.start() + 1
+        return True
+
+    def _scan(self) -> List[Issue]:
+        buffer = self._buffer
+        stack = self._stack
+        found: List[Issue] = []
+        i = self._pos
+
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL_RE.search(buffer, i)
+                if match is None:
+                    i = len(buffer)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        i = match.start()  # wait for the escaped character
+                        break
+                    i = match.end() + 1
+                    continue
+                self._in_string = False
+                if len(stack) == 1:
+                    self._last_string = buffer[self._string_start:match.end()]
+                i = match.end()
+                continue
+
+            match = _STRUCTURAL_RE.search(buffer, i)
+            if match is None:
+                i = len(buffer)
+                break
+            char = match.group()
+            i = match.end()
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = match.start()
+            elif char == ":":
+                if len(stack) == 1 and self._last_string is not None:
+                    self._key = _loads(self._last_string)
+            elif char in "{[":
+                if char == "{" and self._issues_depth and len(stack) == self._issues_depth:
+                    self._item_start = match.start()
+                stack.append(char)
+                if char == "[" and len(stack) == 2 and self._key == "issues":
+                    self._issues_depth = 2
+            else:
+                if stack:
+                    stack.pop()
+                depth = len(stack)
+                if char == "}" and self._issues_depth and depth == self._issues_depth and self._item_start >= 0:
+                    issue = coerce_issue(_loads(buffer[self._item_start:i]))
+                    self._item_start = -1
+                    self._last_item_end = i
+                    if issue is not None:
+                        self.issues.append(issue)
+                        found.append(issue)
+                elif char == "]" and depth == self._issues_depth - 1:
+                    self._issues_depth = 0
+                if depth == 0:
+                    self._end = i
+                    break
+
+        self._pos = i
+        return found
+
+    def _repaired(self) -> str:
+        """Close whatever a truncated response left open"""
+        text = self._buffer[self._root:]
+        if self._in_string:
+            text += '"'
+        text = text.rstrip().rstrip(",:")
+        closers = {"{": "}", "[": "]"}
+        return text + "".join(closers[c] for c in reversed(self._stack))
+
+
+def parse_audit_response(text: str) -> Dict:
+    """Parse a complete provider response; raises AuditParseError if it holds no audit"""
+    parser = StreamingAuditParser()
+    parser.feed(text)
+    return parser.finish()
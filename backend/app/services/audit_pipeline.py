@@ -0,0 +1,131 @@
+"""
+Tiered audit pipeline
+The static analyzer runs first; only methods it cannot vouch for are sent to
+the AI provider, as small snippets instead of the whole contract
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from app.models.schemas import Issue, IssueSeverity
+from app.services.analysis import AnalysisResult
+from app.services.analysis.lexer import IDENT
+from app.services.analysis.parser import Method
+
+SEVERITY_RANK = {
+    IssueSeverity.INFO: 0,
+    IssueSeverity.LOW: 1,
+    IssueSeverity.MEDIUM: 2,
+    IssueSeverity.HIGH: 3,
+    IssueSeverity.CRITICAL: 4,
+}
+
+# Constructs the rules do not model; a method using them always gets a second opinion
+RISKY_IDENTIFIERS = {
+    "transfer", "burn", "reinterpret_cast", "const_cast", "goto", "asm",
+    "memcpy", "memmove", "strcpy", "strcat", "sprintf", "new", "delete",
+}
+
+# Unparseable input larger than this is escalated whole instead of trusted
+UNSTRUCTURED_TOKEN_LIMIT = 50
+
+
+@dataclass
+class Snippet:
+    method: Method
+    text: str
+    line_map: List[int]  # snippet line (0-based) -> source line
+    reason: str
+
+    def source_line(self, snippet_line: int) -> int:
+        """Map a 1-based snippet line reported by the provider back to the file"""
+        if 1 <= snippet_line <= len(self.line_map):
+            return self.line_map[snippet_line - 1]
+        return self.method.line
+
+
+def select_escalations(
+    analysis: AnalysisResult,
+    lines: List[str],
+    min_severity: IssueSeverity,
+    max_snippets: int,
+    methods: Optional[Iterable[Method]] = None
+) -> List[Snippet]:
+    """Pick the methods (all, or the given ones) whose static result is not conclusive, worst first"""
+    model = analysis.model
+    threshold = SEVERITY_RANK[min_severity]
+    candidates = []
+
+    for method in model.iter_methods() if methods is None else methods:
+        if not method.has_body:
+            continue
+        worst = max(
+            (SEVERITY_RANK[i.severity] for i in analysis.issues
+             if method.line <= i.line <= method.end_line),
+            default=-1
+        )
+        risky = sorted({t.text for t in model.body(method) if t.kind == IDENT and t.text in RISKY_IDENTIFIERS})
+
+        if worst >= threshold:
+            reason = "static findings"
+        elif risky:
+            reason = f"uses {', '.join(risky)}"
+        else:
+            continue
+        candidates.append((worst, bool(risky), method, reason))
+
+    candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+    return [
+        build_snippet(analysis, lines, method, reason)
+        for _, _, method, reason in candidates[:max_snippets]
+    ]
+
+
+def build_snippet(analysis: AnalysisResult, lines: List[str], method: Method, reason: str) -> Snippet:
+    """Method source preceded by the declarations of the struct it belongs to"""
+    struct = analysis.model.struct(method.struct)
+    context_lines = sorted({f.line for f in struct.fields}) if struct else []
+    source_lines = context_lines + list(range(method.line, method.end_line + 1))
+    text = "\n".join(lines[n - 1] for n in source_lines if 0 < n <= len(lines))
+    return Snippet(method=method, text=text, line_map=source_lines, reason=reason)
+
+
+def is_unstructured(analysis: AnalysisResult) -> bool:
+    """True when the parser found no method bodies to reason about"""
+    if any(m.has_body for m in analysis.model.iter_methods()):
+        return False
+    return len(analysis.model.tokens) > UNSTRUCTURED_TOKEN_LIMIT
+
+
+class PipelineMetrics:
+    """Escalation counters for the tiered audit pipeline"""
+
+    def __init__(self):
+        self.audits = 0
+        self.escalated = 0
+        self.snippets_sent = 0
+        self.lines_total = 0
+        self.lines_sent = 0
+        self.provider_errors = 0
+
+    def record(self, total_lines: int, snippets: List[Snippet], sent_lines: int):
+        self.audits += 1
+        self.lines_total += total_lines
+        if snippets or sent_lines:
+            self.escalated += 1
+            self.snippets_sent += len(snippets)
+            self.lines_sent += sent_lines
+
+    def stats(self) -> Dict:
+        return {
+            "audits": self.audits,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.audits, 4) if self.audits else 0.0,
+            "snippets_sent": self.snippets_sent,
+            "lines_sent_ratio": round(self.lines_sent / self.lines_total, 4) if self.lines_total else 0.0,
+            "provider_errors": self.provider_errors,
+        }
+
+
+# Create global instance
+pipeline_metrics = PipelineMetrics()
@@ -0,0 +1,533 @@
+"""
+Sandboxed C++ compile service
+Builds contracts with the local toolchain against the bundled QPI header stub.
+Every build runs in a scratch directory under CPU, memory and file-size
+limits, at most COMPILE_MAX_PARALLEL at a time, and results are cached on disk
+by a hash of the preprocessed source, the flags and the compiler version.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import shutil
+import signal
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows; builds then run without rlimits
+    resource = None
+
+from app.models.schemas import CompileDiagnostic, CompileResult
+from app.services.single_flight import SingleFlight
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOOLCHAIN_DIR = Path(__file__).resolve().parent.parent / "toolchain"
+INCLUDE_DIR = TOOLCHAIN_DIR / "include"
+HARNESS_DRIVER = TOOLCHAIN_DIR / "harness_main.cpp"
+SOURCE_NAME = "contract.cpp"
+
+# What contract code may call once linked into a native harness: the QPI
+# runtime plus symbols the compiler itself emits calls to
+HARNESS_IMPORTS = {
+    "require", "copyMemory", "setMemory", "compareMemory", "invocator", "invocationReward",
+    "currentBlock", "transfer", "K12", "memcpy", "memmove", "memset", "memcmp",
+    "__stack_chk_fail", "__cxa_guard_acquire", "__cxa_guard_release", "__cxa_guard_abort",
+    "__cxa_atexit", "__dso_handle", "__cxa_pure_virtual", "__gxx_personality_v0", "_Unwind_Resume",
+    # Sanitizer and coverage hooks of fuzz builds, implemented by the driver
+    "__sanitizer_cov_trace_pc", "__ubsan_handle_out_of_bounds_abort", "__ubsan_handle_add_overflow_abort",
+    "__ubsan_handle_sub_overflow_abort", "__ubsan_handle_mul_overflow_abort",
+    "__ubsan_handle_negate_overflow_abort", "__ubsan_handle_divrem_overflow_abort",
+    "__ubsan_handle_shift_out_of_bounds_abort", "__ubsan_handle_type_mismatch_v1_abort",
+    "__ubsan_handle_load_invalid_value_abort", "__ubsan_handle_pointer_overflow_abort",
+    "__ubsan_handle_vla_bound_not_positive_abort", "__ubsan_handle_builtin_unreachable",
+    "__ubsan_handle_missing_return", "qh_bounds_fault",
+}
+
+# Harnesses keep line tables and frame pointers so crashes can be located;
+# -fno-working-directory keeps the scratch directory out of the preprocessed
+# source (and so out of the cache key)
+HARNESS_FLAGS = ["-g", "-fno-omit-frame-pointer", "-fno-working-directory"]
+# Fuzz harnesses trap undefined behaviour and record edge coverage; the
+# handlers live in the driver (built with -DQH_FUZZ), no sanitizer runtime is linked
+FUZZ_FLAGS = [
+    "-O1",
+    "-fsanitize=bounds-strict,signed-integer-overflow,shift,integer-divide-by-zero,null,return,"
+    "unreachable,vla-bound,bool,enum,pointer-overflow",
+    "-fno-sanitize-recover=all",
+    "-fsanitize-coverage=trace-pc",
+]
+# Profile harnesses count executed basic blocks through the same hook
+PROFILE_FLAGS = ["-fsanitize-coverage=trace-pc"]
+# variant -> (contract flags, driver defines)
+HARNESS_VARIANTS = {
+    "test": ([], []),
+    "fuzz": (FUZZ_FLAGS, ["-DQH_FUZZ"]),
+    "profile": (PROFILE_FLAGS, ["-DQH_PROFILE"]),
+}
+
+# contract.cpp:12:5: error: 'x' was not declared in this scope [-Wfoo]
+DIAGNOSTIC_RE = re.compile(
+    r"^(?P<file>[^:\n]+):(?P<line>\d+):(?P<column>\d+): "
+    r"(?P<severity>fatal error|error|warning|note): (?P<message>.*?)"
+    r"(?: \[(?P<option>-[Wf][^\]]+)\])?$"
+)
+# cc1plus: error: ... (no source location)
+LOCATIONLESS_RE = re.compile(r"^(?P<file>[^:\s]+): (?P<severity>fatal error|error|warning): (?P<message>.*)$")
+# /usr/bin/ld: contract.o: in function ...: undefined reference to `foo'
+LINKER_RE = re.compile(r"^(?:\S*/)?ld(?:\.\w+)?: (?P<message>.*)$")
+LINE_MARKER_RE = re.compile(r'^# \d+ "((?:[^"\\]|\\.)*)"', re.M)
+PSEUDO_FILES = {"<built-in>", "<command-line>"}
+
+
+class CompilerUnavailable(Exception):
+    """Raised when no C++ toolchain is installed"""
+
+
+class BuildTimeout(Exception):
+    """Raised when a toolchain process exceeds COMPILE_TIMEOUT"""
+
+
+def limit_resources(cpu_seconds: int, memory_bytes: int, file_bytes: int):
+    """preexec_fn body: rlimits for a sandboxed child, applied before exec"""
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def parse_diagnostics(stderr: str) -> List[CompileDiagnostic]:
+    """GCC/Clang diagnostics with file, line and column; context lines are skipped"""
+    diagnostics = []
+    for line in stderr.splitlines():
+        match = DIAGNOSTIC_RE.match(line)
+        if match:
+            diagnostics.append(CompileDiagnostic(
+                file=match["file"],
+                line=int(match["line"]),
+                column=int(match["column"]),
+                severity="error" if match["severity"] == "fatal error" else match["severity"],
+                message=match["message"],
+                option=match["option"]
+            ))
+            continue
+        match = LINKER_RE.match(line)
+        if match:
+            diagnostics.append(CompileDiagnostic(file="ld", severity="error", message=match["message"]))
+            continue
+        match = LOCATIONLESS_RE.match(line)
+        if match:
+            diagnostics.append(CompileDiagnostic(
+                file=match["file"],
+                severity="error" if match["severity"] == "fatal error" else match["severity"],
+                message=match["message"]
+            ))
+    return diagnostics
+
+
+def _build_result(diagnostics: List[CompileDiagnostic], compiled: bool, **fields) -> CompileResult:
+    errors = [d for d in diagnostics if d.severity == "error"]
+    warnings = [d for d in diagnostics if d.severity == "warning"]
+    notes = [d for d in diagnostics if d.severity == "note"]
+    if compiled:
+        message = "✅ Compilation successful!" + (f" ({len(warnings)} warnings)" if warnings else "")
+    else:
+        message = f"❌ Compilation failed with {len(errors)} errors"
+    return CompileResult(
+        success=compiled,
+        compiled=compiled,
+        warnings=warnings,
+        errors=errors,
+        notes=notes,
+        message=message,
+        **fields
+    )
+
+
+class ArtifactCache:
+    """
+    Content-addressed build results on disk
+
+    <key>.json holds the result (diagnostics included, so builds the compiler
+    rejected are cached too) and <key>.o the object file, or <key>.bin for a
+    linked test harness. The directory is made absolute, since toolchain
+    processes run in scratch directories. Entries are files, so workers
+    sharing the directory share the cache; the least recently used entries
+    are pruned past max_entries.
+    """
+
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = Path(directory).resolve()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = ".o") -> Optional[CompileResult]:
+        path = self._path(key, ".json")
+        try:
+            result = CompileResult.model_validate_json(path.read_bytes())
+            if result.compiled and not self._path(key, suffix).exists():
+                raise FileNotFoundError(key)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: CompileResult, artifact: Optional[bytes], suffix: str = ".o"):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if artifact is not None:
+            self._write(self._path(key, suffix), artifact, executable=suffix == ".bin")
+        self._write(self._path(key, ".json"), result.model_dump_json().encode("utf-8"))
+        self._prune()
+
+    def artifact_path(self, key: str, suffix: str = ".o") -> Optional[Path]:
+        if not re.fullmatch(r"[0-9a-f]{64}", key):
+            return None
+        path = self._path(key, suffix)
+        return path if path.is_file() else None
+
+    def _write(self, path: Path, data: bytes, executable: bool = False):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if executable:
+            os.chmod(tmp, 0o700)
+        os.replace(tmp, path)
+
+    def _prune(self):
+        entries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for path in entries[:max(len(entries) - self.max_entries, 0)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".o").unlink(missing_ok=True)
+            path.with_suffix(".bin").unlink(missing_ok=True)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(1 for _ in self.directory.glob("*.json")),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CompilerService:
+    """Compiles contract source to an object file; builds share a bounded pool of slots"""
+
+    def __init__(
+        self,
+        compiler: str,
+        flags: str,
+        max_parallel: int,
+        timeout: float,
+        memory_limit_mb: int,
+        cache: ArtifactCache
+    ):
+        self.compiler = compiler
+        self.flags = shlex.split(flags)
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.cache = cache
+        self.flights = SingleFlight()
+        self.builds = 0
+        self.active = 0
+        self._slots = asyncio.Semaphore(self.max_parallel)
+        self._path: Optional[str] = None
+        self._version: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return shutil.which(self.compiler) is not None
+
+    def _command(self, *args: str, extra: Sequence[str] = ()) -> List[str]:
+        # No system headers: a contract sees only the QPI stub. Contract methods
+        # are defined in-class (implicitly inline), so keep them in the object
+        return [
+            self._path, *self.flags, *extra, "-nostdinc", "-nostdinc++", f"-I{INCLUDE_DIR}", "-fkeep-inline-functions",
+            "-fno-diagnostics-color", "-fno-diagnostics-show-caret", "-fdiagnostics-show-option",
+            "-fmessage-length=0", "-fmax-errors=50", *args
+        ]
+
+    async def compile(self, code: str) -> CompileResult:
+        """Preprocess to get the cache key, then serve from the cache or build"""
+        start = time.perf_counter()
+        key, failure = await self._prepare(code)
+        if failure is not None:
+            return failure.model_copy(update={"compile_time": time.perf_counter() - start})
+
+        result = await self.flights.do(key, lambda: self._cached_build(key, code))
+        return result.model_copy(update={"compile_time": time.perf_counter() - start})
+
+    async def build_harness(self, code: str, variant: str = "test") -> Tuple[CompileResult, Optional[Path]]:
+        """
+        Compile code (contract plus generated qh_* glue) and link it with the
+        native test harness driver; returns the result and the executable.
+        variant is "test", "fuzz" (sanitized, coverage-instrumented) or
+        "profile" (reports per-call costs); see HARNESS_VARIANTS
+        """
+        start = time.perf_counter()
+        flags, defines = HARNESS_VARIANTS[variant]
+        extra = HARNESS_FLAGS + flags
+        key, failure = await self._prepare(code, extra)
+        if failure is not None:
+            return failure.model_copy(update={"compile_time": time.perf_counter() - start}), None
+
+        driver = await self.flights.do(
+            f"harness-driver-{variant}", lambda: self._driver_object(defines)
+        )
+        key = hashlib.sha256(f"harness\0{key}\0{driver.stem}".encode("utf-8")).hexdigest()
+        result = await self.flights.do(key, lambda: self._cached_build(key, code, driver, extra))
+        result = result.model_copy(update={"compile_time": time.perf_counter() - start})
+        return result, self.cache.artifact_path(key, ".bin") if result.compiled else None
+
+    async def _prepare(
+        self, code: str, extra: Sequence[str] = ()
+    ) -> Tuple[Optional[str], Optional[CompileResult]]:
+        """Preprocess in a scratch directory; returns the cache key or a failed result"""
+        await self._resolve_toolchain()
+
+        with tempfile.TemporaryDirectory(prefix="qubic-build-") as workdir:
+            Path(workdir, SOURCE_NAME).write_text(code, encoding="utf-8")
+
+            returncode, _, stderr = await self._run(
+                self._command("-E", SOURCE_NAME, "-o", "contract.ii", extra=extra), workdir
+            )
+            if returncode != 0:
+                return None, _build_result(parse_diagnostics(stderr), compiled=False, compiler=self._version)
+            preprocessed = Path(workdir, "contract.ii").read_bytes()
+
+        outside = self._outside_includes(preprocessed)
+        if outside:
+            return None, _build_result(
+                [CompileDiagnostic(file=SOURCE_NAME, severity="error",
+                                   message=f"only <qubic.h> may be included (found {outside})")],
+                compiled=False, compiler=self._version
+            )
+        return self._key(preprocessed, extra), None
+
+    async def _cached_build(
+        self, key: str, code: str, driver: Optional[Path] = None, extra: Sequence[str] = ()
+    ) -> CompileResult:
+        suffix = ".o" if driver is None else ".bin"
+        cached = await asyncio.to_thread(self.cache.get, key, suffix)
+        if cached is not None:
+            return cached.model_copy(update={"cache_hit": True})
+
+        result, artifact, cacheable = await self._build(code, driver, extra)
+        result = result.model_copy(update={
+            "artifact_id": key if artifact is not None and driver is None else None,
+            "size_bytes": len(artifact) if artifact is not None else 0
+        })
+        if cacheable:
+            await asyncio.to_thread(self.cache.put, key, result, artifact, suffix)
+        return result
+
+    async def _build(
+        self, code: str, driver: Optional[Path] = None, extra: Sequence[str] = ()
+    ) -> Tuple[CompileResult, Optional[bytes], bool]:
+        """
+        Compile to an object file, or with a driver object to a linked
+        executable. The flag says whether the result may be cached: successes
+        and failures the compiler diagnosed in the contract are, while link
+        and toolchain failures (missing files, killed processes) are not, as
+        they say nothing lasting about the source
+        """
+        start = time.perf_counter()
+        artifact = None
+        cacheable = True
+        with tempfile.TemporaryDirectory(prefix="qubic-build-") as workdir:
+            Path(workdir, SOURCE_NAME).write_text(code, encoding="utf-8")
+            returncode, _, stderr = await self._run(
+                self._command("-c", SOURCE_NAME, "-o", "contract.o", extra=extra), workdir
+            )
+            diagnostics = parse_diagnostics(stderr)
+            if returncode != 0 and not any(d.severity == "error" and d.line for d in diagnostics):
+                cacheable = False
+
+            if returncode == 0 and driver is not None:
+                diagnostics += await self._check_imports(workdir)
+                returncode = 1 if any(d.severity == "error" for d in diagnostics) else 0
+                if returncode == 0:
+                    returncode, _, stderr = await self._run(
+                        # Fixed load address: crash PCs map straight to addr2line
+                        [self._path, "-no-pie", "contract.o", str(driver), "-o", "harness"], workdir
+                    )
+                    diagnostics += parse_diagnostics(stderr)
+                    cacheable = returncode == 0
+
+            if returncode == 0:
+                artifact = Path(workdir, "contract.o" if driver is None else "harness").read_bytes()
+
+        self.builds += 1
+        logger.info(f"🔨 Built contract in {time.perf_counter() - start:.2f}s (exit {returncode})")
+        result = _build_result(
+            diagnostics, compiled=returncode == 0,
+            compiler=self._version, compile_time=time.perf_counter() - start
+        )
+        return result, artifact, cacheable
+
+    async def _check_imports(self, workdir: str) -> List[CompileDiagnostic]:
+        """Errors for functions the contract object needs that the harness must not provide"""
+        nm = shutil.which("nm")
+        if nm is None:
+            raise CompilerUnavailable("binutils 'nm' not found on PATH (needed to link test harnesses)")
+        _, stdout, _ = await self._run([nm, "-u", "-C", "contract.o"], workdir)
+        diagnostics = []
+        for line in stdout.splitlines():
+            symbol = line.split(None, 1)[-1] if line.strip() else ""
+            name = symbol.split("(", 1)[0]
+            if name and name not in HARNESS_IMPORTS:
+                diagnostics.append(CompileDiagnostic(
+                    file=SOURCE_NAME, severity="error",
+                    message=f"'{symbol}' is not available to contracts (only the QPI runtime can be called)"
+                ))
+        return diagnostics
+
+    async def _driver_object(self, defines: Sequence[str] = ()) -> Path:
+        """The harness driver compiled once per driver source, variant and toolchain"""
+        flags = ["-std=c++17", "-O2", *defines]
+        source = HARNESS_DRIVER.read_bytes()
+        digest = hashlib.sha256(
+            self._version.encode("utf-8") + b"\0" + " ".join(flags).encode("utf-8") + b"\0" + source
+        ).hexdigest()[:32]
+        path = self.cache.directory / f"driver-{digest}.o"
+        if path.exists():
+            return path
+
+        with tempfile.TemporaryDirectory(prefix="qubic-build-") as workdir:
+            returncode, _, stderr = await self._run(
+                [self._path, *flags, "-c", str(HARNESS_DRIVER), "-o", "driver.o"], workdir
+            )
+            if returncode != 0:
+                raise RuntimeError(f"Test harness driver failed to compile: {stderr.strip()}")
+            data = Path(workdir, "driver.o").read_bytes()
+        self.cache.directory.mkdir(parents=True, exist_ok=True)
+        self.cache._write(path, data)
+        return path
+
+    async def symbolize(self, executable: Path, addresses: Sequence[int]) -> List[Tuple[str, Optional[int]]]:
+        """(function, line in contract.cpp or None) for each code address in a harness"""
+        addr2line = shutil.which("addr2line")
+        if addr2line is None or not addresses:
+            return [("??", None)] * len(addresses)
+        with tempfile.TemporaryDirectory(prefix="qubic-build-") as workdir:
+            _, stdout, _ = await self._run(
+                [addr2line, "-f", "-C", "-e", str(executable), *(hex(a) for a in addresses)], workdir
+            )
+        lines = stdout.splitlines()
+        frames = []
+        for function, location in zip(lines[0::2], lines[1::2]):
+            path, _, line = location.rpartition(":")
+            line = line.split(" ", 1)[0]
+            in_contract = os.path.basename(path) == SOURCE_NAME and line.isdigit()
+            frames.append((function, int(line) if in_contract else None))
+        return frames
+
+    async def _run(self, args: List[str], workdir: str) -> Tuple[int, str, str]:
+        """Run one toolchain process in its own session under resource limits"""
+        async with self._slots:
+            self.active += 1
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *args,
+                    cwd=workdir,
+                    env={"PATH": os.environ.get("PATH", ""), "LC_ALL": "C", "TMPDIR": workdir},
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    preexec_fn=partial(
+                        limit_resources, int(self.timeout) + 1, self.memory_limit, 64 * 1024 * 1024
+                    ) if resource else None,
+                    start_new_session=True
+                )
+                try:
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+                except BaseException:
+                    # The driver forks cc1plus/as; kill the whole process group
+                    try:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+                    raise
+            except asyncio.TimeoutError:
+                raise BuildTimeout(f"Compilation exceeded {self.timeout:.0f}s")
+            finally:
+                self.active -= 1
+        return (
+            proc.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace")
+        )
+
+    @staticmethod
+    def _outside_includes(preprocessed: bytes) -> Optional[str]:
+        """First file pulled in other than the contract and the stub, if any"""
+        for match in LINE_MARKER_RE.finditer(preprocessed.decode("utf-8", errors="replace")):
+            name = match.group(1)
+            if name == SOURCE_NAME or name in PSEUDO_FILES:
+                continue
+            if not os.path.normpath(name).startswith(f"{INCLUDE_DIR}{os.sep}"):
+                return name
+        return None
+
+    def _key(self, preprocessed: bytes, extra: Sequence[str] = ()) -> str:
+        digest = hashlib.sha256()
+        digest.update(self._version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(self._command(extra=extra)).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(preprocessed)
+        return digest.hexdigest()
+
+    async def _resolve_toolchain(self):
+        if self._version is not None:
+            return
+        path = shutil.which(self.compiler)
+        if path is None:
+            raise CompilerUnavailable(f"C++ compiler '{self.compiler}' not found on PATH")
+        proc = await asyncio.create_subprocess_exec(
+            path, "--version", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await proc.communicate()
+        self._path = path
+        self._version = stdout.decode("utf-8", errors="replace").splitlines()[0].strip()
+        logger.info(f"🔧 Using {self._version} ({self.max_parallel} parallel builds)")
+
+    def stats(self) -> Dict:
+        return {
+            "available": self.available,
+            "compiler": self._version or self.compiler,
+            "max_parallel": self.max_parallel,
+            "active": self.active,
+            "builds": self.builds,
+            "coalesced": self.flights.coalesced,
+            "cache": self.cache.stats(),
+        }
+
+
+# Create global instance
+compiler_service = CompilerService(
+    compiler=settings.COMPILER,
+    flags=settings.COMPILE_FLAGS,
+    max_parallel=settings.COMPILE_MAX_PARALLEL,
+    timeout=settings.COMPILE_TIMEOUT,
+    memory_limit_mb=settings.COMPILE_MEMORY_LIMIT_MB,
+    cache=ArtifactCache(settings.COMPILE_CACHE_DIR, settings.COMPILE_CACHE_MAX_ENTRIES)
+)
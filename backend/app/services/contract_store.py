@@ -0,0 +1,175 @@
+"""
+Persistent contract store backed by SQLAlchemy
+Indexed filters and keyset (cursor) pagination
+"""
+
+import base64
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+
+from app.models.database import Base, ContractRecord, SessionLocal, engine
+from app.models.schemas import NetworkType, SmartContract
+from app.services.platform_stats import apply_counter_deltas, platform_stats
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(updated_at: datetime, contract_id: str) -> str:
+    """Opaque cursor pointing just past (updated_at, id)"""
+    raw = f"{updated_at.isoformat()}|{contract_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        updated_at, contract_id = raw.split("|", 1)
+        return datetime.fromisoformat(updated_at), contract_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _to_schema(record: ContractRecord) -> SmartContract:
+    return SmartContract.model_validate(record, from_attributes=True)
+
+
+class ContractStore:
+    """CRUD and indexed listing for smart contracts"""
+
+    def __init__(self):
+        Base.metadata.create_all(engine)
+        platform_stats.seed(self._initial_counters)
+
+    def create(self, contract: SmartContract) -> SmartContract:
+        record = ContractRecord(**contract.model_dump(exclude={"language", "network"}))
+        record.language = contract.language.value
+        record.network = contract.network.value if contract.network else None
+
+        with SessionLocal.begin() as session:
+            session.add(record)
+            apply_counter_deltas(session, {
+                "contracts_total": 1,
+                "contracts_compiled": int(contract.compiled),
+                "contracts_deployed": int(contract.deployed),
+            })
+        return contract
+
+    def get(self, contract_id: str) -> Optional[SmartContract]:
+        with SessionLocal() as session:
+            record = session.get(ContractRecord, contract_id)
+            return _to_schema(record) if record else None
+
+    def list(
+        self,
+        author: Optional[str] = None,
+        deployed: Optional[bool] = None,
+        compiled: Optional[bool] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[SmartContract], Optional[str]]:
+        """Newest-updated first; returns the page and the cursor for the next one"""
+        query = select(ContractRecord)
+
+        if author:
+            query = query.where(ContractRecord.author == author)
+        if deployed is not None:
+            query = query.where(ContractRecord.deployed == deployed)
+        if compiled is not None:
+            query = query.where(ContractRecord.compiled == compiled)
+
+        if cursor:
+            updated_at, contract_id = decode_cursor(cursor)
+            # Row-value comparison lets the (..., updated_at, id) indexes seek directly
+            query = query.where(
+                tuple_(ContractRecord.updated_at, ContractRecord.id) < tuple_(updated_at, contract_id)
+            )
+
+        query = query.order_by(ContractRecord.updated_at.desc(), ContractRecord.id.desc()).limit(limit + 1)
+
+        with SessionLocal() as session:
+            records = session.scalars(query).all()
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor(records[-1].updated_at, records[-1].id)
+
+        return [_to_schema(r) for r in records], next_cursor
+
+    def update(
+        self,
+        contract_id: str,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        code: Optional[str] = None
+    ) -> Optional[SmartContract]:
+        with SessionLocal.begin() as session:
+            record = session.get(ContractRecord, contract_id)
+            if record is None:
+                return None
+
+            if name is not None:
+                record.name = name
+
+            if description is not None:
+                record.description = description
+
+            if code is not None:
+                if record.compiled:
+                    apply_counter_deltas(session, {"contracts_compiled": -1})
+                record.code = code
+                record.compiled = False  # Reset compiled status
+
+            record.updated_at = datetime.now()
+            return _to_schema(record)
+
+    def delete(self, contract_id: str) -> Optional[SmartContract]:
+        with SessionLocal.begin() as session:
+            record = session.get(ContractRecord, contract_id)
+            if record is None:
+                return None
+            contract = _to_schema(record)
+            session.delete(record)
+            apply_counter_deltas(session, {
+                "contracts_total": -1,
+                "contracts_compiled": -int(record.compiled),
+                "contracts_deployed": -int(record.deployed),
+            })
+            return contract
+
+    def mark_deployed(self, contract_id: str, address: str, network: NetworkType) -> Optional[SmartContract]:
+        """Record a confirmed deployment (the contract may not be stored)"""
+        with SessionLocal.begin() as session:
+            apply_counter_deltas(session, {"deployments_total": 1})
+
+            record = session.get(ContractRecord, contract_id)
+            if record is None:
+                return None
+
+            if not record.deployed:
+                apply_counter_deltas(session, {"contracts_deployed": 1})
+            record.deployed = True
+            record.deployment_address = address
+            record.network = network.value
+            record.updated_at = datetime.now()
+            return _to_schema(record)
+
+    def _initial_counters(self) -> dict:
+        """Full count, used once to seed counters for a pre-existing table"""
+        with SessionLocal() as session:
+            return {
+                "contracts_total": session.scalar(
+                    select(func.count()).select_from(ContractRecord)),
+                "contracts_deployed": session.scalar(
+                    select(func.count()).where(ContractRecord.deployed.is_(True))),
+                "contracts_compiled": session.scalar(
+                    select(func.count()).where(ContractRecord.compiled.is_(True))),
+            }
+
+
+# Create global instance
+contract_store = ContractStore()
@@ -0,0 +1,426 @@
+"""
+Per-method execution cost profiler
+Builds the contract into a profiling harness (every call reports the contract
+basic blocks it executed, plus retired instructions where the host has the
+counters), grows the contract state by repeating each mutating PUBLIC method
+with fresh identities, and calls every PUBLIC method on a fresh copy of the
+state at each of PROFILE_STATE_SIZES. Wall time is the probe's round trip to
+the harness minus an empty one; the growth order of each method's cost is
+fitted on the block counts, which are deterministic.
+
+Every probe replays setup and growth from zeroed state, so the calls a profile
+makes grow with sizes x methods x growers; PROFILE_MAX_CALLS bounds them.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.models.schemas import CostSample, MethodCost, ProfileReport, TestScenario
+from app.services.compiler import compiler_service
+from app.services.single_flight import SingleFlight
+from app.services.test_runner import (
+    Encoder,
+    HarnessBuildError,
+    HarnessCrash,
+    HarnessMethod,
+    HarnessProcess,
+    contract_struct,
+    harness_glue,
+)
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+OWNER = "alice"
+SETUP_ATTEMPTS = 3  # argument guesses per method: ints 1, then 0, then 1000
+# (name, f(n)) from simplest to steepest; a model must fit clearly better to win
+GROWTH_MODELS = [
+    ("O(1)", lambda n: 0.0),
+    ("O(log n)", lambda n: math.log2(n + 1)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n + 1)),
+    ("O(n^2)", lambda n: float(n * n)),
+]
+GROWTH_RANK = {name: rank for rank, (name, _) in enumerate(GROWTH_MODELS)}
+COMPLEXITY = {"O(1)": "low", "O(log n)": "low", "O(n)": "medium", "O(n log n)": "high", "O(n^2)": "high"}
+
+
+class ProfileTooLarge(ValueError):
+    """The requested state sizes would replay more than PROFILE_MAX_CALLS contract calls"""
+
+
+def fit_growth(points: List[Tuple[int, int]]) -> Tuple[str, float]:
+    """Growth order and slope of cost ~ a + b * f(n), by least squares over the candidate models"""
+    xs = [x for x, _ in points]
+    ys = [float(y) for _, y in points]
+    if len(set(xs)) < 2 or max(ys) - min(ys) <= max(0.05 * max(ys), 2.0):
+        return "O(1)", 0.0
+
+    fits = []
+    for name, f in GROWTH_MODELS:
+        fx = [f(x) for x in xs]
+        mean_f, mean_y = sum(fx) / len(fx), sum(ys) / len(ys)
+        var_f = sum((v - mean_f) ** 2 for v in fx)
+        slope = sum((v - mean_f) * (y - mean_y) for v, y in zip(fx, ys)) / var_f if var_f else 0.0
+        slope = max(slope, 0.0)
+        intercept = mean_y - slope * mean_f
+        sse = sum((intercept + slope * v - y) ** 2 for v, y in zip(fx, ys))
+        fits.append((name, slope, sse))
+
+    best = min(sse for _, _, sse in fits)
+    tolerance = best * 1.25 + 1e-9 * sum(y * y for y in ys)
+    for name, slope, sse in fits:
+        if sse <= tolerance:
+            return name, slope
+    return fits[-1][0], fits[-1][1]
+
+
+class _Run:
+    """One harness sequence and the per-call results parsed from its output"""
+
+    def __init__(self):
+        self.calls: List[Dict] = []
+        self.tags: List[Optional[Tuple]] = []  # what each call measures, None for plain setup
+        self.costs: List[Optional[CostSample]] = []
+        self.reverted: List[bool] = []
+
+    def add(self, call: Dict, tag: Optional[Tuple] = None):
+        self.calls.append(call)
+        self.tags.append(tag)
+
+    def is_probe(self, k: int) -> bool:
+        return self.tags[k] is not None and self.tags[k][0] == "probe"
+
+    def parse(self, output: List[str], timings: Dict[int, int]):
+        cost = None
+        for line in output:
+            if line.startswith("P "):
+                _, blocks, instructions = line.split(" ")
+                cost = (int(blocks), None if instructions == "-" else int(instructions))
+            elif line[0] in "RX":
+                reverted = line[0] == "X"
+                self.costs.append(CostSample(
+                    state_size=0, blocks=cost[0], instructions=cost[1],
+                    nanoseconds=timings.get(len(self.costs)), reverted=reverted
+                ) if cost else None)
+                self.reverted.append(reverted)
+                cost = None
+
+
+class CostProfiler:
+    """Profiles contracts on up to `workers` harness processes; reports are cached by source"""
+
+    def __init__(self, workers: int, timeout: float, state_sizes: str, max_entries: int, max_calls: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.state_sizes = sorted({int(s) for s in state_sizes.split(",") if s.strip()})
+        self.max_entries = max_entries
+        self.max_calls = max_calls
+        self.flights = SingleFlight()
+        self.profiles = 0
+        self.hits = 0
+        self.misses = 0
+        self._reports: "OrderedDict[str, ProfileReport]" = OrderedDict()
+        self._slots = asyncio.Semaphore(self.workers)
+
+    async def profile(self, code: str, state_sizes: Optional[List[int]] = None) -> ProfileReport:
+        """
+        Cost report for the contract; raises HarnessBuildError if it does not
+        build and ProfileTooLarge if the sizes exceed the call budget
+        """
+        sizes = sorted(set(state_sizes or self.state_sizes))
+        self.check_budget(code, sizes)
+        key = self._key(code, sizes)
+        cached = self._reports.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._reports.move_to_end(key)
+            return cached.model_copy(update={"cache_hit": True})
+        self.misses += 1
+
+        report = await self.flights.do(key, lambda: self._profile(code, sizes))
+        self._reports[key] = report
+        while len(self._reports) > self.max_entries:
+            self._reports.popitem(last=False)
+        return report
+
+    def cached(self, code: str, state_sizes: Optional[List[int]] = None) -> Optional[ProfileReport]:
+        """The cached report for the contract, without profiling it"""
+        report = self._reports.get(self._key(code, sorted(set(state_sizes or self.state_sizes))))
+        return report.model_copy(update={"cache_hit": True}) if report is not None else None
+
+    def planned_calls(self, code: str, state_sizes: Optional[List[int]] = None) -> int:
+        """Upper bound on the contract calls profiling the contract at these sizes replays"""
+        sizes = sorted(set(state_sizes or self.state_sizes))
+        _, methods, _ = contract_struct(code)
+        setup = len(methods)  # at most one successful setup call per method
+        growers = sum(1 for hm in methods if not hm.method.is_const)
+        growth = 2 * growers * len(methods) * sum(setup + size + 1 for size in sizes)
+        return SETUP_ATTEMPTS * 2 * setup + growth + len(methods) * (setup + 1)
+
+    def check_budget(self, code: str, state_sizes: Optional[List[int]] = None):
+        """Raise ProfileTooLarge when profiling at these sizes would exceed max_calls"""
+        calls = self.planned_calls(code, state_sizes)
+        if calls > self.max_calls:
+            raise ProfileTooLarge(
+                f"Profiling these state sizes would replay up to {calls} calls "
+                f"(max {self.max_calls}); use fewer or smaller state_sizes"
+            )
+
+    @staticmethod
+    def _key(code: str, sizes: List[int]) -> str:
+        return hashlib.sha256(f"{sizes}\0{code}".encode("utf-8")).hexdigest()
+
+    async def _profile(self, code: str, sizes: List[int]) -> ProfileReport:
+        start = time.perf_counter()
+        contract, methods, _ = await asyncio.to_thread(contract_struct, code)
+        if not methods:
+            raise HarnessBuildError("No PUBLIC methods with harness-compatible signatures to profile")
+        build, executable = await compiler_service.build_harness(code + harness_glue(contract, methods), "profile")
+        if executable is None:
+            raise HarnessBuildError(build.message, build)
+
+        encoder = Encoder(methods)
+        fresh = iter(f"profile-{n}" for n in range(10 ** 9))
+        setup, probe_args, working = await self._setup(encoder, executable, methods)
+
+        # One run per (mutating method, identity mode) that grows the state
+        plans = [
+            (grower, fresh_invocator)
+            for grower in methods
+            if not grower.method.is_const and grower.index in working
+            for fresh_invocator in (True, False)
+        ]
+        runs = await asyncio.gather(*(
+            self._grow(encoder, executable, methods, setup, probe_args, grower, fresh_invocator, sizes, fresh)
+            for grower, fresh_invocator in plans
+        ))
+
+        results = []
+        for hm in methods:
+            best = None
+            for (grower, _), samples in zip(plans, runs):
+                points = [s for s in samples.get(hm.index, []) if s is not None and not s.reverted]
+                if len({s.state_size for s in points}) < 2:
+                    continue
+                growth, slope = fit_growth([(s.state_size, s.blocks) for s in points])
+                rank = (GROWTH_RANK[growth], points[-1].blocks)
+                if best is None or rank > best[0]:
+                    best = (rank, growth, slope, grower, points)
+            if best is None:
+                baseline = [s for s in (await self._baseline(encoder, executable, setup, probe_args, hm)) if s]
+                probed = {s.state_size for samples in runs for s in samples.get(hm.index, []) if s is not None}
+                results.append(MethodCost(
+                    method=hm.method.name, line=hm.method.line, growth=None,
+                    unmeasured_reason=("every probe reverted as the state grew" if len(probed) > 1
+                                       else "no mutating method grew the state"),
+                    samples=baseline
+                ))
+                continue
+            _, growth, slope, grower, points = best
+            results.append(MethodCost(
+                method=hm.method.name,
+                line=hm.method.line,
+                growth=growth,
+                state_driver=grower.method.name if growth != "O(1)" else None,
+                blocks_per_unit=round(slope, 3),
+                samples=points
+            ))
+
+        self.profiles += 1
+        measured = [r for r in results if r.growth is not None]
+        unmeasured = [r for r in results if r.growth is None]
+        worst = max((r.growth for r in measured), key=GROWTH_RANK.__getitem__, default=None)
+        hot = [r.method for r in measured if GROWTH_RANK[r.growth] >= GROWTH_RANK["O(n)"]]
+        if hot:
+            message = f"Cost grows with state in {', '.join(hot)}"
+        elif measured and not unmeasured:
+            message = "✅ Every method runs in constant time as state grows"
+        elif measured:
+            verb = "runs" if len(measured) == 1 else "run"
+            message = f"{', '.join(r.method for r in measured)} {verb} in constant time as state grows"
+        else:
+            message = "No method could be measured"
+        if unmeasured:
+            message += "; not measured: " + ", ".join(f"{r.method} ({r.unmeasured_reason})" for r in unmeasured)
+        return ProfileReport(
+            success=True,
+            message=message,
+            complexity=COMPLEXITY[worst] if worst else None,
+            worst_growth=worst,
+            max_blocks=max((s.blocks for r in results for s in r.samples), default=0),
+            methods=results,
+            state_sizes=sizes,
+            duration=time.perf_counter() - start,
+            cache_hit=build.cache_hit
+        )
+
+    async def _setup(self, encoder: Encoder, executable,
+                     methods: List[HarnessMethod]) -> Tuple[List[Dict], Dict[int, List], Dict[int, List]]:
+        """
+        Calls that bring the contract into a working state (each method once,
+        guessing arguments until it stops reverting), the arguments to probe
+        each method with, and the subset of those that did not revert
+        """
+        setup: List[Dict] = []
+        probe_args: Dict[int, List] = {}
+        deepest: Dict[int, Tuple[int, List]] = {}  # reverting methods: attempt that ran longest
+        for attempt in range(SETUP_ATTEMPTS):
+            pending = [hm for hm in methods if hm.index not in probe_args]
+            if not pending:
+                break
+            run = _Run()
+            for call in setup:
+                run.add(call)
+            for hm in pending:
+                run.add(self._call(hm, self._guess(hm, attempt), OWNER), ("setup", hm.index))
+            await self._execute(encoder, executable, [run])
+            for k in range(len(setup), len(run.costs)):
+                hm = methods[run.tags[k][1]]
+                args = run.calls[k]["args"]
+                if not run.reverted[k]:
+                    probe_args[hm.index] = args
+                    setup.append(run.calls[k])
+                elif run.costs[k] and run.costs[k].blocks > deepest.get(hm.index, (-1, None))[0]:
+                    deepest[hm.index] = (run.costs[k].blocks, args)
+        working = dict(probe_args)
+        for hm in methods:
+            if hm.index not in probe_args:
+                probe_args[hm.index] = deepest.get(hm.index, (0, self._guess(hm, 0)))[1]
+        return setup, probe_args, working
+
+    async def _grow(self, encoder: Encoder, executable, methods: List[HarnessMethod], setup: List[Dict],
+                    probe_args: Dict, grower: HarnessMethod, fresh_invocator: bool, sizes: List[int],
+                    fresh) -> Dict[int, List[Optional[CostSample]]]:
+        """
+        Probe every method after each size step of repeated grower calls;
+        each probe replays the steps from zeroed state, so a probe that
+        resets or consumes state cannot skew the ones after it
+        """
+        grows = [
+            self._call(grower, self._fresh_ids(grower, probe_args[grower.index], fresh),
+                       next(fresh) if fresh_invocator else OWNER)
+            for _ in range(sizes[-1])
+        ]
+        runs = []
+        for size in sizes:
+            for hm in methods:
+                run = _Run()
+                for call in setup:
+                    run.add(call)
+                for call in grows[:size]:
+                    run.add(call, ("grow",))
+                run.add(self._call(hm, self._fresh_ids(hm, probe_args[hm.index], fresh), next(fresh)),
+                        ("probe", hm.index))
+                runs.append(run)
+        await self._execute(encoder, executable, runs)
+
+        samples: Dict[int, List[Optional[CostSample]]] = {}
+        for run in runs:
+            grown = 0
+            for k, tag in enumerate(run.tags[:len(run.costs)]):
+                if tag == ("grow",):
+                    grown += not run.reverted[k]
+                elif tag is not None and tag[0] == "probe" and run.costs[k] is not None:
+                    samples.setdefault(tag[1], []).append(run.costs[k].model_copy(update={"state_size": grown}))
+        return samples
+
+    async def _baseline(self, encoder: Encoder, executable, setup: List[Dict], probe_args: Dict,
+                        hm: HarnessMethod) -> List[Optional[CostSample]]:
+        """A method's cost right after setup, for methods no growth run could measure"""
+        run = _Run()
+        for call in setup:
+            run.add(call)
+        run.add(self._call(hm, probe_args[hm.index], OWNER), ("probe", hm.index))
+        await self._execute(encoder, executable, [run])
+        return run.costs[len(setup):]
+
+    async def _execute(self, encoder: Encoder, executable, runs: List[_Run]):
+        """
+        Run each sequence from zeroed state on one harness process; on a crash
+        or timeout a run keeps the results of the calls before it. Probes are
+        sent one at a time so their wall time can be taken: the round trip
+        minus that of an empty exchange
+        """
+        async with self._slots:
+            process = HarnessProcess(executable, self.timeout, settings.TEST_MEMORY_LIMIT_MB)
+            try:
+                empty = None
+                for run in runs:
+                    scenario = TestScenario(name="profile", inputs={"calls": run.calls}, expected_outputs={})
+                    lines, _, _ = encoder.encode(scenario, max(len(run.calls), settings.TEST_MAX_CALLS_PER_SCENARIO))
+                    output: List[str] = []
+                    timings: Dict[int, int] = {}
+                    try:
+                        if empty is None:
+                            await process.run(["E"])
+                            empty = min([await self._round_trip(process, ["E"], output) for _ in range(5)])
+                        batch = ["S"]
+                        for k, line in enumerate(lines[1:-1]):  # one "C" line per call, between "S" and "E"
+                            if not run.is_probe(k):
+                                batch.append(line)
+                                continue
+                            output += await process.run(batch + ["E"])
+                            batch = []
+                            timings[k] = max(await self._round_trip(process, [line, "E"], output) - empty, 0)
+                        if batch:
+                            output += await process.run(batch + ["E"])
+                    except HarnessCrash as e:
+                        logger.warning(f"⚠️ Profiling run stopped: {e}")
+                    run.parse(output, timings)
+            finally:
+                await process.close()
+
+    @staticmethod
+    async def _round_trip(process: HarnessProcess, lines: List[str], output: List[str]) -> int:
+        start = time.perf_counter_ns()
+        output += await process.run(lines)
+        return time.perf_counter_ns() - start
+
+    @staticmethod
+    def _guess(hm: HarnessMethod, attempt: int) -> List:
+        args = []
+        for param in hm.params:
+            if param.kind == "int":
+                args.append((1, 0, 1000)[attempt])
+            elif param.kind == "bool":
+                args.append(True)
+            elif param.kind == "id":
+                args.append(OWNER)
+            else:
+                args.append("profile")
+        return args
+
+    @staticmethod
+    def _fresh_ids(hm: HarnessMethod, args: List, fresh) -> List:
+        return [next(fresh) if p.kind == "id" else a for p, a in zip(hm.params, args)]
+
+    @staticmethod
+    def _call(hm: HarnessMethod, args: List, invocator: str) -> Dict:
+        return {"method": hm.method.name, "args": list(args), "invocator": invocator, "block": 1}
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._reports),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "profiles": self.profiles,
+        }
+
+
+# Create global instance
+cost_profiler = CostProfiler(
+    workers=settings.TEST_WORKERS,
+    timeout=settings.PROFILE_RUN_TIMEOUT,
+    state_sizes=settings.PROFILE_STATE_SIZES,
+    max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+    max_calls=settings.PROFILE_MAX_CALLS
+)
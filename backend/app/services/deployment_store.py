@@ -0,0 +1,100 @@
+"""
+Persistent deployment records backed by SQLAlchemy
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from app.models.database import Base, DeploymentRecord, SessionLocal, add_missing_columns, engine
+from app.models.schemas import Deployment, DeploymentStatus, IPOConfig
+
+logger = logging.getLogger(__name__)
+
+
+def _to_schema(record: DeploymentRecord) -> Deployment:
+    return Deployment(
+        id=record.id,
+        contract_id=record.contract_id,
+        network=record.network,
+        address=record.address,
+        transaction_hash=record.transaction_hash,
+        timestamp=record.timestamp,
+        status=record.status,
+        updated_at=record.updated_at,
+        gas_used=record.gas_used,
+        ipo_config=IPOConfig.model_validate_json(record.ipo_config) if record.ipo_config else None,
+        error_message=record.error_message
+    )
+
+
+class DeploymentStore:
+    """Deployment records and their status transitions"""
+
+    def __init__(self):
+        Base.metadata.create_all(engine)
+        # updated_at was added after the first release; older databases lack it
+        add_missing_columns(engine, DeploymentRecord.__table__)
+
+    def create(self, deployment: Deployment) -> Deployment:
+        record = DeploymentRecord(
+            id=deployment.id,
+            contract_id=deployment.contract_id,
+            network=deployment.network.value,
+            address=deployment.address,
+            transaction_hash=deployment.transaction_hash,
+            timestamp=deployment.timestamp,
+            status=deployment.status.value,
+            updated_at=deployment.updated_at,
+            gas_used=deployment.gas_used,
+            ipo_config=deployment.ipo_config.model_dump_json() if deployment.ipo_config else None,
+            error_message=deployment.error_message
+        )
+        with SessionLocal.begin() as session:
+            session.add(record)
+        return deployment
+
+    def get(self, deployment_id: str) -> Optional[Deployment]:
+        with SessionLocal() as session:
+            record = session.get(DeploymentRecord, deployment_id)
+            return _to_schema(record) if record else None
+
+    def list(
+        self,
+        contract_id: Optional[str] = None,
+        network: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Deployment]:
+        """Newest first"""
+        query = select(DeploymentRecord)
+        if contract_id:
+            query = query.where(DeploymentRecord.contract_id == contract_id)
+        if network:
+            query = query.where(DeploymentRecord.network == network)
+        query = query.order_by(DeploymentRecord.timestamp.desc(), DeploymentRecord.id.desc()).limit(limit)
+
+        with SessionLocal() as session:
+            return [_to_schema(r) for r in session.scalars(query).all()]
+
+    def set_status(
+        self,
+        deployment_id: str,
+        status: DeploymentStatus,
+        error_message: Optional[str] = None
+    ) -> Optional[Deployment]:
+        """Move a deployment to a new status, stamping updated_at; timestamp keeps the submission time"""
+        with SessionLocal.begin() as session:
+            record = session.get(DeploymentRecord, deployment_id)
+            if record is None:
+                return None
+            record.status = status.value
+            record.updated_at = datetime.now()
+            if error_message is not None:
+                record.error_message = error_message
+            return _to_schema(record)
+
+
+# Create global instance
+deployment_store = DeploymentStore()
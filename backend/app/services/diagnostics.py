@@ -0,0 +1,286 @@
+"""
+Debug diagnostics (both off by default)
+- LoopBlockDetector: a watchdog thread that reports any callback holding the
+  event loop longer than a threshold, with the stack it was stuck in
+- RequestProfiler: samples the event-loop thread while a flagged request
+  runs and keeps the stacks that belong to that request
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter as Tally, OrderedDict, deque
+from typing import Dict, List, Optional
+
+from app.services.metrics import metrics
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+event_loop_blocks = metrics.counter(
+    "event_loop_blocks_total",
+    "Times a callback held the event loop longer than LOOP_BLOCK_THRESHOLD"
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+
+class LoopBlockDetector:
+    """
+    Watchdog for synchronous work inside async code
+
+    A heartbeat task stamps the time every few milliseconds. A background
+    thread checks the stamp; when it goes stale for longer than the threshold
+    the loop is blocked, and the thread captures the loop thread's stack while
+    the offending code is still on it. The heartbeat records how long the
+    block lasted once the loop runs again.
+    """
+
+    def __init__(self, threshold: float, history: int = 50):
+        self.threshold = threshold
+        self.blocks = 0
+        self.longest = 0.0
+        self.recent: deque = deque(maxlen=history)
+        self._beat = 0.0
+        self._pending: Optional[Dict] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"🐞 Event-loop block detector on (threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self._heartbeat = None
+
+    async def _tick(self):
+        interval = self.threshold / 4
+        while True:
+            before = time.monotonic()
+            self._beat = before
+            await asyncio.sleep(interval)
+            pending = self._pending
+            if pending is not None:
+                self._pending = None
+                self._finish(pending, time.monotonic() - before - interval)
+
+    def _watch(self):
+        interval = self.threshold / 4
+        while not self._stop.wait(interval):
+            stale = time.monotonic() - self._beat
+            if stale <= self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._pending = {
+                "detected_at": time.time(),
+                "stack": "".join(traceback.format_stack(frame)),
+                "where": _frame_label(frame),
+            }
+
+    def _finish(self, block: Dict, duration: float):
+        block["duration"] = round(max(duration, self.threshold), 4)
+        self.blocks += 1
+        self.longest = max(self.longest, block["duration"])
+        self.recent.append(block)
+        event_loop_blocks.inc()
+        logger.warning(
+            f"🐢 Event loop blocked for {block['duration'] * 1000:.0f}ms in {block['where']}\n{block['stack']}"
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.running,
+            "threshold": self.threshold,
+            "blocks": self.blocks,
+            "longest": round(self.longest, 4),
+        }
+
+
+class Profile:
+    """Samples collected for one request"""
+
+    def __init__(self, method: str, path: str, anchor):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.anchor = anchor  # the request's own frame; samples must pass through it
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.samples = 0  # ticks taken while the request was in flight
+        self.stacks: Tally = Tally()
+        self.done = False
+
+    def report(self, interval: float) -> Dict:
+        on_loop = sum(self.stacks.values())
+        own: Tally = Tally()
+        inclusive: Tally = Tally()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+
+        def top(tally: Tally) -> List[Dict]:
+            return [
+                {"frame": frame, "samples": count, "share": round(count / on_loop, 4)}
+                for frame, count in tally.most_common(25)
+            ]
+
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration": round(self.duration, 4),
+            "sample_interval": interval,
+            "samples": self.samples,
+            # Samples where this request was the one running on the loop; the
+            # rest of its time was spent awaiting I/O, timers or thread pools
+            "on_loop_samples": on_loop,
+            "on_loop_share": round(on_loop / self.samples, 4) if self.samples else 0.0,
+            "self": top(own),
+            "inclusive": top(inclusive),
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()),
+        }
+
+
+class RequestProfiler:
+    """
+    Sampling profiler for individual requests
+
+    One sampler thread runs while at least one flagged request is in flight.
+    Each tick it reads the event-loop thread's stack and credits it to every
+    active request whose frame is on that stack, so concurrent requests do
+    not pollute each other's profiles. Collapsed stacks can be fed straight
+    to flamegraph tools.
+    """
+
+    def __init__(self, interval: float, history: int):
+        self.interval = interval
+        self.history = history
+        self.profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._active: Dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._loop_thread: Optional[int] = None
+
+    def begin(self, method: str, path: str, anchor) -> Profile:
+        profile = Profile(method, path, anchor)
+        with self._lock:
+            self._loop_thread = threading.get_ident()
+            self._active[profile.id] = profile
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+                self._sampler.start()
+        return profile
+
+    def end(self, profile: Profile):
+        profile.duration = time.perf_counter() - profile.started
+        profile.done = True
+        profile.anchor = None
+        with self._lock:
+            self._active.pop(profile.id, None)
+            self.profiles[profile.id] = profile
+            while len(self.profiles) > self.history:
+                self.profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        profile = self.profiles.get(profile_id)
+        return profile.report(self.interval) if profile else None
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                active = list(self._active.values())
+            frame = sys._current_frames().get(self._loop_thread)
+            for profile in active:
+                profile.samples += 1
+                stack = self._stack_below(frame, profile.anchor)
+                if stack:
+                    profile.stacks[stack] += 1
+
+    @staticmethod
+    def _stack_below(frame, anchor) -> Optional[str]:
+        """Root-to-leaf frames under anchor, or None if anchor is not on the stack"""
+        frames = []
+        while frame is not None:
+            if frame is anchor:
+                return ";".join(reversed(frames)) or _frame_label(anchor)
+            frames.append(_frame_label(frame))
+            frame = frame.f_back
+        return None
+
+
+class ProfilingMiddleware:
+    """Profiles requests sent with an X-Profile: 1 header or ?profile=1"""
+
+    def __init__(self, app, profiler: "RequestProfiler"):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = self.profiler.begin(scope["method"], scope["path"], sys._getframe())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-profile-id", profile.id.encode()),
+                    (b"x-profile-url", f"/debug/profiles/{profile.id}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler.end(profile)
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile" and value in (b"1", b"true"):
+                return True
+        query = scope.get("query_string", b"")
+        return b"profile=1" in query.split(b"&") or b"profile=true" in query.split(b"&")
+
+
+# Create global instances
+loop_block_detector = LoopBlockDetector(threshold=settings.LOOP_BLOCK_THRESHOLD)
+request_profiler = RequestProfiler(
+    interval=settings.PROFILE_SAMPLE_INTERVAL,
+    history=settings.PROFILE_HISTORY
+)
@@ -0,0 +1,424 @@
+"""
+Coverage-guided contract fuzzer
+Builds the contract into a sanitized, coverage-instrumented harness
+(compiler_service.build_harness(variant="fuzz")), with subscripts of its
+member arrays bounds-checked (test_runner.bounds_checked), and drives its PUBLIC methods with
+generated call sequences for a time budget, one harness process per worker.
+Sequences that reach new coverage join the corpus and are mutated further;
+sequences that crash or hang the harness are trimmed and reported as Issues at
+the faulting source line, with a reproducer in the TestScenario inputs format
+that /api/test replays.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.models.schemas import FuzzCrash, FuzzReport, Issue, IssueSeverity, TestScenario
+from app.services.compiler import compiler_service
+from app.services.test_runner import (
+    Encoder,
+    HarnessBuildError,
+    HarnessCrash,
+    HarnessMethod,
+    HarnessProcess,
+    ScenarioError,
+    ValueType,
+    bounds_checked,
+    contract_struct,
+    describe_crash,
+    harness_glue,
+)
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDENTITIES = ["alice", "bob", "carol", "dave", "eve"]
+INTERESTING = [
+    0, 1, 2, 3, 7, 8, 15, 16, 31, 32, 63, 64, 100, 127, 128, 255, 256, 1000, 1023, 1024,
+    4095, 4096, 32767, 32768, 65535, 65536, 10 ** 6, 10 ** 9, 2 ** 31 - 1, 2 ** 31, 2 ** 32 - 1, 2 ** 32,
+    2 ** 53, 2 ** 63 - 1, 2 ** 63, 2 ** 64 - 1, -1, -2, -128, -129, -32768, -2 ** 31, -2 ** 63,
+]
+STRING_LENGTHS = [0, 1, 7, 8, 31, 32, 33, 255, 256, 257, 1024]
+REPEATS = [10, 100, 1000, 1001, 2000, 10001]
+BLOCK_STEPS = [0, 1, 1, 1, 2, 10, 100, 1000, 10 ** 6]
+MAX_CORPUS = 512
+MINIMIZE_RUNS = 64
+MINIMIZE_SHARE = 0.25  # of the time budget, on top of it, spent shortening reproducers
+_INTEGER_LITERAL = re.compile(r"\b(?:0[xX][0-9a-fA-F]+|\d+)\b")
+
+# check (or "signal" / "hang") -> severity, category, fix
+CLASSIFICATION: Dict[str, Tuple[IssueSeverity, str, str]] = {
+    "out_of_bounds": (IssueSeverity.CRITICAL, "Memory Safety",
+                      "Check the index against the array size with require() before using it"),
+    "null_access": (IssueSeverity.CRITICAL, "Memory Safety", "Check pointers for null before dereferencing"),
+    "misaligned_access": (IssueSeverity.CRITICAL, "Memory Safety", "Do not reinterpret byte buffers as wider types"),
+    "pointer_overflow": (IssueSeverity.CRITICAL, "Memory Safety",
+                         "Bound offsets before doing pointer arithmetic with them"),
+    "signal": (IssueSeverity.CRITICAL, "Memory Safety",
+               "Validate indices, lengths and pointers derived from call arguments"),
+    "add_overflow": (IssueSeverity.HIGH, "Arithmetic", "Check operands before adding, or use unsigned types"),
+    "sub_overflow": (IssueSeverity.HIGH, "Arithmetic", "Check operands before subtracting"),
+    "mul_overflow": (IssueSeverity.HIGH, "Arithmetic", "Check operands before multiplying"),
+    "negate_overflow": (IssueSeverity.HIGH, "Arithmetic", "Reject the minimum value before negating"),
+    "divrem_overflow": (IssueSeverity.HIGH, "Arithmetic", "require() a non-zero divisor (and not INT_MIN / -1)"),
+    "shift_out_of_bounds": (IssueSeverity.HIGH, "Arithmetic", "Bound shift amounts by the operand's width"),
+    "hang": (IssueSeverity.MEDIUM, "Denial of Service",
+             "Bound loops by a constant, or keep per-call work independent of stored state size"),
+}
+UNDEFINED_BEHAVIOR = (IssueSeverity.HIGH, "Undefined Behavior", "Remove the undefined behaviour at this line")
+
+
+def contract_constants(code: str) -> List[int]:
+    """Integer literals in the source and their neighbours (array sizes, limits)"""
+    values: Set[int] = set()
+    for literal in _INTEGER_LITERAL.findall(code):
+        value = int(literal, 0)
+        if value < 2 ** 64:
+            values.update((value - 1, value, value + 1))
+    return sorted(values)
+
+
+class Generator:
+    """Random calls, call sequences and mutations of them for one contract"""
+
+    def __init__(self, methods: List[HarnessMethod], constants: List[int], rng: random.Random, max_calls: int,
+                 table_sizes: Sequence[int] = ()):
+        self.methods = methods
+        self.constants = constants
+        # Filling a contract table exactly, and one past it, is where its bounds bugs are
+        self.repeats = sorted(set(REPEATS) | {n + d for n in table_sizes for d in (0, 1)})
+        self.rng = rng
+        self.max_calls = max_calls
+        self.fresh = 0
+        self._ranges: Dict[Tuple[bool, int], List[int]] = {}
+
+    def _fresh_identity(self) -> str:
+        self.fresh += 1
+        return f"fuzz-{self.fresh}"
+
+    def _identity(self) -> str:
+        # Mostly the first identity, so sequences tend to come from one owner/admin
+        return IDENTITIES[0] if self.rng.random() < 0.5 else self.rng.choice(IDENTITIES)
+
+    def _interesting(self, value_type: ValueType) -> List[int]:
+        key = (value_type.signed, value_type.bits)
+        if key not in self._ranges:
+            low = -(1 << (value_type.bits - 1)) if value_type.signed else 0
+            high = (1 << (value_type.bits - 1)) - 1 if value_type.signed else (1 << value_type.bits) - 1
+            candidates = set(INTERESTING) | set(self.constants) | {low, high, low + 1, high - 1}
+            self._ranges[key] = sorted(v for v in candidates if low <= v <= high)
+        return self._ranges[key]
+
+    def value(self, value_type: ValueType) -> Any:
+        rng = self.rng
+        if value_type.kind == "bool":
+            return rng.random() < 0.5
+        if value_type.kind == "id":
+            return self._fresh_identity() if rng.random() < 0.2 else self._identity()
+        if value_type.kind == "str":
+            length = rng.choice(STRING_LENGTHS) if rng.random() < 0.7 else rng.randrange(65)
+            return "".join(rng.choice("abcxyz%\\'\" ") for _ in range(min(length, 16))) + "x" * max(length - 16, 0)
+        interesting = self._interesting(value_type)
+        roll = rng.random()
+        if roll < 0.6:
+            return rng.choice(interesting)
+        if roll < 0.85:
+            return min(rng.randrange(16), interesting[-1])
+        return rng.randint(interesting[0], interesting[-1])
+
+    def call(self, block: int) -> Dict:
+        hm = self.rng.choice(self.methods)
+        return {
+            "method": hm.method.name,
+            "args": [self.value(p) for p in hm.params],
+            "invocator": self._identity(),
+            "reward": 0 if self.rng.random() < 0.8 else self.rng.choice(self._interesting(ValueType("int"))),
+            "block": block,
+        }
+
+    def sequence(self) -> List[Dict]:
+        calls = []
+        block = self.rng.randrange(100)
+        for _ in range(self.rng.randint(1, 8)):
+            block += self.rng.choice(BLOCK_STEPS)
+            calls.append(self.call(block))
+        return calls
+
+    def mutate(self, calls: List[Dict], corpus: List[List[Dict]]) -> List[Dict]:
+        """A mutated copy of calls; one to three stacked mutations"""
+        calls = [dict(c, args=list(c["args"])) for c in calls]
+        for _ in range(self.rng.randint(1, 3)):
+            calls = self._mutate_once(calls, corpus) or calls
+        return calls[:self.max_calls]
+
+    def _mutate_once(self, calls: List[Dict], corpus: List[List[Dict]]) -> Optional[List[Dict]]:
+        rng = self.rng
+        n = rng.randrange(len(calls))
+        call = calls[n]
+        hm = self._method(call)
+        choice = rng.randrange(10)
+        if choice == 0 and hm.params:
+            k = rng.randrange(len(hm.params))
+            call["args"][k] = self.value(hm.params[k])
+        elif choice == 1:
+            inserted = self.call(call["block"])
+            return calls[:n] + [inserted] + calls[n:]
+        elif choice == 2 and len(calls) > 1:
+            return calls[:n] + calls[n + 1:]
+        elif choice == 3:
+            return calls[:n + 1] + [dict(call, args=list(call["args"]))] + calls[n + 1:]
+        elif choice in (4, 9):
+            return self._repeat(calls, n, hm)
+        elif choice == 5 and corpus:
+            other = rng.choice(corpus)
+            return calls[:n + 1] + [dict(c, args=list(c["args"])) for c in other[rng.randrange(len(other)):]]
+        elif choice == 6:
+            call["invocator"] = self._fresh_identity() if rng.random() < 0.3 else self._identity()
+        elif choice == 7:
+            call["reward"] = rng.choice(self._interesting(ValueType("int")))
+        else:
+            step = rng.choice(BLOCK_STEPS)
+            for later in calls[n:]:
+                later["block"] = min(later["block"] + step, 2 ** 64 - 1)
+        return None
+
+    def _repeat(self, calls: List[Dict], n: int, hm: HarnessMethod) -> List[Dict]:
+        """Call n repeated many times, optionally by / towards fresh identities (fills fixed-size tables)"""
+        count = min(self.rng.choice(self.repeats), self.max_calls - len(calls))
+        fresh_invocator = self.rng.random() < 0.5
+        fresh_ids = self.rng.random() < 0.5
+        id_params = [k for k, p in enumerate(hm.params) if p.kind == "id"]
+        repeated = []
+        for _ in range(max(count, 0)):
+            copy = dict(calls[n], args=list(calls[n]["args"]))
+            if fresh_invocator:
+                copy["invocator"] = self._fresh_identity()
+            if fresh_ids:
+                for k in id_params:
+                    copy["args"][k] = self._fresh_identity()
+            repeated.append(copy)
+        return calls[:n + 1] + repeated + calls[n + 1:]
+
+    def _method(self, call: Dict) -> HarnessMethod:
+        return next(
+            hm for hm in self.methods
+            if hm.method.name == call["method"] and len(hm.params) == len(call["args"])
+        )
+
+
+class Fuzzer:
+    """Fuzz jobs share `workers` harness process slots, taken per execution"""
+
+    def __init__(self, workers: int, exec_timeout: float, memory_limit_mb: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.exec_timeout = exec_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.executions = 0
+        self.active_jobs = 0
+        self._slots = asyncio.Semaphore(self.workers)
+
+    async def run(self, code: str, duration: float, seed: Optional[int] = None,
+                  max_calls: Optional[int] = None) -> FuzzReport:
+        """Fuzz the contract for `duration` seconds; raises HarnessBuildError if it does not build"""
+        start = time.perf_counter()
+        contract, methods, _ = contract_struct(code)
+        if not methods:
+            raise HarnessBuildError("No PUBLIC methods with harness-compatible signatures to fuzz")
+        build, executable = await compiler_service.build_harness(
+            bounds_checked(code) + harness_glue(contract, methods), "fuzz"
+        )
+        if executable is None:
+            raise HarnessBuildError(build.message, build)
+
+        rng = random.Random(seed)
+        max_calls = max_calls or settings.FUZZ_MAX_CALLS
+        encoder = Encoder(methods)
+        tables = [n for f in contract.fields for n in f.array_sizes[:1] if n]
+        generator = Generator(methods, contract_constants(code), rng, max_calls, tables)
+        state = _Campaign(encoder, executable, max_calls)
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            process = HarnessProcess(executable, self.exec_timeout, self.memory_limit_mb)
+            try:
+                while time.perf_counter() < deadline:
+                    if not state.corpus or rng.random() < 0.1:
+                        calls = generator.sequence()
+                    else:
+                        calls = generator.mutate(rng.choice(state.corpus), state.corpus)
+                    await self._execute(process, state, calls)
+            finally:
+                await process.close()
+
+        self.active_jobs += 1
+        try:
+            logger.info(f"🐛 Fuzzing {contract.name} ({len(methods)} methods) for {duration:g}s")
+            await asyncio.gather(*(worker() for _ in range(self.workers)))
+            crashes = await self._report_crashes(code, state, methods, duration * MINIMIZE_SHARE)
+        finally:
+            self.active_jobs -= 1
+
+        elapsed = time.perf_counter() - start
+        issues = [crash.issue for crash in crashes]
+        return FuzzReport(
+            success=True,
+            message=f"{len(crashes)} unique crashes in {state.executions} executions" if crashes
+            else f"✅ No crashes in {state.executions} executions",
+            executions=state.executions,
+            execs_per_second=round(state.executions / max(elapsed, 1e-9), 1),
+            coverage=len(state.features),
+            corpus_size=len(state.corpus),
+            crashes=crashes,
+            issues=issues,
+            duration=elapsed,
+            cache_hit=build.cache_hit
+        )
+
+    async def _execute(self, process: HarnessProcess, state: "_Campaign", calls: List[Dict]) -> Optional[HarnessCrash]:
+        """Run one sequence; updates coverage, corpus and crashes. Returns the crash, if any"""
+        try:
+            lines, _, _ = state.encoder.encode(_scenario(calls), state.max_calls)
+        except ScenarioError:
+            return None
+        crash = None
+        async with self._slots:
+            try:
+                await process.run(lines)
+            except HarnessCrash as e:
+                crash = e
+        state.executions += 1
+        self.executions += 1
+        if crash is not None:
+            await state.record(calls, crash)
+            return crash
+        new = set(process.coverage) - state.features
+        if new:
+            state.features |= new
+            if len(state.corpus) < MAX_CORPUS:
+                state.corpus.append(calls)
+        return None
+
+    async def _report_crashes(self, code: str, state: "_Campaign", methods: List[HarnessMethod],
+                              budget: float) -> List[FuzzCrash]:
+        """Minimize each unique crash's reproducer and turn it into a FuzzCrash with an Issue"""
+        source = code.splitlines()
+        deadline = time.perf_counter() + budget
+        crashes = []
+        process = HarnessProcess(state.executable, self.exec_timeout, self.memory_limit_mb)
+        try:
+            for signature, (calls, crash, hits) in state.crashes.items():
+                if crash.report["kind"] != "hang":  # every hang retry would cost exec_timeout
+                    calls = await self._minimize(process, state, signature, calls, deadline)
+                report = crash.report
+                method = calls[-1]["method"]
+                line = report.get("line") or next(
+                    (hm.method.line for hm in methods if hm.method.name == method), 0
+                )
+                kind = report.get("check") or report["kind"]
+                severity, category, fix = CLASSIFICATION.get(kind, UNDEFINED_BEHAVIOR)
+                what = (f"{method}() does not return within {self.exec_timeout:g}s"
+                        if kind == "hang" else describe_crash(report))
+                message = f"{what} — found by fuzzing ({len(calls)}-call reproducer)"
+                snippet = source[line - 1].strip() if 0 < line <= len(source) else None
+                crashes.append(FuzzCrash(
+                    kind=kind,
+                    method=method,
+                    line=line,
+                    column=report.get("column") or 0,
+                    message=message,
+                    hits=hits,
+                    reproducer=_scenario(calls, name=f"fuzz: {kind} in {method}"),
+                    issue=Issue(
+                        severity=severity, category=category, line=line, column=report.get("column") or 0,
+                        message=message, fix=fix, code_snippet=snippet
+                    )
+                ))
+        finally:
+            await process.close()
+        return crashes
+
+    async def _minimize(self, process: HarnessProcess, state: "_Campaign", signature: Tuple,
+                        calls: List[Dict], deadline: float) -> List[Dict]:
+        """Drop chunks of calls while the same crash still reproduces (bounded by MINIMIZE_RUNS and deadline)"""
+        runs = 0
+        chunk = max(len(calls) // 2, 1)
+        while chunk >= 1 and runs < MINIMIZE_RUNS and time.perf_counter() < deadline:
+            start = 0
+            while start < len(calls) - 1 and runs < MINIMIZE_RUNS and time.perf_counter() < deadline:
+                candidate = calls[:start] + calls[start + chunk:]
+                if not candidate or start + chunk >= len(calls):
+                    break
+                runs += 1
+                async with self._slots:
+                    try:
+                        lines, _, _ = state.encoder.encode(_scenario(candidate), state.max_calls)
+                        await process.run(lines)
+                        crash = None
+                    except ScenarioError:
+                        crash = None
+                    except HarnessCrash as e:
+                        crash = e
+                if crash is not None and await state.signature(candidate, crash) == signature:
+                    calls = candidate[:crash.calls + 1]
+                else:
+                    start += chunk
+            chunk //= 2
+        return calls
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "active_jobs": self.active_jobs, "executions": self.executions}
+
+
+class _Campaign:
+    """Mutable state of one fuzz run: corpus, coverage features and unique crashes"""
+
+    def __init__(self, encoder: Encoder, executable, max_calls: int):
+        self.encoder = encoder
+        self.executable = executable
+        self.max_calls = max_calls
+        self.executions = 0
+        self.features: Set[int] = set()
+        self.corpus: List[List[Dict]] = []
+        # signature -> (shortest reproducer, crash, hits)
+        self.crashes: Dict[Tuple, Tuple[List[Dict], HarnessCrash, int]] = {}
+
+    async def record(self, calls: List[Dict], crash: HarnessCrash):
+        """Keep the shortest sequence (trimmed after the crashing call) per unique crash"""
+        calls = calls[:crash.calls + 1]
+        signature = await self.signature(calls, crash)
+        known = self.crashes.get(signature)
+        if known is None:
+            logger.info(f"💥 Fuzzer found: {describe_crash(crash.report)} in {calls[-1]['method']}()")
+            self.crashes[signature] = (calls, crash, 1)
+        elif len(calls) < len(known[0]):
+            self.crashes[signature] = (calls, crash, known[2] + 1)
+        else:
+            self.crashes[signature] = (known[0], known[1], known[2] + 1)
+
+    async def signature(self, calls: List[Dict], crash: HarnessCrash) -> Tuple:
+        """Crashes are the same bug when they fault at the same place"""
+        report = crash.report
+        if report["kind"] == "ub":
+            return ("ub", report["check"], report["line"], report["column"])
+        if report["kind"] == "signal":
+            if "line" not in report:
+                [(_, report["line"])] = await compiler_service.symbolize(self.executable, [report["pc"]])
+            return ("signal", report["signal"], report["line"] or report["pc"])
+        return (report["kind"], report.get("code"), calls[min(crash.calls, len(calls) - 1)]["method"])
+
+
+def _scenario(calls: List[Dict], name: str = "fuzz") -> TestScenario:
+    return TestScenario(name=name, inputs={"calls": calls}, expected_outputs={})
+
+
+# Create global instance
+fuzzer = Fuzzer(
+    workers=settings.FUZZ_WORKERS,
+    exec_timeout=settings.FUZZ_EXEC_TIMEOUT,
+    memory_limit_mb=settings.TEST_MEMORY_LIMIT_MB
+)
@@ -0,0 +1,226 @@
+"""
+Incremental re-audit
+Keeps a snapshot of each contract's last audit and only re-runs method rules
+for methods whose source or surrounding declarations changed. Of those, AI
+review follows the tiered policy: only methods the static rules escalate
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.models.schemas import AuditResponse, Issue, IssueSeverity
+from app.services.ai_service import AUDIT_RECOMMENDATIONS, ai_service
+from app.services.analysis import (
+    AnalysisContext,
+    AnalysisResult,
+    parse,
+    run_file_rules,
+    run_method_rules,
+    score_issues,
+)
+from app.services.audit_pipeline import Snippet, build_snippet, pipeline_metrics, select_escalations
+from app.services.analysis.parser import ContractModel, Method
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AuditSnapshot:
+    source_hash: str
+    context: str
+    methods: Dict[str, List[Issue]]  # method digest -> issues, lines relative to the method
+    result: AuditResponse
+
+
+def declarations_digest(model: ContractModel) -> str:
+    """
+    Hash of everything method rules can see outside a method body:
+    struct nesting, fields with their array bounds, and constants
+    """
+    digest = hashlib.sha256()
+    for struct in model.structs + [model.root]:
+        digest.update(repr((
+            struct.name,
+            struct.parent,
+            sorted(struct.constants.items()),
+            [(f.name, f.type_name, f.dims, f.array_sizes) for f in struct.fields]
+        )).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def method_source(lines: List[str], method: Method) -> str:
+    return "\n".join(lines[method.line - 1:method.end_line])
+
+
+def method_digest(source: str, method: Method, context: str) -> str:
+    header = f"{context}|{method.struct}|{method.access}|{method.is_public}|{method.is_const}\n"
+    return hashlib.sha256((header + source).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _PendingAudit:
+    """An audit between the rule pass and AI review"""
+    context: str
+    issues: List[Issue]
+    methods: Dict[str, List[Issue]]  # reused findings by method digest
+    changed: List[Tuple[Method, str, str]]  # (method, source, digest) to re-analyze
+    reused: int
+    found: Dict[int, List[Issue]]  # rule findings by id(method)
+    snippets: Dict[int, Snippet]  # escalations by id(method)
+
+
+class IncrementalAuditor:
+    """Per-contract incremental audits backed by a bounded LRU of snapshots"""
+
+    def __init__(self, max_contracts: int):
+        self.max_contracts = max_contracts
+        self._snapshots: "OrderedDict[str, AuditSnapshot]" = OrderedDict()
+
+    async def audit(self, contract_id: str, code: str, contract_name: Optional[str] = None) -> AuditResponse:
+        """Audit code, reusing findings for methods unchanged since this contract's last audit"""
+        start_time = time.time()
+        source_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+        snapshot = self._snapshots.get(contract_id)
+        if snapshot is not None:
+            self._snapshots.move_to_end(contract_id)
+            if snapshot.source_hash == source_hash:
+                return snapshot.result.model_copy(update={
+                    "cache_hit": True,
+                    "methods_reanalyzed": 0,
+                    "methods_reused": len(snapshot.methods),
+                    "execution_time": time.time() - start_time
+                })
+
+        pending = await run_in_threadpool(self._analyze, code, snapshot)
+        issues, methods, changed, reused = pending.issues, pending.methods, pending.changed, pending.reused
+        found, snippets = pending.found, pending.snippets
+        reviews = await asyncio.gather(*(self._review(snippet) for snippet in snippets.values()))
+        reviewed = dict(zip(snippets.keys(), reviews))
+
+        for method, source, digest in changed:
+            relative = [i.model_copy(update={"line": i.line - method.line}) for i in found[id(method)]]
+            if id(method) not in reviewed:
+                methods[digest] = relative  # static result is conclusive
+            elif reviewed[id(method)] is not None:
+                snippet = snippets[id(method)]
+                relative.extend(
+                    i.model_copy(update={"line": snippet.source_line(i.line) - method.line})
+                    for i in reviewed[id(method)]
+                )
+                methods[digest] = relative
+            issues.extend(self._place(relative, method))
+
+        issues.sort(key=lambda i: (i.line, i.column))
+        score = score_issues(issues)
+
+        result = AuditResponse(
+            success=True,
+            score=score,
+            issues=issues,
+            summary=f"Incremental audit complete. Re-analyzed {len(changed)} of {len(changed) + reused} methods. "
+                   f"Overall security score: {score}/100. "
+                   f"Found {len(issues)} potential issues. "
+                   f"Contract {'PASSED' if score >= 80 else 'FAILED'} audit.",
+            recommendations=list(AUDIT_RECOMMENDATIONS),
+            execution_time=time.time() - start_time,
+            passed=score >= 80,
+            methods_reanalyzed=len(changed),
+            methods_reused=reused
+        )
+
+        self._store(contract_id, AuditSnapshot(source_hash, pending.context, methods, result))
+        logger.info(
+            f"🧩 Incremental audit of {contract_name or contract_id}: "
+            f"{len(changed)} methods re-analyzed, {reused} reused"
+        )
+        return result
+
+    def _analyze(self, code: str, snapshot: Optional[AuditSnapshot]) -> _PendingAudit:
+        """
+        Parse and rule pass, run in the threadpool: findings reused from the
+        snapshot, rule findings for changed methods, and the escalations
+        """
+        model = parse(code)
+        lines = code.splitlines()
+        ctx = AnalysisContext(model=model, lines=lines)
+        context = declarations_digest(model)
+        previous = snapshot.methods if snapshot is not None and snapshot.context == context else {}
+
+        issues = run_file_rules(ctx)
+        methods: Dict[str, List[Issue]] = {}
+        changed = []
+        reused = 0
+
+        for method in model.iter_methods():
+            if not method.has_body:
+                continue
+            source = method_source(lines, method)
+            digest = method_digest(source, method, context)
+            cached = previous.get(digest)
+            if cached is not None:
+                methods[digest] = cached
+                issues.extend(self._place(cached, method))
+                reused += 1
+            else:
+                changed.append((method, source, digest))
+
+        found = {id(method): run_method_rules(ctx, method) for method, _, _ in changed}
+        snippets = self._escalations(model, lines, issues, found, [method for method, _, _ in changed])
+        return _PendingAudit(context, issues, methods, changed, reused, found, snippets)
+
+    def forget(self, contract_id: str):
+        self._snapshots.pop(contract_id, None)
+
+    def _place(self, relative: List[Issue], method: Method) -> List[Issue]:
+        """Move method-relative findings to the method's current position"""
+        return [i.model_copy(update={"line": i.line + method.line}) for i in relative]
+
+    def _escalations(self, model: ContractModel, lines: List[str], file_issues: List[Issue],
+                     found: Dict[int, List[Issue]], changed: List[Method]) -> Dict[int, Snippet]:
+        """
+        Changed methods that go to AI review, by id(method): with AUDIT_TIERED
+        only those the static rules cannot vouch for, otherwise all of them
+        """
+        if not changed:
+            return {}
+        analysis = AnalysisResult(model=model, issues=file_issues + [i for f in found.values() for i in f])
+        if not settings.AUDIT_TIERED:
+            return {id(m): build_snippet(analysis, lines, m, "full review") for m in changed}
+        snippets = select_escalations(
+            analysis,
+            lines,
+            min_severity=IssueSeverity(settings.AUDIT_ESCALATE_SEVERITY),
+            max_snippets=settings.AUDIT_ESCALATE_MAX_SNIPPETS,
+            methods=changed
+        )
+        pipeline_metrics.record(
+            sum(m.end_line - m.line + 1 for m in changed), snippets, sum(len(s.line_map) for s in snippets)
+        )
+        return {id(s.method): s for s in snippets}
+
+    async def _review(self, snippet: Snippet) -> Optional[List[Issue]]:
+        """AI review of one method; None on failure so it is retried next time"""
+        try:
+            return await ai_service.review_method(snippet.text)
+        except Exception as e:
+            logger.error(f"Error reviewing method: {e}")
+            return None
+
+    def _store(self, contract_id: str, snapshot: AuditSnapshot):
+        self._snapshots[contract_id] = snapshot
+        self._snapshots.move_to_end(contract_id)
+        while len(self._snapshots) > self.max_contracts:
+            self._snapshots.popitem(last=False)
+
+
+# Create global instance
+incremental_auditor = IncrementalAuditor(max_contracts=settings.INCREMENTAL_AUDIT_MAX_CONTRACTS)
@@ -0,0 +1,145 @@
+"""
+Async job queue for long-running work (compile, deploy)
+Jobs are submitted with an ID and processed by a fixed pool of worker tasks;
+long-running kinds (fuzz) get a lane with their own small pool so they cannot
+hold the workers that compile and deploy jobs need
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.models.schemas import Job, JobStatus
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity (backpressure)"""
+
+
+class JobQueue:
+    """
+    Bounded queues of async jobs drained by pools of worker tasks
+
+    Jobs run on the shared pool unless their kind has a lane in `lanes`
+    (kind -> worker count), which gets its own queue and workers.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        history_limit: int,
+        lanes: Optional[Dict[str, int]] = None
+    ):
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.history_limit = history_limit
+        self.lanes: Dict[str, int] = {"": workers, **(lanes or {})}
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: list[asyncio.Task] = []
+        self._listeners: list[Callable[[Job], Awaitable[None]]] = []
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    async def start(self):
+        """Start the worker tasks (idempotent)"""
+        if self._workers:
+            return
+        for lane, count in self.lanes.items():
+            self._queues[lane] = asyncio.Queue(maxsize=self.max_pending)
+            self._workers.extend(
+                asyncio.create_task(self._worker(lane)) for _ in range(max(count, 1))
+            )
+        lanes = ", ".join(f"{count} for {lane}" for lane, count in self.lanes.items() if lane)
+        logger.info(f"⚙️ Job queue started with {self.worker_count} workers" + (f" (+ {lanes})" if lanes else ""))
+
+    async def stop(self):
+        """Cancel the worker tasks"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = {}
+
+    async def submit(
+        self,
+        kind: str,
+        func: Callable[[], Awaitable[Any]],
+        job_id: Optional[str] = None
+    ) -> Job:
+        """Queue a job and return its record immediately"""
+        await self.start()
+
+        job = Job(
+            id=job_id or str(uuid.uuid4()),
+            kind=kind,
+            status=JobStatus.QUEUED,
+            submitted_at=datetime.now()
+        )
+
+        queue = self._queues[kind if kind in self._queues else ""]
+        try:
+            queue.put_nowait((job, func))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history_limit:
+            self.jobs.popitem(last=False)
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job record by ID"""
+        return self.jobs.get(job_id)
+
+    def add_listener(self, listener: Callable[[Job], Awaitable[None]]):
+        """Call listener with the job record on every status change"""
+        self._listeners.append(listener)
+
+    async def _notify(self, job: Job):
+        for listener in self._listeners:
+            try:
+                await listener(job)
+            except Exception as e:
+                logger.warning(f"⚠️ Job listener failed for {job.id}: {e}")
+
+    async def _worker(self, lane: str):
+        queue = self._queues[lane]
+        while True:
+            job, func = await queue.get()
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now()
+            await self._notify(job)
+            try:
+                job.result = await func()
+                job.status = JobStatus.COMPLETED
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.now()
+                queue.task_done()
+            await self._notify(job)
+
+
+# Create global instance
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_pending=settings.JOB_QUEUE_SIZE,
+    history_limit=settings.JOB_HISTORY_LIMIT,
+    lanes={"fuzz": settings.JOB_FUZZ_WORKERS}
+)
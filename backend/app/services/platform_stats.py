@@ -0,0 +1,100 @@
+"""
+Incrementally maintained platform statistics
+Counters live in the database so every uvicorn worker sees the same figures
+"""
+
+import logging
+from typing import Callable, Dict
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import CounterRecord, SessionLocal
+from app.models.schemas import AuditResponse, IssueSeverity
+
+logger = logging.getLogger(__name__)
+
+CONTRACT_COUNTERS = [
+    "contracts_total",
+    "contracts_deployed",
+    "contracts_compiled",
+    "deployments_total",
+]
+
+AUDIT_COUNTERS = [
+    "audits_total",
+    "audit_score_sum",
+    "audits_passed",
+    "audits_failed",
+    "issues_critical",
+    "issues_high",
+    "issues_medium",
+    "issues_low",
+]
+
+
+def apply_counter_deltas(session: Session, deltas: Dict[str, int]):
+    """Add deltas to counters inside the caller's transaction"""
+    for name, delta in deltas.items():
+        if delta:
+            session.execute(
+                update(CounterRecord)
+                .where(CounterRecord.name == name)
+                .values(value=CounterRecord.value + delta)
+            )
+
+
+class PlatformStats:
+    """O(1) reads of contract, deployment and audit aggregates"""
+
+    def seed(self, initial: Callable[[], Dict[str, int]]):
+        """Create missing counters, starting them at the values from initial()"""
+        try:
+            with SessionLocal.begin() as session:
+                existing = set(session.scalars(select(CounterRecord.name)))
+                missing = [n for n in CONTRACT_COUNTERS + AUDIT_COUNTERS if n not in existing]
+                if not missing:
+                    return
+                values = initial()
+                for name in missing:
+                    session.add(CounterRecord(name=name, value=values.get(name, 0)))
+            logger.info(f"📊 Seeded {len(missing)} platform counters")
+        except IntegrityError:
+            # Another worker seeded them first
+            pass
+
+    def snapshot(self) -> Dict[str, int]:
+        """Current value of every counter"""
+        with SessionLocal() as session:
+            return dict(session.execute(select(CounterRecord.name, CounterRecord.value)).all())
+
+    def record_audit(self, result: AuditResponse):
+        """
+        Fold one audit result into the audit counters; only audits computed
+        for this request count, so audit cache hits and incremental re-audits
+        that re-analyzed nothing (unchanged editor saves) are skipped
+        """
+        if result.cache_hit or result.methods_reanalyzed == 0:
+            return
+        deltas = {
+            "audits_total": 1,
+            "audit_score_sum": result.score,
+            "audits_passed" if result.passed else "audits_failed": 1,
+        }
+        for issue in result.issues:
+            if issue.severity != IssueSeverity.INFO:
+                name = f"issues_{issue.severity.value}"
+                deltas[name] = deltas.get(name, 0) + 1
+
+        with SessionLocal.begin() as session:
+            apply_counter_deltas(session, deltas)
+
+
+def average_score(counters: Dict[str, int]) -> float:
+    audits = counters.get("audits_total", 0)
+    return round(counters.get("audit_score_sum", 0) / audits, 1) if audits else 0.0
+
+
+# Create global instance
+platform_stats = PlatformStats()
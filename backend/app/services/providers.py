@@ -0,0 +1,574 @@
+"""
+AI provider clients and the router in front of them
+Pooled async clients for OpenAI, Anthropic and Hugging Face; the router adds
+per-provider latency/error stats, request hedging, failover and circuit breaking
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from app.services.metrics import provider_request_duration, provider_tokens
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderUnavailableError(RuntimeError):
+    """No configured provider could serve the request"""
+
+
+def pooled_http_client(timeout: float):
+    """Keep-alive connection pool shared by every call to one provider"""
+    import httpx
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=settings.AI_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_POOL_MAX_KEEPALIVE
+        )
+    )
+
+
+def pooled_sdk_client(factory, **kwargs):
+    """
+    Build a long-lived SDK client on our sized connection pool; SDK releases
+    that reject a plain httpx client keep their own (also pooled) default
+    """
+    try:
+        return factory(http_client=pooled_http_client(kwargs["timeout"]), **kwargs)
+    except TypeError:
+        return factory(**kwargs)
+
+
+class AIProvider:
+    """
+    Base class for async LLM providers
+
+    Every call goes through a per-provider semaphore and an overall timeout so
+    a slow upstream can never hold the event loop or starve other requests.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str, max_concurrency: int, timeout: float):
+        self.model = model
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Run a single completion, bounded by the concurrency limit and timeout"""
+        async def _bounded() -> str:
+            async with self._semaphore:
+                return await self._complete(system_prompt, user_prompt, temperature, max_tokens)
+
+        try:
+            return await asyncio.wait_for(_bounded(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{self.name} request timed out after {self.timeout:g}s")
+
+    async def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Stream completion text as the provider produces it, within the same limits"""
+        deadline = time.monotonic() + self.timeout
+        async with self._semaphore:
+            chunks = self._stream(system_prompt, user_prompt, temperature, max_tokens)
+            try:
+                while True:
+                    remaining = max(deadline - time.monotonic(), 0)
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(f"{self.name} stream timed out after {self.timeout:g}s")
+                    if chunk:
+                        yield chunk
+            finally:
+                await chunks.aclose()
+
+    async def aclose(self):
+        """Release pooled connections"""
+
+    def _record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        """Count the token usage a provider reported for a call"""
+        if prompt_tokens:
+            provider_tokens.inc(prompt_tokens, provider=self.name, kind="prompt")
+        if completion_tokens:
+            provider_tokens.inc(completion_tokens, provider=self.name, kind="completion")
+
+    async def _complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        raise NotImplementedError
+
+    async def _stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield  # pragma: no cover - makes this an async generator
+
+
+class OpenAIProvider(AIProvider):
+    """OpenAI chat completions via the async client"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str, base_url: str, max_concurrency: int, timeout: float):
+        super().__init__(model, max_concurrency, timeout)
+        import openai
+        self.client = pooled_sdk_client(
+            openai.AsyncOpenAI,
+            api_key=api_key,
+            base_url=base_url or None,
+            timeout=timeout,
+            max_retries=settings.AI_MAX_RETRIES
+        )
+
+    async def _complete(self, system_prompt, user_prompt, temperature, max_tokens) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        if response.usage is not None:
+            self._record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content.strip()
+
+    async def _stream(self, system_prompt, user_prompt, temperature, max_tokens):
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class AnthropicProvider(AIProvider):
+    """Anthropic messages API via the async client"""
+
+    name = "anthropic"
+
+    def __init__(self, api_key: str, model: str, base_url: str, max_concurrency: int, timeout: float):
+        super().__init__(model, max_concurrency, timeout)
+        import anthropic
+        self.client = pooled_sdk_client(
+            anthropic.AsyncAnthropic,
+            api_key=api_key,
+            base_url=base_url or None,
+            timeout=timeout,
+            max_retries=settings.AI_MAX_RETRIES
+        )
+
+    async def _complete(self, system_prompt, user_prompt, temperature, max_tokens) -> str:
+        response = await self.client.messages.create(
+            model=self.model,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        if response.usage is not None:
+            self._record_usage(response.usage.input_tokens, response.usage.output_tokens)
+        return "".join(block.text for block in response.content if hasattr(block, "text")).strip()
+
+    async def _stream(self, system_prompt, user_prompt, temperature, max_tokens):
+        async with self.client.messages.stream(
+            model=self.model,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            final = await stream.get_final_message()
+            if final.usage is not None:
+                self._record_usage(final.usage.input_tokens, final.usage.output_tokens)
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class HuggingFaceProvider(AIProvider):
+    """Hugging Face Inference API (FREE!) via the async client"""
+
+    name = "huggingface"
+
+    def __init__(self, api_key: str, model: str, base_url: str, max_concurrency: int, timeout: float):
+        # The inference client accepts an endpoint URL wherever it takes a model id
+        super().__init__(base_url or model, max_concurrency, timeout)
+        from huggingface_hub import AsyncInferenceClient
+        self.client = AsyncInferenceClient(token=api_key or None, timeout=timeout)
+
+    async def _complete(self, system_prompt, user_prompt, temperature, max_tokens) -> str:
+        logger.info(f"🤗 Using Hugging Face model: {self.model}")
+        response = await self.client.text_generation(
+            f"{system_prompt}\n\n{user_prompt}",
+            model=self.model,
+            max_new_tokens=max_tokens,
+            temperature=temperature,
+            return_full_text=False
+        )
+        return response.strip()
+
+    async def _stream(self, system_prompt, user_prompt, temperature, max_tokens):
+        stream = await self.client.text_generation(
+            f"{system_prompt}\n\n{user_prompt}",
+            model=self.model,
+            max_new_tokens=max_tokens,
+            temperature=temperature,
+            return_full_text=False,
+            stream=True
+        )
+        async for token in stream:
+            yield token
+
+    async def aclose(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+
+
+PROVIDER_CLASSES = {
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "huggingface": HuggingFaceProvider,
+}
+
+
+def create_provider(provider: str) -> AIProvider:
+    """Build the async provider client for the given provider name"""
+    if provider not in PROVIDER_CLASSES:
+        raise ValueError(f"Unsupported AI provider: {provider}")
+
+    prefix = provider.upper()
+    api_key = getattr(settings, f"{prefix}_API_KEY")
+    base_url = getattr(settings, f"{prefix}_BASE_URL")
+    if not api_key and not base_url:
+        raise ValueError(f"{prefix}_API_KEY not set")
+
+    # AI_MODEL belongs to the primary provider; the others use their own setting
+    model = settings.AI_MODEL if provider == settings.AI_PROVIDER else getattr(settings, f"{prefix}_MODEL")
+
+    return PROVIDER_CLASSES[provider](
+        api_key=api_key or "unused",  # local stub servers do not check keys
+        model=model,
+        base_url=base_url,
+        max_concurrency=settings.AI_MAX_CONCURRENCY,
+        timeout=settings.AI_REQUEST_TIMEOUT
+    )
+
+
+class ProviderStats:
+    """Rolling latency and error figures over the most recent calls"""
+
+    def __init__(self, window: int):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)  # True for failed calls
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, latency: float, failed: bool):
+        self.requests += 1
+        self.outcomes.append(failed)
+        if failed:
+            self.errors += 1
+        else:
+            self.latencies.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self) -> Dict:
+        p50, p99 = self.percentile(0.5), self.percentile(0.99)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(sum(self.outcomes) / len(self.outcomes), 4) if self.outcomes else 0.0,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
+
+
+class CircuitBreaker:
+    """
+    closed -> open after consecutive failures; open -> half_open after the
+    cooldown, letting one trial call through; its outcome closes or reopens
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"⚡ Circuit opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release(self):
+        """A call ended without an outcome (cancelled)"""
+        self._trial_in_flight = False
+
+
+class ProviderRouter:
+    """
+    Routes calls across providers in preference order
+
+    Providers with an open circuit are skipped. A call that fails moves on to
+    the next provider; a call still running after hedge_delay is duplicated to
+    the next provider and the first answer wins.
+    """
+
+    def __init__(
+        self,
+        providers: List[AIProvider],
+        hedge_delay: float,
+        breaker_failures: int,
+        breaker_cooldown: float,
+        stats_window: int
+    ):
+        self.providers = providers
+        self.hedge_delay = hedge_delay
+        self.name = providers[0].name if providers else "none"
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._stats = {p.name: ProviderStats(stats_window) for p in providers}
+        self._breakers = {p.name: CircuitBreaker(breaker_failures, breaker_cooldown) for p in providers}
+
+    async def complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Completion from the first provider to answer successfully"""
+        args = (system_prompt, user_prompt, temperature, max_tokens)
+        tried: Set[str] = set()
+        errors: List[str] = []
+        pending: Dict[asyncio.Task, AIProvider] = {}
+
+        def launch() -> bool:
+            provider = self._next_provider(tried)
+            if provider is None:
+                return False
+            tried.add(provider.name)
+            pending[asyncio.create_task(self._call(provider, args))] = provider
+            return True
+
+        if not launch():
+            raise ProviderUnavailableError("No AI provider available (all circuits open)")
+        first = next(iter(pending.values()))
+        hedge: Optional[AIProvider] = None
+        can_hedge = self.hedge_delay > 0
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    can_hedge = False
+                    if launch():
+                        hedge = list(pending.values())[-1]
+                        self.hedged += 1
+                        logger.info(f"🏇 Hedging slow {first.name} call to {hedge.name}")
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if provider is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    errors.append(f"{provider.name}: {task.exception()}")
+
+                if not pending and launch():
+                    self.failovers += 1
+                    logger.warning(f"↪️ Failing over to {list(pending.values())[-1].name}")
+
+            raise ProviderUnavailableError("All AI providers failed: " + "; ".join(errors))
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Stream from the first provider that starts answering; no switching mid-stream"""
+        tried: Set[str] = set()
+        errors: List[str] = []
+
+        while True:
+            provider = self._next_provider(tried)
+            if provider is None:
+                raise ProviderUnavailableError(
+                    "All AI providers failed: " + "; ".join(errors) if errors
+                    else "No AI provider available (all circuits open)"
+                )
+            if tried:
+                self.failovers += 1
+            tried.add(provider.name)
+
+            start = time.monotonic()
+            started = False
+            try:
+                async for chunk in provider.stream(system_prompt, user_prompt, temperature, max_tokens):
+                    started = True
+                    yield chunk
+            except (GeneratorExit, asyncio.CancelledError):
+                self._breakers[provider.name].release()
+                raise
+            except Exception as e:
+                self._record(provider, time.monotonic() - start, failed=True, mode="stream")
+                if started:
+                    raise
+                errors.append(f"{provider.name}: {e}")
+                continue
+
+            self._record(provider, time.monotonic() - start, failed=False, mode="stream")
+            return
+
+    def stats(self) -> Dict:
+        return {
+            "providers": {
+                p.name: {
+                    "model": p.model,
+                    "circuit": self._breakers[p.name].state,
+                    **self._stats[p.name].snapshot()
+                }
+                for p in self.providers
+            },
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+        }
+
+    async def aclose(self):
+        for provider in self.providers:
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.error(f"Error closing {provider.name} client: {e}")
+
+    def _next_provider(self, tried: Set[str]) -> Optional[AIProvider]:
+        for provider in self.providers:
+            if provider.name not in tried and self._breakers[provider.name].allow():
+                return provider
+        return None
+
+    async def _call(self, provider: AIProvider, args: tuple) -> str:
+        start = time.monotonic()
+        try:
+            result = await provider.complete(*args)
+        except asyncio.CancelledError:
+            self._breakers[provider.name].release()
+            raise
+        except Exception:
+            self._record(provider, time.monotonic() - start, failed=True)
+            raise
+        self._record(provider, time.monotonic() - start, failed=False)
+        return result
+
+    def _record(self, provider: AIProvider, latency: float, failed: bool, mode: str = "complete"):
+        self._stats[provider.name].record(latency, failed)
+        provider_request_duration.observe(
+            latency, provider=provider.name, mode=mode, outcome="error" if failed else "ok"
+        )
+        breaker = self._breakers[provider.name]
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+
+def create_router(primary: str) -> ProviderRouter:
+    """Router over the primary provider followed by AI_FALLBACK_PROVIDERS"""
+    names = [primary] + [n.strip() for n in settings.AI_FALLBACK_PROVIDERS.split(",") if n.strip()]
+
+    providers: List[AIProvider] = []
+    for name in dict.fromkeys(names):
+        try:
+            providers.append(create_provider(name))
+            logger.info(f"✅ {name} async client initialized")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize {name} client: {e}")
+
+    return ProviderRouter(
+        providers,
+        hedge_delay=settings.AI_HEDGE_DELAY,
+        breaker_failures=settings.AI_BREAKER_FAILURES,
+        breaker_cooldown=settings.AI_BREAKER_COOLDOWN,
+        stats_window=settings.AI_STATS_WINDOW
+    )
@@ -0,0 +1,230 @@
+"""
+Topic pub/sub for /ws clients
+Events are published to a broker and delivered to the sockets subscribed to
+the topic on every worker. The in-memory broker stays inside this process;
+the Redis broker fans out across uvicorn workers via Redis pub/sub
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any, Callable, Dict, Optional
+
+from app.services.ws_hub import BroadcastHub, encode, ws_hub
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# "deployments" or "contract:<id>"; ids may contain letters, digits and -_.
+TOPIC_RE = re.compile(r"^[a-z][a-z_]*(:[A-Za-z0-9_.\-]{1,128})?$")
+
+# Free-form client messages that are not addressed to a topic
+MESSAGES_TOPIC = "messages"
+# Clients may publish to MESSAGES_TOPIC and "chat:<room>" only; every other
+# topic (contract:, audit:, deployment:, job:, ...) is published by the server
+CLIENT_TOPIC_PREFIX = "chat:"
+
+Deliver = Callable[[str, str], None]
+
+
+def contract_topic(contract_id: str) -> str:
+    return f"contract:{contract_id}"
+
+
+def audit_topic(contract_id: str) -> str:
+    return f"audit:{contract_id}"
+
+
+def deployment_topic(deployment_id: str) -> str:
+    return f"deployment:{deployment_id}"
+
+
+def job_topic(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def valid_topic(topic: Any) -> bool:
+    return isinstance(topic, str) and TOPIC_RE.match(topic) is not None
+
+
+def client_publishable(topic: Any) -> bool:
+    """Whether a WebSocket client may publish to the topic"""
+    return valid_topic(topic) and (topic == MESSAGES_TOPIC or topic.startswith(CLIENT_TOPIC_PREFIX))
+
+
+class InMemoryBroker:
+    """Delivers published frames straight back to this process"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def stop(self):
+        self.deliver = None
+
+    async def publish(self, topic: str, frame: str):
+        if self.deliver is not None:
+            self.deliver(topic, frame)
+
+    async def subscribe(self, topic: str):
+        pass
+
+    async def unsubscribe(self, topic: str):
+        pass
+
+
+class RedisBroker:
+    """
+    Redis pub/sub broker
+
+    A worker subscribes to a topic's channel only while it has local
+    subscribers, so events for topics nobody on this worker watches never
+    reach it. Published frames come back through Redis, including to the
+    publishing worker, so each socket receives an event exactly once.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "qubic:ws:"):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.deliver: Optional[Deliver] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._channels: set = set()
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def stop(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        try:
+            await self.pubsub.aclose()
+            await self.client.aclose()
+        except Exception as e:
+            logger.warning(f"⚠️ Redis pub/sub shutdown failed: {e}")
+
+    async def publish(self, topic: str, frame: str):
+        try:
+            await self.client.publish(self.prefix + topic, frame)
+        except Exception as e:
+            # Keep same-worker clients informed even when Redis is down
+            logger.warning(f"⚠️ Redis publish failed, delivering locally only: {e}")
+            if self.deliver is not None:
+                self.deliver(topic, frame)
+
+    async def subscribe(self, topic: str):
+        channel = self.prefix + topic
+        self._channels.add(channel)
+        try:
+            await self.pubsub.subscribe(channel)
+        except Exception as e:
+            # The reader keeps retrying and resubscribes once Redis is back
+            logger.warning(f"⚠️ Redis subscribe to {topic} failed: {e}")
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, topic: str):
+        channel = self.prefix + topic
+        self._channels.discard(channel)
+        try:
+            await self.pubsub.unsubscribe(channel)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis unsubscribe from {topic} failed: {e}")
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Redis pub/sub read failed: {e}")
+                await asyncio.sleep(1.0)
+                await self._resubscribe()
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"].decode()
+            data = message["data"]
+            if self.deliver is not None and channel.startswith(self.prefix):
+                self.deliver(channel[len(self.prefix):], data.decode() if isinstance(data, bytes) else data)
+
+    async def _resubscribe(self):
+        if not self._channels:
+            return
+        try:
+            await self.pubsub.subscribe(*self._channels)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis resubscribe failed: {e}")
+
+
+def create_broker(name: str):
+    if name == "redis":
+        try:
+            return RedisBroker(settings.REDIS_URL)
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize Redis pub/sub broker, using in-memory: {e}")
+    elif name != "memory":
+        logger.error(f"❌ Unknown pub/sub broker '{name}', using in-memory")
+    return InMemoryBroker()
+
+
+class PubSub:
+    """Topic subscriptions for hub connections, fanned out through a broker"""
+
+    def __init__(self, hub: BroadcastHub, broker):
+        self.hub = hub
+        self.broker = broker
+        self.published = 0
+        self._pending: set = set()
+        hub.on_topic_empty = self._topic_empty
+
+    async def start(self):
+        await self.broker.start(self.hub.deliver)
+        logger.info(f"📡 WebSocket pub/sub using {self.broker.name} broker")
+
+    async def stop(self):
+        await self.broker.stop()
+
+    async def subscribe(self, websocket, topic: str):
+        if self.hub.subscribe(websocket, topic):
+            await self.broker.subscribe(topic)
+
+    def unsubscribe(self, websocket, topic: str):
+        self.hub.unsubscribe(websocket, topic)
+
+    async def publish(self, topic: str, data: Any, event_type: str = "event"):
+        """Send {"type", "topic", "data"} to every subscriber of topic, on any worker"""
+        self.published += 1
+        frame = encode({"type": event_type, "topic": topic, "data": data})
+        await self.broker.publish(topic, frame)
+
+    def _topic_empty(self, topic: str):
+        task = asyncio.ensure_future(self._release(topic))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _release(self, topic: str):
+        # Someone may have re-subscribed before this ran
+        if topic not in self.hub.subscribers:
+            await self.broker.unsubscribe(topic)
+
+    def stats(self) -> Dict:
+        return {
+            "broker": self.broker.name,
+            "published": self.published,
+            "local_topics": len(self.hub.subscribers),
+        }
+
+
+# Create global instance
+pubsub = PubSub(ws_hub, create_broker(settings.PUBSUB_BROKER))
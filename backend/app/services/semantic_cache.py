@@ -0,0 +1,263 @@
+"""
+Semantic cache for contract generation
+Prompts are embedded offline with a hashed n-gram vectorizer; a bounded
+nearest-neighbour index returns past generations for near-identical requests.
+Numbers and negated words barely move the vector, so they are hard
+constraints instead: only prompts with exactly the same ones are compared.
+An extra feature word barely moves it either ("nft collection with
+royalties" is 0.8 from "nft collection"), so a cached prompt must also
+cover every content word of the lookup.
+"""
+
+import logging
+import math
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about which contract is wanted
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "that", "which",
+    "is", "are", "be", "it", "its", "by", "as", "at", "or", "can", "should", "will",
+    "i", "me", "my", "we", "want", "need", "please", "some", "simple", "basic",
+    "create", "make", "build", "write", "generate", "implement", "new",
+    "contract", "contracts", "smart", "qubic", "c", "cpp", "like", "decentralized",
+    "using", "use", "support", "supports", "allow", "allows",
+}
+
+# Stems folded onto one concept so paraphrases share features; only true
+# synonyms, since a fold makes two different requests look the same
+SYNONYMS = {
+    "expir": "deadlin",
+    "ballot": "vot", "poll": "vot", "election": "vot",
+    "coin": "token", "fungibl": "token", "erc20": "token",
+    "collectibl": "nft", "erc721": "nft",
+    "raffl": "lottery",
+    "stak": "stake",
+}
+
+# Multi-word paraphrases rewritten to one concept before tokenizing
+PHRASES = [
+    (re.compile(r"\btime[\s-]*(?:limit|limited|boxed|bound)\b"), "deadline"),
+    (re.compile(r"\bnon[\s-]*fungible(?:\s+tokens?)?\b"), "nft"),
+]
+
+# Words that negate the next content word ("without an arbiter", "no minting")
+NEGATORS = {"no", "not", "without", "never", "non", "nor", "cannot", "dont", "disable", "disabled"}
+NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12",
+    "hundred": "100", "thousand": "1000", "million": "1000000", "billion": "1000000000",
+    "single": "1", "once": "1", "twice": "2", "double": "2",
+}
+
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+CHAR_NGRAM_WEIGHT = 0.25
+CHAR_NGRAM = 4
+VECTOR_BITS = 20
+
+SparseVector = Dict[int, float]
+
+
+def _stem(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith(("e", "y")) and len(word) > 3:
+        word = word[:-1]
+    return SYNONYMS.get(word, word)
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) & ((1 << VECTOR_BITS) - 1)
+
+
+def _words(text: str) -> List[str]:
+    text = text.lower()
+    for pattern, concept in PHRASES:
+        text = pattern.sub(concept, text)
+    return _WORD_RE.findall(text)
+
+
+def tokenize_prompt(text: str) -> List[str]:
+    return [_stem(w) for w in _words(text) if w not in STOPWORDS]
+
+
+def constraints(text: str) -> Tuple[str, ...]:
+    """
+    Numbers ("10", "ten") and negated words ("no:mint") in a prompt; two
+    prompts are only interchangeable if these match exactly
+    """
+    words = _words(text.replace("n't", " not"))
+    found = set()
+    negate = False
+    for word in words:
+        if word in NEGATORS:
+            negate = True
+        elif word.isdigit():
+            found.add(str(int(word)))
+        elif word in NUMBER_WORDS:
+            found.add(NUMBER_WORDS[word])
+        elif negate and word not in STOPWORDS:
+            found.add(f"no:{_stem(word)}")
+            negate = False
+    return tuple(sorted(found))
+
+
+def embed(text: str) -> SparseVector:
+    """
+    L2-normalized hashed feature vector: stemmed words, word bigrams and
+    character n-grams (which catch spelling variants like "deadline"/"deadlines")
+    """
+    words = tokenize_prompt(text)
+    vector: SparseVector = {}
+
+    def add(feature: str, weight: float):
+        index = _bucket(feature)
+        vector[index] = vector.get(index, 0.0) + weight
+
+    for word in dict.fromkeys(words):
+        add(f"w:{word}", WORD_WEIGHT)
+        padded = f"<{word}>"
+        for i in range(len(padded) - CHAR_NGRAM + 1):
+            add(f"c:{padded[i:i + CHAR_NGRAM]}", CHAR_NGRAM_WEIGHT)
+    for first, second in zip(words, words[1:]):
+        add(f"b:{first} {second}", BIGRAM_WEIGHT)
+
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {k: v / norm for k, v in vector.items()} if norm else {}
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+@dataclass
+class CacheEntry:
+    partition: str
+    vector: SparseVector
+    words: Set[str]
+    value: dict
+    stored_at: float
+
+
+class SemanticCache:
+    """Bounded LRU of embedded prompts with a word-level inverted index"""
+
+    # Covering candidates scored exactly per lookup
+    MAX_CANDIDATES = 64
+
+    def __init__(self, threshold: float, max_entries: int, ttl: float):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._postings: Dict[Tuple[str, str], Set[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, text: str, partition: str = "") -> Optional[Tuple[dict, float]]:
+        """
+        Closest cached value above the similarity threshold, with its
+        similarity, among entries whose prompt has every content word of this one
+        """
+        partition = self._partition(text, partition)
+        words = set(tokenize_prompt(text))
+        shared: Dict[int, int] = {}
+        for word in words:
+            for entry_id in self._postings.get((partition, word), ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+
+        best_id, best_score = None, 0.0
+        if shared:
+            vector = embed(text)
+            now = time.time()
+            covering = [entry_id for entry_id, count in shared.items() if count == len(words)]
+            ranked = covering[:self.MAX_CANDIDATES]
+            for entry_id in ranked:
+                entry = self._entries[entry_id]
+                if now - entry.stored_at > self.ttl:
+                    self._remove(entry_id)
+                    continue
+                score = cosine(vector, entry.vector)
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+        if best_id is None or best_score < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id].value, best_score
+
+    def store(self, text: str, value: dict, partition: str = ""):
+        vector = embed(text)
+        if not vector:
+            return
+        partition = self._partition(text, partition)
+        entry_id = self._next_id
+        self._next_id += 1
+        words = set(tokenize_prompt(text))
+        self._entries[entry_id] = CacheEntry(partition, vector, words, value, time.time())
+        for word in words:
+            self._postings.setdefault((partition, word), set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _partition(text: str, partition: str) -> str:
+        """The caller's partition narrowed to prompts with the same constraints"""
+        return f"{partition}|{','.join(constraints(text))}"
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for word in entry.words:
+            key = (entry.partition, word)
+            postings = self._postings.get(key)
+            if postings is not None:
+                postings.discard(entry_id)
+                if not postings:
+                    del self._postings[key]
+
+
+def generation_text(prompt: str, additional_context: Optional[str]) -> str:
+    return f"{prompt}\n{additional_context or ''}"
+
+
+# Create global instance
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=settings.SEMANTIC_CACHE_TTL
+)
@@ -0,0 +1,164 @@
+"""
+Contract template registry
+Templates live as .cpp files under app/templates, described by index.json.
+Metadata and the keyword index are built on first use; template code is read
+from disk the first time each template is requested
+"""
+
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(word: str) -> str:
+    """Fold simple plurals so "votes" and "nfts" hit the same index keys as "vote" and "nft" """
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def keywords_of(text: str) -> List[str]:
+    return [_normalize(w) for w in _WORD_RE.findall(text.lower())]
+
+
+@dataclass
+class Template:
+    id: str
+    file: str
+    name: str
+    description: str
+    category: str
+    difficulty: str
+    keywords: List[str] = field(default_factory=list)
+    listed: bool = True
+    directory: Path = field(default=TEMPLATE_DIR, repr=False)
+    _code: Optional[str] = field(default=None, repr=False)
+    _etag: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def code(self) -> str:
+        if self._code is None:
+            self._code = (self.directory / self.file).read_text(encoding="utf-8")
+        return self._code
+
+    @property
+    def etag(self) -> str:
+        """Strong validator over the code and metadata served for this template"""
+        if self._etag is None:
+            digest = hashlib.sha256(self.code.encode("utf-8"))
+            digest.update(json.dumps(self.info(), sort_keys=True).encode("utf-8"))
+            self._etag = f'"{digest.hexdigest()[:32]}"'
+        return self._etag
+
+    def info(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "category": self.category,
+            "difficulty": self.difficulty,
+        }
+
+
+class TemplateRegistry:
+    """Templates indexed by ID and by keyword"""
+
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        self.directory = directory
+        self._templates: Optional[Dict[str, Template]] = None
+        self._ordered: List[Template] = []
+        self._keyword_index: Dict[str, List[int]] = {}
+        self._phrase_index: Dict[Tuple[str, ...], List[int]] = {}
+        self._phrase_lengths: List[int] = []
+        self._default = ""
+
+    def _load(self) -> Dict[str, Template]:
+        if self._templates is None:
+            index = json.loads((self.directory / "index.json").read_text(encoding="utf-8"))
+            templates = [Template(directory=self.directory, **entry) for entry in index["templates"]]
+
+            # keyword -> positions of the templates that declare it (index order breaks ties);
+            # multi-word keywords ("non-fungible") are indexed as phrases
+            keyword_index: Dict[str, List[int]] = {}
+            phrase_index: Dict[Tuple[str, ...], List[int]] = {}
+            for position, template in enumerate(templates):
+                for words in dict.fromkeys(tuple(keywords_of(kw)) for kw in template.keywords):
+                    if len(words) == 1:
+                        keyword_index.setdefault(words[0], []).append(position)
+                    elif words:
+                        phrase_index.setdefault(words, []).append(position)
+
+            self._keyword_index = keyword_index
+            self._phrase_index = phrase_index
+            self._phrase_lengths = sorted({len(words) for words in phrase_index}, reverse=True)
+            self._default = index["default"]
+            self._ordered = templates
+            self._templates = {t.id: t for t in templates}
+            logger.info(f"📚 Loaded {len(templates)} contract templates")
+        return self._templates
+
+    def get(self, template_id: str) -> Optional[Template]:
+        return self._load().get(template_id)
+
+    def listed(self) -> List[Template]:
+        """Templates offered to users, in index order"""
+        self._load()
+        return [t for t in self._ordered if t.listed]
+
+    @property
+    def default(self) -> Template:
+        return self._load()[self._default]
+
+    def match(self, text: str) -> Template:
+        """
+        Template whose keywords best match the text, or the default one
+
+        Phrases are matched first, longest first, and score one point per
+        word; their words are then not matched on their own, so "fungible"
+        in "non-fungible" does not count for the token template.
+        """
+        self._load()
+        words = keywords_of(text)
+        hits: Dict[Tuple[str, ...], List[int]] = {}
+        i = 0
+        while i < len(words):
+            for length in self._phrase_lengths:
+                phrase = tuple(words[i:i + length])
+                if len(phrase) == length and phrase in self._phrase_index:
+                    hits[phrase] = self._phrase_index[phrase]
+                    i += length
+                    break
+            else:
+                hits[(words[i],)] = self._keyword_index.get(words[i], [])
+                i += 1
+
+        scores: Dict[int, int] = {}
+        for keyword, positions in hits.items():
+            for position in positions:
+                scores[position] = scores.get(position, 0) + len(keyword)
+        if not scores:
+            return self.default
+        best = min(scores, key=lambda position: (-scores[position], position))
+        return self._ordered[best]
+
+    def select(self, prompt: str, template_id: Optional[str] = None) -> Template:
+        """An explicitly requested template if it exists, else a keyword match on the prompt"""
+        if template_id:
+            template = self.get(template_id)
+            if template is not None:
+                return template
+        return self.match(prompt)
+
+
+# Create global instance
+template_registry = TemplateRegistry()
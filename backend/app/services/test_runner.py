@@ -0,0 +1,640 @@
+"""
+Contract test runner
+Links the contract into a native harness once, then runs TestScenarios on a
+pool of harness processes and checks each against its expected_outputs.
+
+A scenario's inputs are a list of calls on the contract's PUBLIC methods:
+
+    {"calls": [{"method": "vote", "args": [0, true], "invocator": "bob",
+                "reward": 0, "block": 12}, ...]}
+
+args are positional (or an object keyed by parameter name). Integers and
+bools map to integer parameters, strings to const char*, and 32-byte IDs
+(const uint8_t*) are given as 64 hex chars or as any other string, which is
+hashed into a stable ID, so "alice" is the same identity in every call.
+
+expected_outputs may hold any of:
+    result     return value of the last call
+    returns    per-call return values (null entries are not checked)
+    reverts    per-call: false, true, or the expected require() message;
+               without it every call is expected to succeed
+    transfers  [{"to": ..., "amount": ...}] made across the scenario
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import signal
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.models.schemas import CompileResult, TestResult, TestScenario
+from app.services.analysis.lexer import IDENT
+from app.services.analysis.parser import Method, Struct, parse
+from app.services.compiler import SOURCE_NAME, compiler_service, limit_resources, resource
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVOCATOR = "caller"
+MAX_ARG_BYTES = 64 * 1024
+
+_SIGNED = {"int8_t", "int16_t", "int32_t", "int64_t", "signed", "short", "int", "long", "char"}
+_UNSIGNED = {"uint8_t", "uint16_t", "uint32_t", "uint64_t", "unsigned", "size_t"}
+_QUALIFIERS = {"const", "volatile"}
+_HEX_ID = re.compile(r"^(0x)?[0-9a-fA-F]{64}$")
+# Words that may precede an array name without making it a declaration
+_EXPRESSION_KEYWORDS = {"return", "case", "else", "do", "sizeof", "throw"}
+
+
+class HarnessBuildError(Exception):
+    """Raised when the contract cannot be built into a test harness"""
+
+    def __init__(self, message: str, result: Optional[CompileResult] = None):
+        super().__init__(message)
+        self.result = result
+
+
+class ScenarioError(Exception):
+    """Raised for a scenario whose inputs do not fit the contract"""
+
+
+class HarnessCrash(RuntimeError):
+    """
+    Raised when a scenario kills its harness process
+
+    report is the parsed "K" line ({"kind": "ub", "check", "line", "column",
+    "value", "type", "file"} or {"kind": "signal", "signal", "pc", "frames"}),
+    {"kind": "hang"} for a timeout or {"kind": "exit", "code"}; calls is the
+    number of calls that completed before it.
+    """
+
+    def __init__(self, message: str, report: Dict, calls: int):
+        super().__init__(message)
+        self.report = report
+        self.calls = calls
+
+
+def parse_crash(line: str) -> Dict:
+    """The report in a harness "K ub ..." / "K sig ..." line"""
+    parts = line.split(" ")
+    if parts[1] == "ub":
+        check, line_no, column, value, type_hex, file_hex = parts[2:8]
+        return {
+            "kind": "ub",
+            "check": check,
+            "line": int(line_no),
+            "column": int(column),
+            "value": int(value),
+            "type": bytes.fromhex(type_hex).decode("utf-8", errors="replace") if type_hex != "-" else None,
+            "file": bytes.fromhex(file_hex).decode("utf-8", errors="replace"),
+        }
+    return {"kind": "signal", "signal": int(parts[2]), "pc": int(parts[3]), "frames": [int(p) for p in parts[4:]]}
+
+
+def describe_crash(report: Dict) -> str:
+    """One-line description of a HarnessCrash report"""
+    if report["kind"] == "ub":
+        where = f"{os.path.basename(report['file'])}:{report['line']}:{report['column']}"
+        return f"{report['check'].replace('_', ' ')} at {where}" + (f" ({report['type']})" if report["type"] else "")
+    if report["kind"] == "signal":
+        try:
+            name = signal.Signals(report["signal"]).name
+        except ValueError:
+            name = f"signal {report['signal']}"
+        line = report.get("line")
+        return f"{name} at " + (f"{SOURCE_NAME}:{line}" if line else f"pc {report['pc']:#x}")
+    if report["kind"] == "hang":
+        return "timed out"
+    return f"harness exited ({report['code']})"
+
+
+@dataclass
+class ValueType:
+    kind: str  # int, bool, id, str, void, struct
+    signed: bool = False
+    bits: int = 64
+    fields: Tuple[str, ...] = ()  # struct returns: scalar fields, in order
+    cast: str = ""  # C++ type the glue converts to
+
+
+@dataclass
+class HarnessMethod:
+    index: int
+    method: Method
+    params: List[ValueType]
+    returns: ValueType
+
+
+def classify(type_name: str) -> Optional[ValueType]:
+    """How a parameter or return type crosses the harness boundary, or None"""
+    words = [w for w in type_name.replace("*", " * ").replace("&", " & ").split() if w not in _QUALIFIERS]
+    pointers = words.count("*")
+    reference = "&" in words
+    base = [w for w in words if w not in ("*", "&")]
+    if not base:
+        return None
+
+    if pointers == 1 and not reference and len(base) == 1:
+        if base[0] in ("uint8_t", "int8_t"):
+            return ValueType("id", cast=type_name)
+        if base[0] == "char":
+            return ValueType("str", cast=type_name)
+        return None
+    if pointers:
+        return None
+    if reference and "const" not in type_name.split():
+        return None  # out-parameters cannot be filled from JSON
+
+    scalar = " ".join(base)
+    if base == ["void"]:
+        return ValueType("void")
+    if base == ["bool"]:
+        return ValueType("bool", bits=1, cast="bool")
+    if all(w in _SIGNED | _UNSIGNED for w in base):
+        unsigned = any(w in _UNSIGNED for w in base)
+        bits = 64
+        for w in base:
+            match = re.search(r"(\d+)_t$", w)
+            if match:
+                bits = int(match.group(1))
+        if base in (["int"], ["unsigned", "int"], ["unsigned"], ["signed"]):
+            bits = 32
+        elif "short" in base:
+            bits = 16
+        elif base in (["char"], ["unsigned", "char"], ["signed", "char"]):
+            bits = 8
+        return ValueType("int", signed=not unsigned, bits=bits, cast=scalar)
+    return None
+
+
+def _struct_return(type_name: str, structs: Dict[str, Struct]) -> Optional[ValueType]:
+    struct = structs.get(type_name.replace("const", "").strip())
+    if struct is None:
+        return None
+    fields = tuple(
+        f.name for f in struct.fields
+        if not f.is_array and classify(f.type_name) is not None and classify(f.type_name).kind in ("int", "bool")
+    )
+    return ValueType("struct", fields=fields[:64])
+
+
+def contract_struct(code: str) -> Tuple[Struct, List[HarnessMethod], Dict[str, Struct]]:
+    """The contract (first top-level struct with PUBLIC methods) and its callable methods"""
+    model = parse(code)
+    structs = {s.name: s for s in model.structs}
+    contract = next(
+        (s for s in model.structs if s.parent is None and any(m.is_public for m in s.methods)),
+        None
+    )
+    if contract is None:
+        raise HarnessBuildError("No contract found: expected a struct with PUBLIC methods")
+
+    methods = []
+    for method in contract.methods:
+        if not method.is_public or not method.has_body:
+            continue
+        params = [classify(p.type_name) for p in method.params]
+        returns = classify(method.return_type) or _struct_return(method.return_type, structs)
+        if returns is None:
+            continue
+        if any(p is None or p.kind in ("void", "struct") for p in params):
+            continue
+        methods.append(HarnessMethod(index=len(methods), method=method, params=params, returns=returns))
+    return contract, methods, structs
+
+
+def harness_glue(contract: Struct, methods: List[HarnessMethod]) -> str:
+    """C++ appended to the contract: a zeroed static instance and the qh_* entry points"""
+    cases = []
+    for hm in methods:
+        args = []
+        for k, param in enumerate(hm.params):
+            if param.kind in ("id", "str"):
+                args.append(f"({param.cast})(__UINTPTR_TYPE__)a[{k}]")
+            elif param.kind == "bool":
+                args.append(f"a[{k}] != 0")
+            else:
+                args.append(f"({param.cast})a[{k}]")
+        call = f"qh_state.{hm.method.name}({', '.join(args)})"
+        kind = hm.returns.kind
+        if kind == "void":
+            body = f"{call}; return 0;"
+        elif kind in ("int", "bool"):
+            cast = "(unsigned long long)(long long)" if hm.returns.signed else "(unsigned long long)"
+            body = f"ret[0] = {cast}({call}); return 1;"
+        elif kind in ("id", "str"):
+            body = f"*ret_ptr = (const unsigned char*)({call}); return {2 if kind == 'id' else 3};"
+        else:
+            fields = "".join(
+                f" ret[{n + 1}] = (unsigned long long)r.{name};" for n, name in enumerate(hm.returns.fields)
+            )
+            body = f"auto r = {call}; ret[0] = {len(hm.returns.fields)};{fields} return 4;"
+        cases.append(f"        case {hm.index}: {{ {body} }}")
+
+    name = contract.name
+    return "\n".join([
+        "",
+        "// ---- generated test harness glue ----",
+        f"static {name} qh_state;",
+        f"static unsigned char qh_backup[sizeof({name})];",
+        'extern "C" void qh_reset() { __builtin_memset((void*)&qh_state, 0, sizeof(qh_state)); }',
+        'extern "C" void qh_snapshot() { __builtin_memcpy(qh_backup, (const void*)&qh_state, sizeof(qh_state)); }',
+        'extern "C" void qh_restore() { __builtin_memcpy((void*)&qh_state, qh_backup, sizeof(qh_state)); }',
+        'extern "C" int qh_call(int method, const unsigned long long* a, unsigned long long* ret,',
+        "                       const unsigned char** ret_ptr) {",
+        "    (void)a; (void)ret; (void)ret_ptr;",
+        "    switch (method) {",
+        *cases,
+        "    }",
+        "    return -1;",
+        "}",
+        "",
+    ])
+
+
+def bounds_checked(code: str) -> str:
+    """
+    The source with every subscript of the contract's member arrays wrapped
+    in qh_checked_index (qubic.h), which reports index >= size as an
+    out_of_bounds crash. -fsanitize=bounds lets a program form a reference
+    one past the end, so `Vote& v = votes[voteCount++]` at voteCount == N
+    would otherwise write past the array without trapping. Insertions stay
+    on the subscript's own lines, so line numbers are unchanged
+    """
+    model = parse(code)
+    contract = next(
+        (s for s in model.structs if s.parent is None and any(m.is_public for m in s.methods)),
+        None
+    )
+    if contract is None:
+        return code
+    arrays = {f.name: len(f.dims) for f in contract.fields if f.dims}
+    tokens, match = model.tokens, model.match
+
+    insertions: List[Tuple[int, str]] = []
+    for method in contract.methods:
+        if not method.has_body:
+            continue
+        shadowed = {p.name for p in method.params}
+        for k in range(method.body_start, method.body_end):
+            token = tokens[k]
+            name = token.text
+            if token.kind != IDENT or name not in arrays:
+                continue
+            before = tokens[k - 1]
+            if before.text in (".", "->"):
+                if not (before.text == "->" and tokens[k - 2].text == "this"):
+                    continue  # a field of some other object
+            elif name in shadowed:
+                continue
+            if before.kind == IDENT and before.text not in _EXPRESSION_KEYWORDS:
+                shadowed.add(name)  # a local array declared with the same name
+                continue
+            j = k + 1
+            for depth in range(arrays[name]):
+                if j >= method.body_end or tokens[j].text != "[" or match[j] < 0:
+                    break
+                close = match[j]
+                size = f"sizeof({name}{'[0]' * depth}) / sizeof({name}{'[0]' * (depth + 1)})"
+                insertions.append((tokens[j].pos + 1, "qh_checked_index(("))
+                insertions.append((tokens[close].pos, f"), {size}, {token.line}, {token.col + 1})"))
+                j = close + 1
+
+    for pos, text in sorted(insertions, key=lambda insertion: insertion[0], reverse=True):
+        code = code[:pos] + text + code[pos:]
+    return code
+
+
+def identity(value: Any) -> bytes:
+    """32-byte ID from 64 hex chars, or a stable hash of any other string"""
+    if not isinstance(value, str):
+        raise ScenarioError(f"expected an ID string, got {value!r}")
+    if _HEX_ID.match(value):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return hashlib.sha256(value.encode("utf-8")).digest()
+
+
+class Encoder:
+    """Turns one scenario into harness input lines and decodes its output"""
+
+    def __init__(self, methods: List[HarnessMethod]):
+        self.methods = methods
+        self.by_name: Dict[str, List[HarnessMethod]] = {}
+        for hm in methods:
+            self.by_name.setdefault(hm.method.name, []).append(hm)
+
+    def encode(
+        self, scenario: TestScenario, max_calls: Optional[int] = None
+    ) -> Tuple[List[str], List[HarnessMethod], Dict[bytes, str]]:
+        calls = scenario.inputs.get("calls")
+        max_calls = max_calls or settings.TEST_MAX_CALLS_PER_SCENARIO
+        if not isinstance(calls, list) or not calls:
+            raise ScenarioError("inputs.calls must be a non-empty list of method calls")
+        if len(calls) > max_calls:
+            raise ScenarioError(f"too many calls (max {max_calls})")
+
+        aliases: Dict[bytes, str] = {}
+        lines = ["S"]
+        targets = []
+        for n, call in enumerate(calls):
+            if not isinstance(call, dict) or "method" not in call:
+                raise ScenarioError(f"call {n}: expected an object with a method")
+            args = call.get("args", [])
+            hm = self._resolve(call["method"], args, n)
+            invocator = call.get("invocator", scenario.inputs.get("invocator", DEFAULT_INVOCATOR))
+            caller = identity(invocator)
+            aliases.setdefault(caller, invocator)
+            reward = self._integer(call.get("reward", 0), ValueType("int"), n, "reward")
+            block = self._integer(call.get("block", scenario.inputs.get("block", 0)), ValueType("int"), n, "block")
+
+            if isinstance(args, dict):
+                args = [args.get(p.name) for p in hm.method.params]
+            tokens = []
+            for param, value, declared in zip(hm.params, args, hm.method.params):
+                if param.kind == "id":
+                    data = identity(value)
+                    aliases.setdefault(data, value)
+                    tokens.append(f"b{data.hex()}")
+                elif param.kind == "str":
+                    if not isinstance(value, str):
+                        raise ScenarioError(f"call {n}: {declared.name} must be a string")
+                    data = value.encode("utf-8")
+                    if len(data) > MAX_ARG_BYTES:
+                        raise ScenarioError(f"call {n}: {declared.name} is too long")
+                    tokens.append(f"b{data.hex()}")
+                else:
+                    tokens.append(f"i{self._integer(value, param, n, declared.name)}")
+            lines.append(f"C {hm.index} {caller.hex()} {reward} {block} {len(tokens)} {' '.join(tokens)}".rstrip())
+            targets.append(hm)
+        lines.append("E")
+        return lines, targets, aliases
+
+    def _resolve(self, name: Any, args: Any, n: int) -> HarnessMethod:
+        candidates = self.by_name.get(name) if isinstance(name, str) else None
+        if not candidates:
+            raise ScenarioError(f"call {n}: no callable PUBLIC method named {name!r}")
+        if not isinstance(args, (list, dict)):
+            raise ScenarioError(f"call {n}: args must be a list or an object")
+        for hm in candidates:
+            params = hm.method.params
+            if isinstance(args, list) and len(args) == len(params):
+                return hm
+            if isinstance(args, dict) and set(args) == {p.name for p in params}:
+                return hm
+        expected = ", ".join(f"{p.type_name} {p.name}" for p in candidates[0].method.params)
+        raise ScenarioError(f"call {n}: {name} takes ({expected})")
+
+    @staticmethod
+    def _integer(value: Any, value_type: ValueType, n: int, name: str) -> int:
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, int):
+            raise ScenarioError(f"call {n}: {name} must be an integer")
+        low = -(1 << (value_type.bits - 1)) if value_type.signed else 0
+        high = (1 << (value_type.bits - 1)) - 1 if value_type.signed else (1 << value_type.bits) - 1
+        if not low <= value <= high:
+            raise ScenarioError(f"call {n}: {name}={value} is out of range for {value_type.cast or 'uint64_t'}")
+        return value & ((1 << 64) - 1)
+
+    @staticmethod
+    def decode(lines: List[str], targets: List[HarnessMethod], aliases: Dict[bytes, str]) -> Dict:
+        def name_of(data: bytes) -> str:
+            return aliases.get(data, data.hex())
+
+        returns: List[Any] = []
+        reverts: List[Optional[str]] = []
+        transfers: List[Dict] = []
+        for line in lines:
+            if line.startswith("T "):
+                _, to, amount = line.split(" ")
+                transfers.append({"to": name_of(bytes.fromhex(to)), "amount": int(amount)})
+                continue
+            hm = targets[len(returns)]
+            if line.startswith("X"):
+                reverts.append(bytes.fromhex(line[2:]).decode("utf-8", errors="replace"))
+                returns.append(None)
+                continue
+            reverts.append(None)
+            value = line[2:]
+            kind = hm.returns.kind
+            if kind == "void":
+                returns.append(None)
+            elif kind in ("int", "bool"):
+                number = int(value)
+                if hm.returns.signed and number >= 1 << 63:
+                    number -= 1 << 64
+                returns.append(bool(number) if kind == "bool" else number)
+            elif kind == "id":
+                returns.append(name_of(bytes.fromhex(value[1:])) if len(value) > 1 else None)
+            elif kind == "str":
+                returns.append(bytes.fromhex(value[1:]).decode("utf-8", errors="replace"))
+            else:
+                numbers = [int(v) for v in value[1:].split(",")] if len(value) > 1 else []
+                returns.append(dict(zip(hm.returns.fields, numbers)))
+        return {"returns": returns, "reverts": reverts, "transfers": transfers}
+
+
+def compare(expected: Dict, actual: Dict, targets: List[HarnessMethod]) -> List[str]:
+    """Mismatches between expected_outputs and what the harness produced"""
+    mismatches = []
+    returns, reverts = actual["returns"], actual["reverts"]
+
+    def same(want: Any, got: Any, hm: HarnessMethod) -> bool:
+        if hm.returns.kind == "id" and isinstance(want, str) and isinstance(got, str):
+            return identity(want) == identity(got)
+        if hm.returns.kind == "struct" and isinstance(want, dict) and isinstance(got, dict):
+            return all(k in got and same(v, got[k], hm) for k, v in want.items())
+        return want == got
+
+    expected_reverts = expected.get("reverts")
+    for n, got in enumerate(reverts):
+        want = expected_reverts[n] if isinstance(expected_reverts, list) and n < len(expected_reverts) else False
+        if want is None:
+            continue
+        if want is False and got is not None:
+            mismatches.append(f"call {n} ({targets[n].method.name}) reverted: {got}")
+        elif want is True and got is None:
+            mismatches.append(f"call {n} ({targets[n].method.name}) should have reverted")
+        elif isinstance(want, str) and got != want:
+            mismatches.append(f"call {n} ({targets[n].method.name}) revert: expected {want!r}, got {got!r}")
+
+    expected_returns = expected.get("returns")
+    if isinstance(expected_returns, list):
+        for n, want in enumerate(expected_returns[:len(returns)]):
+            if want is not None and not same(want, returns[n], targets[n]):
+                mismatches.append(f"call {n} ({targets[n].method.name}) returned {returns[n]!r}, expected {want!r}")
+
+    if "result" in expected and returns and not same(expected["result"], returns[-1], targets[-1]):
+        mismatches.append(f"result {returns[-1]!r}, expected {expected['result']!r}")
+
+    if "transfers" in expected:
+        want = [(identity(t.get("to")), t.get("amount")) for t in expected["transfers"]]
+        got = [(identity(t["to"]), t["amount"]) for t in actual["transfers"]]
+        if want != got:
+            mismatches.append(f"transfers {actual['transfers']!r}, expected {expected['transfers']!r}")
+    return mismatches
+
+
+class HarnessProcess:
+    """One long-lived harness executable fed scenarios over stdin/stdout"""
+
+    def __init__(self, path: Path, timeout: float, memory_limit_mb: int):
+        self.path = path
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.coverage: List[int] = []  # features of the last scenario (fuzz builds)
+
+    async def run(self, lines: List[str]) -> List[str]:
+        """Output lines for one scenario; raises HarnessCrash on a crash or timeout (process is then discarded)"""
+        if self.proc is None:
+            self.proc = await asyncio.create_subprocess_exec(
+                str(self.path),
+                env={},
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                preexec_fn=partial(limit_resources, 600, self.memory_limit, 0) if resource else None,
+                start_new_session=True,
+                limit=4 * 1024 * 1024
+            )
+
+        async def write():
+            self.proc.stdin.write(("\n".join(lines) + "\n").encode("ascii"))
+            await self.proc.stdin.drain()
+
+        calls = 0
+
+        async def read() -> List[str]:
+            nonlocal calls
+            output = []
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    code = await self.proc.wait()
+                    raise HarnessCrash(f"harness crashed (exit {code})", {"kind": "exit", "code": code}, calls)
+                line = line.decode("ascii").rstrip("\n")
+                if line == "E":
+                    return output
+                if line.startswith("K "):
+                    report = parse_crash(line)
+                    raise HarnessCrash(f"harness crashed: {describe_crash(report)}", report, calls)
+                if line.startswith("V"):
+                    self.coverage = [int(f) for f in line[2:].split()]
+                    continue
+                if line[0] in "RX":
+                    calls += 1
+                output.append(line)
+
+        try:
+            _, output = await asyncio.wait_for(asyncio.gather(write(), read()), self.timeout)
+            return output
+        except asyncio.TimeoutError:
+            await self.close()
+            raise HarnessCrash(f"scenario exceeded {self.timeout:g}s", {"kind": "hang"}, calls)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self):
+        if self.proc is None:
+            return
+        proc, self.proc = self.proc, None
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+
+
+class TestRunner:
+    """Runs scenarios for one contract on up to `workers` harness processes"""
+
+    def __init__(self, workers: int, timeout: float, memory_limit_mb: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.scenarios_run = 0
+        self._slots = asyncio.Semaphore(self.workers)
+
+    async def prepare(self, code: str) -> Tuple[Encoder, Path, CompileResult]:
+        """Build (or fetch from the artifact cache) the harness for this contract"""
+        contract, methods, _ = contract_struct(code)
+        result, executable = await compiler_service.build_harness(code + harness_glue(contract, methods))
+        if executable is None:
+            raise HarnessBuildError(result.message, result)
+        return Encoder(methods), executable, result
+
+    async def run(
+        self,
+        encoder: Encoder,
+        executable: Path,
+        scenarios: List[TestScenario]
+    ) -> AsyncIterator[TestResult]:
+        """Yield each scenario's TestResult as soon as it finishes"""
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(scenarios):
+            pending.put_nowait(item)
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            async with self._slots:
+                process = HarnessProcess(executable, self.timeout, self.memory_limit_mb)
+                try:
+                    while not pending.empty():
+                        index, scenario = pending.get_nowait()
+                        await finished.put(await self._run_one(process, encoder, index, scenario))
+                finally:
+                    await process.close()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(min(self.workers, len(scenarios)))]
+        try:
+            for _ in scenarios:
+                yield await finished.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_one(self, process: HarnessProcess, encoder: Encoder, index: int,
+                       scenario: TestScenario) -> TestResult:
+        start = time.perf_counter()
+        actual: Dict = {}
+        try:
+            lines, targets, aliases = encoder.encode(scenario)
+            output = await process.run(lines)
+            actual = encoder.decode(output, targets, aliases)
+            mismatches = compare(scenario.expected_outputs, actual, targets)
+            error = "; ".join(mismatches) or None
+        except HarnessCrash as e:
+            if e.report["kind"] == "signal":
+                [(_, e.report["line"])] = await compiler_service.symbolize(process.path, [e.report["pc"]])
+            error = str(e) if e.report["kind"] in ("hang", "exit") else f"harness crashed: {describe_crash(e.report)}"
+            if e.calls < len(targets):
+                error = f"call {e.calls} ({targets[e.calls].method.name}): {error}"
+        except (ScenarioError, RuntimeError) as e:
+            error = str(e)
+        self.scenarios_run += 1
+        return TestResult(
+            index=index,
+            scenario_name=scenario.name,
+            passed=error is None,
+            actual_output=actual,
+            error_message=error,
+            execution_time=time.perf_counter() - start
+        )
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "scenarios_run": self.scenarios_run}
+
+
+# Create global instance
+test_runner = TestRunner(
+    workers=settings.TEST_WORKERS,
+    timeout=settings.TEST_SCENARIO_TIMEOUT,
+    memory_limit_mb=settings.TEST_MEMORY_LIMIT_MB
+)
@@ -0,0 +1,245 @@
+"""
+WebSocket broadcast hub
+Each connection has a bounded outbound queue drained by its own writer task,
+so a slow or dead client never holds up the others. Connections can subscribe
+to topics and then receive only the frames published on them. Fan-out frames
+may be dropped for a slow client; personal frames (a generation's tokens, its
+done frame) never are: their sender waits for queue space instead
+"""
+
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+# Close code sent to clients that cannot keep up (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def encode(message: dict) -> str:
+    """Serialize a frame the way WebSocket.send_json does"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class FrameQueue(asyncio.Queue):
+    """Outbound (frame, personal) pairs; only fan-out frames can be evicted"""
+
+    def evict_oldest_broadcast(self) -> bool:
+        """Remove the oldest fan-out frame; False if every queued frame is personal"""
+        for index, (_, personal) in enumerate(self._queue):
+            if not personal:
+                del self._queue[index]
+                return True
+        return False
+
+
+class Connection:
+    """One socket, its outbound queue and the task writing it"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int):
+        self.websocket = websocket
+        self.queue = FrameQueue(maxsize=max_queue)
+        self.writer: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()
+        self.dropped = 0
+        self.closed = False
+
+
+class BroadcastHub:
+    """
+    Set of live connections with per-connection send queues
+
+    broadcast() encodes the message once and enqueues it without awaiting any
+    socket, so its cost does not depend on how fast clients read. When a
+    connection's queue is full the slow-consumer policy decides whether the
+    oldest fan-out frame, the new frame or the connection itself is dropped.
+    send_personal() instead waits up to personal_timeout for queue space, so
+    a client streaming a generation slows its producer down rather than
+    losing frames, and closes the socket if the client stays stuck.
+    """
+
+    def __init__(self, max_queue: int, slow_consumer_policy: str, personal_timeout: float = 10.0):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        self.max_queue = max_queue
+        self.policy = slow_consumer_policy
+        self.personal_timeout = personal_timeout
+        self.connections: Dict[WebSocket, Connection] = {}
+        self.subscribers: Dict[str, Set[Connection]] = {}
+        self.on_topic_empty: Optional[Callable[[str], None]] = None  # set by the pub/sub layer
+        self.broadcasts = 0
+        self.deliveries = 0
+        self.frames_dropped = 0
+        self.slow_disconnects = 0
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        connection = Connection(websocket, self.max_queue)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.connections[websocket] = connection
+        logger.info(f"WebSocket connected. Total connections: {len(self.connections)}")
+
+    def disconnect(self, websocket: WebSocket):
+        """Forget a socket and stop its writer (idempotent)"""
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.closed = True
+        for topic in list(connection.topics):
+            self._leave(connection, topic)
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.connections)}")
+
+    async def send_personal(self, websocket: WebSocket, message: dict):
+        """
+        Queue a frame for one socket (ordered with broadcasts), waiting for
+        queue space; a socket that stays full past personal_timeout is closed
+        """
+        connection = self.connections.get(websocket)
+        if connection is None or connection.closed:
+            return
+        item = (encode(message), True)
+        try:
+            connection.queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(connection.queue.put(item), timeout=self.personal_timeout)
+        except asyncio.TimeoutError:
+            if not connection.closed:
+                self._drop_slow(connection)
+
+    async def broadcast(self, message: dict):
+        """Queue a frame for every connection without waiting on any of them"""
+        self.broadcasts += 1
+        frame = encode(message)
+        for connection in list(self.connections.values()):
+            self._offer(connection, frame)
+
+    def subscribe(self, websocket: WebSocket, topic: str) -> bool:
+        """Add a socket to a topic; True if it is the topic's first local subscriber"""
+        connection = self.connections.get(websocket)
+        if connection is None or topic in connection.topics:
+            return False
+        connection.topics.add(topic)
+        members = self.subscribers.setdefault(topic, set())
+        members.add(connection)
+        return len(members) == 1
+
+    def unsubscribe(self, websocket: WebSocket, topic: str) -> bool:
+        """Remove a socket from a topic; True if that left the topic with no local subscribers"""
+        connection = self.connections.get(websocket)
+        if connection is None or topic not in connection.topics:
+            return False
+        return self._leave(connection, topic)
+
+    def topics_of(self, websocket: WebSocket) -> Set[str]:
+        connection = self.connections.get(websocket)
+        return connection.topics if connection is not None else set()
+
+    def local_topics(self) -> List[str]:
+        return list(self.subscribers)
+
+    def deliver(self, topic: str, frame: str):
+        """Queue an already encoded frame for the local subscribers of a topic"""
+        members = self.subscribers.get(topic)
+        if not members:
+            return
+        self.deliveries += 1
+        for connection in list(members):
+            self._offer(connection, frame)
+
+    def _leave(self, connection: Connection, topic: str) -> bool:
+        connection.topics.discard(topic)
+        members = self.subscribers.get(topic)
+        if members is None:
+            return False
+        members.discard(connection)
+        if members:
+            return False
+        del self.subscribers[topic]
+        if self.on_topic_empty is not None:
+            self.on_topic_empty(topic)
+        return True
+
+    def _offer(self, connection: Connection, frame: str):
+        """Queue a fan-out frame under the slow-consumer policy"""
+        queue = connection.queue
+        try:
+            queue.put_nowait((frame, False))
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            self._drop_slow(connection)
+            return
+
+        connection.dropped += 1
+        self.frames_dropped += 1
+        if self.policy == "drop_oldest" and queue.evict_oldest_broadcast():
+            queue.put_nowait((frame, False))
+
+    def _drop_slow(self, connection: Connection):
+        self.slow_disconnects += 1
+        logger.warning("🐢 Disconnecting slow WebSocket consumer")
+        self.disconnect(connection.websocket)
+        asyncio.ensure_future(self._close(connection.websocket))
+
+    async def _write(self, connection: Connection):
+        websocket = connection.websocket
+        try:
+            while True:
+                frame, _ = await connection.queue.get()
+                await websocket.send_text(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket send failed, dropping connection: {e}")
+            self.disconnect(websocket)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    async def close(self):
+        """Stop every writer task (shutdown)"""
+        writers = [c.writer for c in self.connections.values() if c.writer is not None]
+        for websocket in list(self.connections):
+            self.disconnect(websocket)
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "connections": len(self.connections),
+            "topics": len(self.subscribers),
+            "broadcasts": self.broadcasts,
+            "topic_deliveries": self.deliveries,
+            "frames_dropped": self.frames_dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "queued_frames": sum(c.queue.qsize() for c in self.connections.values()),
+            "policy": self.policy,
+        }
+
+
+# Create global instance
+ws_hub = BroadcastHub(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    slow_consumer_policy=settings.WS_SLOW_CONSUMER_POLICY,
+    personal_timeout=settings.WS_PERSONAL_SEND_TIMEOUT
+)
@@ -0,0 +1,88 @@
+// Qubic Auction Platform
+// English auctions with real-time bidding at 15.5M TPS
+
+#include <qubic.h>
+
+struct AuctionContract {
+    static constexpr uint64_t MAX_AUCTIONS = 200;
+
+    struct Auction {
+        uint8_t seller[32];
+        char item[128];
+        uint64_t reservePrice;
+        uint64_t minIncrement;
+        uint64_t endBlock;
+        uint8_t highestBidder[32];
+        uint64_t highestBid;
+        bool settled;
+    };
+
+    Auction auctions[MAX_AUCTIONS];
+    uint64_t auctionCount;
+
+    // List an item for auction (feeless on Qubic!)
+    PUBLIC uint64_t createAuction(const char* item, uint64_t reservePrice,
+                                  uint64_t minIncrement, uint64_t durationBlocks) {
+        require(durationBlocks > 0, "Duration must be positive");
+        require(minIncrement > 0, "Increment must be positive");
+        require(auctionCount < MAX_AUCTIONS, "Max auctions reached");
+
+        Auction& auction = auctions[auctionCount];
+        copyMemory(auction.seller, invocator(), 32);
+        copyMemory(auction.item, item, 128);
+        auction.reservePrice = reservePrice;
+        auction.minIncrement = minIncrement;
+        auction.endBlock = currentBlock() + durationBlocks;
+        auction.highestBid = 0;
+        auction.settled = false;
+
+        // Event: AuctionCreated
+        return auctionCount++;
+    }
+
+    // Place a bid; the previous leader is refunded immediately
+    PUBLIC void bid(uint64_t auctionId) {
+        require(auctionId < auctionCount, "Invalid auction ID");
+        Auction& auction = auctions[auctionId];
+        require(currentBlock() < auction.endBlock, "Auction ended");
+
+        uint64_t amount = invocationReward();
+        require(amount >= auction.reservePrice, "Below reserve price");
+        require(amount >= auction.highestBid + auction.minIncrement, "Bid too low");
+
+        if (auction.highestBid > 0) {
+            transfer(auction.highestBidder, auction.highestBid);
+        }
+
+        copyMemory(auction.highestBidder, invocator(), 32);
+        auction.highestBid = amount;
+
+        // Event: BidPlaced (instant notification via 15.5M TPS)
+    }
+
+    // Pay the seller once the auction has ended
+    PUBLIC void settle(uint64_t auctionId) {
+        require(auctionId < auctionCount, "Invalid auction ID");
+        Auction& auction = auctions[auctionId];
+        require(currentBlock() >= auction.endBlock, "Auction still active");
+        require(!auction.settled, "Already settled");
+
+        auction.settled = true;
+        if (auction.highestBid > 0) {
+            transfer(auction.seller, auction.highestBid);
+        }
+
+        // Event: AuctionSettled
+    }
+
+    // Get auction details
+    PUBLIC Auction getAuction(uint64_t auctionId) const {
+        require(auctionId < auctionCount, "Invalid auction ID");
+        return auctions[auctionId];
+    }
+};
+
+// This contract showcases:
+// ✅ Qubic's 15.5M TPS - Bids confirmed as they arrive
+// ✅ Feeless transactions - Outbid refunds cost nothing
+// ✅ Instant finality - No front-running window between bids
@@ -0,0 +1,103 @@
+// Qubic Escrow Service
+// Trustless escrow with arbiter-based dispute resolution
+
+#include <qubic.h>
+
+struct EscrowContract {
+    static constexpr uint64_t MAX_DEALS = 500;
+
+    enum DealState : uint8_t {
+        FUNDED = 0,
+        RELEASED = 1,
+        REFUNDED = 2,
+        DISPUTED = 3
+    };
+
+    struct Deal {
+        uint8_t buyer[32];
+        uint8_t seller[32];
+        uint8_t arbiter[32];
+        uint64_t amount;
+        uint64_t deadline;
+        uint8_t state;
+    };
+
+    Deal deals[MAX_DEALS];
+    uint64_t dealCount;
+
+    // Buyer locks funds for a seller (feeless on Qubic!)
+    PUBLIC uint64_t open(const uint8_t* seller, const uint8_t* arbiter, uint64_t durationBlocks) {
+        require(invocationReward() > 0, "Escrow amount must be positive");
+        require(durationBlocks > 0, "Duration must be positive");
+        require(dealCount < MAX_DEALS, "Max deals reached");
+
+        Deal& deal = deals[dealCount];
+        copyMemory(deal.buyer, invocator(), 32);
+        copyMemory(deal.seller, seller, 32);
+        copyMemory(deal.arbiter, arbiter, 32);
+        deal.amount = invocationReward();
+        deal.deadline = currentBlock() + durationBlocks;
+        deal.state = FUNDED;
+
+        // Event: EscrowOpened
+        return dealCount++;
+    }
+
+    // Buyer confirms delivery and pays the seller
+    PUBLIC void release(uint64_t dealId) {
+        require(dealId < dealCount, "Invalid deal ID");
+        Deal& deal = deals[dealId];
+        require(deal.state == FUNDED, "Deal not active");
+        require(compareMemory(deal.buyer, invocator(), 32), "Only buyer can release");
+
+        deal.state = RELEASED;
+        transfer(deal.seller, deal.amount);
+
+        // Event: EscrowReleased
+    }
+
+    // Buyer reclaims funds once the deadline has passed without delivery
+    PUBLIC void refund(uint64_t dealId) {
+        require(dealId < dealCount, "Invalid deal ID");
+        Deal& deal = deals[dealId];
+        require(deal.state == FUNDED, "Deal not active");
+        require(compareMemory(deal.buyer, invocator(), 32), "Only buyer can refund");
+        require(currentBlock() >= deal.deadline, "Deadline not reached");
+
+        deal.state = REFUNDED;
+        transfer(deal.buyer, deal.amount);
+
+        // Event: EscrowRefunded
+    }
+
+    // Either party can escalate to the arbiter
+    PUBLIC void dispute(uint64_t dealId) {
+        require(dealId < dealCount, "Invalid deal ID");
+        Deal& deal = deals[dealId];
+        require(deal.state == FUNDED, "Deal not active");
+        require(compareMemory(deal.buyer, invocator(), 32) ||
+                compareMemory(deal.seller, invocator(), 32), "Not a party to this deal");
+
+        deal.state = DISPUTED;
+
+        // Event: EscrowDisputed
+    }
+
+    // Arbiter settles a dispute (instant finality - no waiting!)
+    PUBLIC void resolve(uint64_t dealId, bool paySeller) {
+        require(dealId < dealCount, "Invalid deal ID");
+        Deal& deal = deals[dealId];
+        require(deal.state == DISPUTED, "Deal not disputed");
+        require(compareMemory(deal.arbiter, invocator(), 32), "Only arbiter can resolve");
+
+        deal.state = paySeller ? RELEASED : REFUNDED;
+        transfer(paySeller ? deal.seller : deal.buyer, deal.amount);
+
+        // Event: EscrowResolved
+    }
+};
+
+// This contract showcases:
+// ✅ Instant finality - Funds move the moment a deal settles
+// ✅ Feeless transactions - No cost to open or dispute a deal
+// ✅ C++ performance - Fixed-size deal storage
@@ -0,0 +1,17 @@
+// Qubic Smart Contract
+// Powered by 15.5M TPS and feeless transactions
+
+#include <qubic.h>
+
+struct QubicContract {
+    uint64_t value;
+
+    PUBLIC void setValue(uint64_t newValue) {
+        require(newValue > 0, "Value must be positive");
+        value = newValue;
+    }
+
+    PUBLIC uint64_t getValue() const {
+        return value;
+    }
+};
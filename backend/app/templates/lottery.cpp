@@ -0,0 +1,105 @@
+// Qubic Decentralized Lottery
+// Commit-reveal randomness so no single party can pick the winner
+
+#include <qubic.h>
+
+struct LotteryContract {
+    static constexpr uint64_t MAX_PLAYERS = 1000;
+    static constexpr uint64_t TICKET_PRICE = 1000;
+
+    struct Ticket {
+        uint8_t player[32];
+        uint8_t commitment[32];  // K12 hash of the player's secret
+        uint8_t secret[32];
+        bool revealed;
+    };
+
+    Ticket tickets[MAX_PLAYERS];
+    uint64_t ticketCount;
+    uint64_t revealedCount;
+    uint64_t commitEndBlock;
+    uint64_t revealEndBlock;
+    uint8_t seed[32];
+    bool drawn;
+
+    // Start a round with commit and reveal phases
+    PUBLIC void startRound(uint64_t commitBlocks, uint64_t revealBlocks) {
+        require(commitBlocks > 0 && revealBlocks > 0, "Phases must be positive");
+        require(ticketCount == 0 || drawn, "Round in progress");
+
+        ticketCount = 0;
+        revealedCount = 0;
+        drawn = false;
+        setMemory(seed, 0, 32);
+        commitEndBlock = currentBlock() + commitBlocks;
+        revealEndBlock = commitEndBlock + revealBlocks;
+    }
+
+    // Buy a ticket by committing to a secret (feeless on Qubic!)
+    PUBLIC void buyTicket(const uint8_t* commitment) {
+        require(currentBlock() < commitEndBlock, "Ticket sales closed");
+        require(invocationReward() == TICKET_PRICE, "Wrong ticket price");
+        require(ticketCount < MAX_PLAYERS, "Round is full");
+
+        Ticket& ticket = tickets[ticketCount++];
+        copyMemory(ticket.player, invocator(), 32);
+        copyMemory(ticket.commitment, commitment, 32);
+        ticket.revealed = false;
+
+        // Event: TicketBought
+    }
+
+    // Reveal the secret; it must hash to the commitment
+    PUBLIC void reveal(uint64_t ticketId, const uint8_t* secret) {
+        require(currentBlock() >= commitEndBlock, "Reveal not open");
+        require(currentBlock() < revealEndBlock, "Reveal closed");
+        require(ticketId < ticketCount, "Invalid ticket ID");
+
+        Ticket& ticket = tickets[ticketId];
+        require(compareMemory(ticket.player, invocator(), 32), "Not your ticket");
+        require(!ticket.revealed, "Already revealed");
+
+        uint8_t digest[32];
+        K12(secret, 32, digest);
+        require(compareMemory(digest, ticket.commitment, 32), "Secret does not match");
+
+        copyMemory(ticket.secret, secret, 32);
+        ticket.revealed = true;
+        revealedCount++;
+
+        // Mix every revealed secret into the seed
+        for (uint64_t i = 0; i < 32; i++) {
+            seed[i] ^= secret[i];
+        }
+    }
+
+    // Draw among revealed tickets (instant finality - no waiting!)
+    PUBLIC void draw() {
+        require(currentBlock() >= revealEndBlock, "Reveal still open");
+        require(!drawn, "Already drawn");
+        require(revealedCount > 0, "No revealed tickets");
+
+        drawn = true;
+
+        uint64_t pick = 0;
+        copyMemory(&pick, seed, 8);
+        pick %= revealedCount;
+
+        for (uint64_t i = 0; i < ticketCount; i++) {
+            if (!tickets[i].revealed) {
+                continue;
+            }
+            if (pick == 0) {
+                transfer(tickets[i].player, ticketCount * TICKET_PRICE);
+                // Event: WinnerDrawn
+                return;
+            }
+            pick--;
+        }
+    }
+};
+
+// This contract showcases:
+// ✅ Provable fairness - Winner depends on every revealed secret
+// ✅ Feeless transactions - Commit and reveal cost nothing
+// ✅ Instant finality - Payout confirmed immediately
@@ -0,0 +1,101 @@
+// Qubic Multi-Signature Wallet
+// Shared custody with M-of-N approvals, confirmed instantly at 15.5M TPS
+
+#include <qubic.h>
+
+struct MultiSigWallet {
+    static constexpr uint64_t MAX_OWNERS = 10;
+    static constexpr uint64_t MAX_TRANSACTIONS = 100;
+
+    struct Transaction {
+        uint8_t to[32];
+        uint64_t amount;
+        uint64_t approvals;
+        bool approvedBy[MAX_OWNERS];
+        bool executed;
+    };
+
+    uint8_t owners[MAX_OWNERS][32];
+    uint64_t ownerCount;
+    uint64_t requiredApprovals;
+
+    Transaction transactions[MAX_TRANSACTIONS];
+    uint64_t transactionCount;
+
+    // Set up owners and the approval threshold (feeless on Qubic!)
+    PUBLIC void initialize(const uint8_t* ownerList, uint64_t count, uint64_t required) {
+        require(ownerCount == 0, "Already initialized");
+        require(count > 0 && count <= MAX_OWNERS, "Invalid owner count");
+        require(required > 0 && required <= count, "Invalid approval threshold");
+
+        for (uint64_t i = 0; i < count; i++) {
+            copyMemory(owners[i], ownerList + i * 32, 32);
+        }
+        ownerCount = count;
+        requiredApprovals = required;
+    }
+
+    // Propose a transfer; the proposer approves it immediately
+    PUBLIC uint64_t submit(const uint8_t* to, uint64_t amount) {
+        uint64_t owner = ownerIndex(invocator());
+        require(owner < ownerCount, "Not an owner");
+        require(amount > 0, "Amount must be positive");
+        require(transactionCount < MAX_TRANSACTIONS, "Max transactions reached");
+
+        Transaction& tx = transactions[transactionCount];
+        copyMemory(tx.to, to, 32);
+        tx.amount = amount;
+        tx.approvals = 1;
+        tx.approvedBy[owner] = true;
+        tx.executed = false;
+
+        // Event: TransactionSubmitted
+        return transactionCount++;
+    }
+
+    // Approve a pending transfer (instant finality - no waiting!)
+    PUBLIC void approve(uint64_t txId) {
+        uint64_t owner = ownerIndex(invocator());
+        require(owner < ownerCount, "Not an owner");
+        require(txId < transactionCount, "Invalid transaction ID");
+
+        Transaction& tx = transactions[txId];
+        require(!tx.executed, "Already executed");
+        require(!tx.approvedBy[owner], "Already approved");
+
+        tx.approvedBy[owner] = true;
+        tx.approvals++;
+
+        // Event: TransactionApproved
+    }
+
+    // Execute once enough owners have approved
+    PUBLIC void execute(uint64_t txId) {
+        require(ownerIndex(invocator()) < ownerCount, "Not an owner");
+        require(txId < transactionCount, "Invalid transaction ID");
+
+        Transaction& tx = transactions[txId];
+        require(!tx.executed, "Already executed");
+        require(tx.approvals >= requiredApprovals, "Not enough approvals");
+
+        tx.executed = true;
+        transfer(tx.to, tx.amount);
+
+        // Event: TransactionExecuted
+    }
+
+private:
+    uint64_t ownerIndex(const uint8_t* address) const {
+        for (uint64_t i = 0; i < ownerCount; i++) {
+            if (compareMemory(owners[i], address, 32)) {
+                return i;
+            }
+        }
+        return MAX_OWNERS;
+    }
+};
+
+// This contract showcases:
+// ✅ Instant finality - Approvals take effect immediately
+// ✅ Feeless transactions - Owners approve at no cost
+// ✅ C++ performance - Bounded, predictable storage
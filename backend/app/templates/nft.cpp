@@ -0,0 +1,21 @@
+// Qubic NFT Contract
+#include <qubic.h>
+
+struct QubicNFT {
+    struct Token {
+        uint64_t tokenId;
+        uint8_t owner[32];
+        char uri[256];
+    };
+
+    Token tokens[1000];
+    uint64_t tokenCount;
+
+    PUBLIC void mint(const char* uri) {
+        Token& token = tokens[tokenCount];
+        token.tokenId = tokenCount;
+        copyMemory(token.owner, invocator(), 32);
+        copyMemory(token.uri, uri, 256);
+        tokenCount++;
+    }
+};
@@ -0,0 +1,113 @@
+// Qubic Staking Contract
+// Per-block rewards without per-staker loops
+
+#include <qubic.h>
+
+struct StakingContract {
+    static constexpr uint64_t MAX_STAKERS = 10000;
+    static constexpr uint64_t PRECISION = 1000000000000;
+
+    struct Stake {
+        uint8_t owner[32];
+        uint64_t amount;
+        uint64_t rewardDebt;
+    };
+
+    Stake stakes[MAX_STAKERS];
+    uint64_t stakerCount;
+    uint64_t totalStaked;
+    uint64_t rewardPerBlock;
+    uint64_t accRewardPerShare;  // scaled by PRECISION
+    uint64_t lastRewardBlock;
+
+    // Configure the reward rate (feeless on Qubic!)
+    PUBLIC void initialize(uint64_t rewardRate) {
+        require(lastRewardBlock == 0, "Already initialized");
+        require(rewardRate > 0, "Reward rate must be positive");
+
+        rewardPerBlock = rewardRate;
+        lastRewardBlock = currentBlock();
+    }
+
+    // Lock tokens and start earning
+    PUBLIC void stake() {
+        uint64_t amount = invocationReward();
+        require(amount > 0, "Amount must be positive");
+
+        updatePool();
+        Stake& s = stakeOf(invocator());
+        payPending(s);
+
+        s.amount += amount;
+        totalStaked += amount;
+        s.rewardDebt = s.amount * accRewardPerShare / PRECISION;
+
+        // Event: Staked
+    }
+
+    // Withdraw tokens together with pending rewards
+    PUBLIC void unstake(uint64_t amount) {
+        require(amount > 0, "Amount must be positive");
+
+        updatePool();
+        Stake& s = stakeOf(invocator());
+        require(s.amount >= amount, "Insufficient stake");
+        payPending(s);
+
+        s.amount -= amount;
+        totalStaked -= amount;
+        s.rewardDebt = s.amount * accRewardPerShare / PRECISION;
+        transfer(s.owner, amount);
+
+        // Event: Unstaked
+    }
+
+    // Collect rewards without touching the stake (instant finality!)
+    PUBLIC void claim() {
+        updatePool();
+        Stake& s = stakeOf(invocator());
+        payPending(s);
+        s.rewardDebt = s.amount * accRewardPerShare / PRECISION;
+    }
+
+private:
+    // Accrue rewards for all stakers in O(1)
+    void updatePool() {
+        uint64_t now = currentBlock();
+        if (now <= lastRewardBlock) {
+            return;
+        }
+        if (totalStaked > 0) {
+            accRewardPerShare += (now - lastRewardBlock) * rewardPerBlock * PRECISION / totalStaked;
+        }
+        lastRewardBlock = now;
+    }
+
+    void payPending(Stake& s) {
+        uint64_t pending = s.amount * accRewardPerShare / PRECISION - s.rewardDebt;
+        if (pending > 0) {
+            transfer(s.owner, pending);
+            // Event: RewardPaid
+        }
+    }
+
+    Stake& stakeOf(const uint8_t* owner) {
+        for (uint64_t i = 0; i < stakerCount; i++) {
+            if (compareMemory(stakes[i].owner, owner, 32)) {
+                return stakes[i];
+            }
+        }
+
+        require(stakerCount < MAX_STAKERS, "Max stakers reached");
+        Stake& s = stakes[stakerCount++];
+        copyMemory(s.owner, owner, 32);
+        s.amount = 0;
+        s.rewardDebt = 0;
+        return s;
+    }
+};
+
+// This contract showcases:
+// ✅ Qubic's 15.5M TPS - Stake and claim in real time
+// ✅ Feeless transactions - Compound as often as you like
+// ✅ C++ performance - Constant-time reward accrual
@@ -0,0 +1,81 @@
+// Qubic Token Contract
+// Ultra-fast token transfers leveraging 15.5M TPS
+
+#include <qubic.h>
+
+struct QubicToken {
+    static constexpr uint64_t TOTAL_SUPPLY = 1000000000;
+
+    char name[32];
+    char symbol[8];
+    uint8_t decimals;
+
+    // Balance mapping
+    struct Balance {
+        uint8_t owner[32];
+        uint64_t amount;
+    };
+
+    Balance balances[10000];
+    uint64_t balanceCount;
+
+    // Initialize token
+    PUBLIC void initialize(const char* tokenName, const char* tokenSymbol) {
+        copyMemory(name, tokenName, 32);
+        copyMemory(symbol, tokenSymbol, 8);
+        decimals = 8;
+
+        // Mint total supply to creator (feeless!)
+        copyMemory(balances[0].owner, invocator(), 32);
+        balances[0].amount = TOTAL_SUPPLY;
+        balanceCount = 1;
+    }
+
+    // Transfer tokens (instant via 15.5M TPS, zero fees!)
+    PUBLIC void transfer(const uint8_t* to, uint64_t amount) {
+        require(amount > 0, "Amount must be positive");
+
+        uint64_t fromBalance = getBalance(invocator());
+        require(fromBalance >= amount, "Insufficient balance");
+
+        // Update balances (instant finality!)
+        setBalance(invocator(), fromBalance - amount);
+        setBalance(to, getBalance(to) + amount);
+
+        // Event: Transfer
+    }
+
+    // Get balance
+    PUBLIC uint64_t balanceOf(const uint8_t* owner) const {
+        return getBalance(owner);
+    }
+
+private:
+    uint64_t getBalance(const uint8_t* owner) const {
+        for (uint64_t i = 0; i < balanceCount; i++) {
+            if (compareMemory(balances[i].owner, owner, 32)) {
+                return balances[i].amount;
+            }
+        }
+        return 0;
+    }
+
+    void setBalance(const uint8_t* owner, uint64_t amount) {
+        for (uint64_t i = 0; i < balanceCount; i++) {
+            if (compareMemory(balances[i].owner, owner, 32)) {
+                balances[i].amount = amount;
+                return;
+            }
+        }
+
+        // New balance entry
+        copyMemory(balances[balanceCount].owner, owner, 32);
+        balances[balanceCount].amount = amount;
+        balanceCount++;
+    }
+};
+
+// Qubic Advantages:
+// ✅ 15.5M TPS - Lightning-fast token transfers
+// ✅ Zero fees - No cost per transfer
+// ✅ Instant finality - Immediate confirmation
@@ -0,0 +1,104 @@
+// Qubic Decentralized Voting Contract
+// Leverages 15.5M TPS for real-time voting and feeless transactions
+
+#include <qubic.h>
+
+struct Proposal {
+    uint64_t id;
+    char description[256];
+    uint64_t votesFor;
+    uint64_t votesAgainst;
+    uint64_t deadline;
+    bool executed;
+};
+
+struct VotingContract {
+    static constexpr uint64_t MAX_PROPOSALS = 100;
+
+    Proposal proposals[MAX_PROPOSALS];
+    uint64_t proposalCount;
+
+    // Track who has voted on which proposal
+    // Using Qubic's instant finality for immediate vote confirmation
+    struct Vote {
+        uint64_t proposalId;
+        uint8_t voter[32];  // Qubic address
+        bool inFavor;
+    };
+
+    Vote votes[1000];
+    uint64_t voteCount;
+
+    // Create a new proposal (feeless on Qubic!)
+    PUBLIC void createProposal(const char* description, uint64_t durationBlocks) {
+        require(proposalCount < MAX_PROPOSALS, "Max proposals reached");
+
+        Proposal& proposal = proposals[proposalCount];
+        proposal.id = proposalCount;
+        copyMemory(proposal.description, description, 256);
+        proposal.votesFor = 0;
+        proposal.votesAgainst = 0;
+        proposal.deadline = currentBlock() + durationBlocks;
+        proposal.executed = false;
+
+        proposalCount++;
+
+        // Event: ProposalCreated (instant notification via 15.5M TPS)
+    }
+
+    // Cast vote (instant finality - no waiting!)
+    PUBLIC void vote(uint64_t proposalId, bool inFavor) {
+        require(proposalId < proposalCount, "Invalid proposal ID");
+        require(currentBlock() < proposals[proposalId].deadline, "Voting period ended");
+
+        // Check if already voted
+        for (uint64_t i = 0; i < voteCount; i++) {
+            if (votes[i].proposalId == proposalId &&
+                compareMemory(votes[i].voter, invocator(), 32)) {
+                require(false, "Already voted");
+            }
+        }
+
+        // Record vote (feeless - unlimited voting participation!)
+        Vote& newVote = votes[voteCount++];
+        newVote.proposalId = proposalId;
+        copyMemory(newVote.voter, invocator(), 32);
+        newVote.inFavor = inFavor;
+
+        // Update counts (instant update via Qubic's speed)
+        if (inFavor) {
+            proposals[proposalId].votesFor++;
+        } else {
+            proposals[proposalId].votesAgainst++;
+        }
+
+        // Event: VoteCast
+    }
+
+    // Get proposal details
+    PUBLIC Proposal getProposal(uint64_t proposalId) const {
+        require(proposalId < proposalCount, "Invalid proposal ID");
+        return proposals[proposalId];
+    }
+
+    // Execute proposal if passed
+    PUBLIC void executeProposal(uint64_t proposalId) {
+        require(proposalId < proposalCount, "Invalid proposal ID");
+        Proposal& proposal = proposals[proposalId];
+
+        require(currentBlock() >= proposal.deadline, "Voting still active");
+        require(!proposal.executed, "Already executed");
+        require(proposal.votesFor > proposal.votesAgainst, "Proposal rejected");
+
+        proposal.executed = true;
+
+        // Execute proposal logic here
+        // Event: ProposalExecuted
+    }
+};
+
+// This contract showcases:
+// ✅ Qubic's 15.5M TPS - Instant vote confirmation
+// ✅ Feeless transactions - Unlimited voting participation
+// ✅ Instant finality - No waiting for confirmations
+// ✅ C++ performance - Fast vote counting and validation
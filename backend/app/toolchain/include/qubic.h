@@ -0,0 +1,50 @@
+// Qubic Public Interface (QPI) stub
+//
+// Declarations only: enough for contracts to be type-checked and compiled to
+// an object file by a stock C++ toolchain. Contracts cannot include system
+// headers, so the fixed-width integer types come from compiler builtins.
+
+#pragma once
+
+typedef __INT8_TYPE__ int8_t;
+typedef __INT16_TYPE__ int16_t;
+typedef __INT32_TYPE__ int32_t;
+typedef __INT64_TYPE__ int64_t;
+typedef __UINT8_TYPE__ uint8_t;
+typedef __UINT16_TYPE__ uint16_t;
+typedef __UINT32_TYPE__ uint32_t;
+typedef __UINT64_TYPE__ uint64_t;
+
+// Marks a contract method as callable from outside the contract
+#define PUBLIC public:
+
+// Abort the current invocation unless the condition holds
+void require(bool condition, const char* message);
+
+// Memory helpers (contracts have no access to the C library)
+void copyMemory(void* destination, const void* source, uint64_t size);
+void setMemory(void* destination, uint8_t value, uint64_t size);
+bool compareMemory(const void* left, const void* right, uint64_t size);
+
+// Invocation context
+const uint8_t* invocator();
+uint64_t invocationReward();
+uint64_t currentBlock();
+
+// Transfer QUs from the contract to a 32-byte public key
+void transfer(const uint8_t* destination, uint64_t amount);
+
+// KangarooTwelve hash of size bytes into a 32-byte digest
+void K12(const void* data, uint64_t size, uint8_t* digest);
+
+// Fuzz harnesses wrap subscripts of contract arrays in this check (see
+// bounds_checked in the test runner); the fault handler lives in the driver
+extern "C" [[noreturn]] void qh_bounds_fault(uint64_t index, uint64_t size, uint32_t line, uint32_t column);
+
+template <typename Index>
+inline Index qh_checked_index(Index index, uint64_t size, uint32_t line, uint32_t column) {
+    if (static_cast<uint64_t>(index) >= size) {
+        qh_bounds_fault(static_cast<uint64_t>(index), size, line, column);
+    }
+    return index;
+}
@@ -40,12 +40,110 @@ class Settings(BaseSettings):
     AI_MODEL: str = "bigcode/starcoder"  # or "gpt-4" or "claude-3-opus-20240229"
     AI_TEMPERATURE: float = 0.7
     AI_MAX_TOKENS: int = 2000
+    AI_REQUEST_TIMEOUT: float = 60.0  # seconds, per provider call
+    AI_MAX_CONCURRENCY: int = 32  # in-flight calls per provider
+
+    # Provider routing: AI_PROVIDER first, then these, skipping open circuits
+    AI_FALLBACK_PROVIDERS: str = ""  # comma-separated, e.g. "openai,anthropic"
+    OPENAI_MODEL: str = "gpt-4"  # used when openai is not AI_PROVIDER
+    ANTHROPIC_MODEL: str = "claude-3-opus-20240229"
+    HUGGINGFACE_MODEL: str = "bigcode/starcoder"
+    OPENAI_BASE_URL: str = ""  # override endpoints, e.g. local stub servers in tests
+    ANTHROPIC_BASE_URL: str = ""
+    HUGGINGFACE_BASE_URL: str = ""
+    AI_POOL_MAX_CONNECTIONS: int = 64  # per provider
+    AI_POOL_MAX_KEEPALIVE: int = 32
+    AI_MAX_RETRIES: int = 1  # SDK-level retries before the router fails over
+    AI_HEDGE_DELAY: float = 10.0  # seconds before a slow call is duplicated to the next provider; 0 disables
+    AI_BREAKER_FAILURES: int = 5  # consecutive failures that open a provider's circuit
+    AI_BREAKER_COOLDOWN: float = 30.0  # seconds before an open circuit lets a trial call through
+    AI_STATS_WINDOW: int = 200  # recent calls behind the p50/p99 and error rate figures
+
+    # Audit result cache (keyed on normalized source + model + prompt version)
+    AUDIT_CACHE_ENABLED: bool = True
+    AUDIT_CACHE_TTL: float = 3600.0  # seconds
+    AUDIT_CACHE_MAX_ENTRIES: int = 4096
+    AUDIT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Tiered auditing: static rules first, AI review only for suspicious methods
+    AUDIT_TIERED: bool = True
+    AUDIT_ESCALATE_SEVERITY: str = "medium"  # lowest static finding that sends a method to the AI
+    AUDIT_ESCALATE_MAX_SNIPPETS: int = 8
+
+    # Batch auditing
+    AUDIT_BATCH_MAX_ITEMS: int = 1000
+    AUDIT_BATCH_MAX_PARALLELISM: int = 16
+
+    # Incremental re-audit (per-contract snapshots of the last audit)
+    INCREMENTAL_AUDIT_MAX_CONTRACTS: int = 1024
+
+    # Semantic cache for /api/generate (offline hashed n-gram embeddings)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.75  # cosine similarity needed to reuse a generation
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 2048
+    SEMANTIC_CACHE_TTL: float = 7 * 24 * 3600.0  # seconds
+
+    # Contract Templates
+    TEMPLATE_CACHE_MAX_AGE: int = 3600  # Cache-Control max-age for /api/templates/{id}, seconds
+
+    # WebSocket broadcast hub
+    WS_SEND_QUEUE_SIZE: int = 256  # outbound frames buffered per connection
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # drop_oldest, drop_newest or disconnect (broadcast frames)
+    WS_PERSONAL_SEND_TIMEOUT: float = 10.0  # seconds a personal frame waits for queue space before the socket is closed
+    WS_MAX_TOPICS_PER_CONNECTION: int = 64
+    PUBSUB_BROKER: str = "memory"  # memory (single worker) or redis (fan-out across workers via REDIS_URL)
+
+    # Metrics (/metrics, Prometheus text format)
+    METRICS_ENABLED: bool = True
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5  # seconds between event-loop lag samples
+
+    # Debug diagnostics (off by default; expose stacks and source paths)
+    LOOP_BLOCK_DETECTOR_ENABLED: bool = False
+    LOOP_BLOCK_THRESHOLD: float = 0.1  # seconds a callback may hold the event loop before it is reported
+    PROFILING_ENABLED: bool = False  # allow X-Profile: 1 / ?profile=1 on any request
+    PROFILE_SAMPLE_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILE_HISTORY: int = 100  # finished profiles kept for /debug/profiles/{id}
 
     # Qubic Configuration
     QUBIC_RPC_URL: str = "https://rpc.qubic.org"
     QUBIC_TESTNET_URL: str = "https://testapi.qubic.org"
     QUBIC_NETWORK: str = "testnet"  # or "mainnet"
 
+    # Compilation (local C++ toolchain against the bundled QPI header stub)
+    COMPILER: str = "g++"  # or clang++
+    COMPILE_FLAGS: str = "-std=c++17 -O2 -Wall -Wextra"
+    COMPILE_MAX_PARALLEL: int = 0  # concurrent toolchain processes; 0 = one per CPU core
+    COMPILE_TIMEOUT: float = 30.0  # seconds per toolchain process
+    COMPILE_MEMORY_LIMIT_MB: int = 1024  # address-space limit per toolchain process
+    COMPILE_CACHE_DIR: str = "./.compile_cache"
+    COMPILE_CACHE_MAX_ENTRIES: int = 2000
+
+    # Contract tests (/api/test; scenarios run in native harness processes)
+    TEST_WORKERS: int = 0  # harness processes across all requests; 0 = one per CPU core
+    TEST_SCENARIO_TIMEOUT: float = 5.0  # seconds per scenario
+    TEST_MEMORY_LIMIT_MB: int = 512  # address-space limit per harness process
+    TEST_MAX_SCENARIOS: int = 5000
+    TEST_MAX_CALLS_PER_SCENARIO: int = 12000  # room for fuzzer reproducers that fill 10000-entry tables
+
+    # Fuzzing (/api/fuzz; sanitized, coverage-instrumented harness processes)
+    FUZZ_WORKERS: int = 0  # harness processes across all fuzz jobs; 0 = one per CPU core
+    FUZZ_EXEC_TIMEOUT: float = 5.0  # seconds per call sequence before it is reported as a hang
+    FUZZ_DEFAULT_DURATION: float = 30.0  # seconds
+    FUZZ_MAX_DURATION: float = 600.0
+    FUZZ_MAX_CALLS: int = 12000  # calls per generated sequence; keep <= TEST_MAX_CALLS_PER_SCENARIO for replays
+
+    # Cost profiling (/api/profile, /api/explain)
+    PROFILE_STATE_SIZES: str = "0,16,64,256,512"  # calls to a state-growing method before each measurement
+    PROFILE_RUN_TIMEOUT: float = 30.0  # seconds per exchange with a profiling harness
+    PROFILE_CACHE_MAX_ENTRIES: int = 256  # reports kept by source hash
+    PROFILE_MAX_CALLS: int = 1000000  # contract calls one profile may replay across all its harness runs
+
+    # Background Jobs (compile / deploy / profile, fuzz on its own lane)
+    JOB_WORKERS: int = 8
+    JOB_QUEUE_SIZE: int = 1000  # pending jobs before submissions are rejected
+    JOB_HISTORY_LIMIT: int = 10000  # finished job records kept for polling
+    JOB_FUZZ_WORKERS: int = 2  # concurrent fuzz campaigns, on workers of their own outside JOB_WORKERS
+
     # Database
     DATABASE_URL: str = "sqlite:///./qubic_studio.db"
 
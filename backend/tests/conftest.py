@@ -0,0 +1,12 @@
+"""
+Shared test setup: a throwaway SQLite database and mock AI mode, so the app
+imports and runs without external services
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="qubic-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/test.db")
+os.environ.setdefault("COMPILE_CACHE_DIR", os.path.join(_TMP, "compile-cache"))
+os.environ.setdefault("MOCK_MODE", "true")
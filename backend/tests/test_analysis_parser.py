@@ -0,0 +1,80 @@
+import time
+
+from app.services.analysis import analyze
+from app.services.analysis.lexer import _tokenize, tokenize
+from app.services.analysis.parser import evaluate, parse
+
+
+def test_evaluate_constant_expressions():
+    assert evaluate("MAX_PROPOSALS * 2", {"MAX_PROPOSALS": 100}) == 200
+    assert evaluate("1 << 4", {}) == 16
+    assert evaluate("10 / 3", {}) == 3
+    assert evaluate("0x10u", {}) == 16
+    assert evaluate("1'000", {}) == 1000
+
+
+def test_evaluate_rejects_unsupported_and_invalid():
+    assert evaluate("2**10", {}) is None
+    assert evaluate("7 % 0", {}) is None
+    assert evaluate("UNKNOWN + 1", {}) is None
+    assert evaluate("", {}) is None
+
+
+def test_evaluate_caps_value_size():
+    assert evaluate("1 << 64", {}) == 2 ** 64
+    assert evaluate("(1 << 64) * 2", {}) is None
+    assert evaluate("1 << 65", {}) is None
+    assert evaluate("9" * 40, {}) is None
+    assert evaluate("0x" + "F" * 100000, {}) is None
+
+
+def test_huge_array_bound_is_cheap():
+    code = "struct C { uint8 a[(1<<4000000) % ((1<<2000000)+1)]; };"
+    start = time.perf_counter()
+    analyze(code)
+    assert time.perf_counter() - start < 1.0
+    field = parse(code).structs[0].fields[0]
+    assert field.array_sizes == [None]
+
+
+def large_contract(methods: int) -> str:
+    """A contract of about 10 lines per method"""
+    body = "".join(
+        f"""    PUBLIC uint64 method{k}(uint64 amount, id to) {{
+        // adjust balance {k}
+        for (uint64 i = 0; i < holderCount; i++) {{
+            if (holders[i] == to && balances[i] >= amount) {{
+                balances[i] -= amount * {k} + 0x1F;
+                return balances[i];
+            }}
+        }}
+        return 0;
+    }}
+"""
+        for k in range(methods)
+    )
+    return "struct Big {\n    uint64 balances[1024];\n    id holders[1024];\n    uint64 holderCount;\n" + body + "};\n"
+
+
+def test_large_contract_is_analyzed_quickly():
+    code = large_contract(1000)
+    assert len(code.splitlines()) > 10000
+    _tokenize.cache_clear()
+    start = time.perf_counter()
+    result = analyze(code)
+    assert time.perf_counter() - start < 1.0  # about 0.1 s; generous for slow CI hosts
+    assert len(result.model.structs[0].methods) == 1000
+
+    # Re-analyzing the same snapshot reuses its tokens
+    start = time.perf_counter()
+    analyze(code)
+    assert time.perf_counter() - start < 1.0
+    assert _tokenize.cache_info().hits >= 1
+
+
+def test_cached_tokens_are_not_shared_lists():
+    code = "struct C { PUBLIC void f() { x = 1; } };"
+    first, _ = tokenize(code)
+    first.clear()
+    second, _ = tokenize(code)
+    assert [t.text for t in second][:3] == ["struct", "C", "{"]
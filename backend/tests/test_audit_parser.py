@@ -0,0 +1,68 @@
+import pytest
+
+from app.services import ai_service as ai_module
+from app.services.ai_service import AIService
+from app.services.analysis import analyze
+from app.services.audit_parser import AuditParseError, StreamingAuditParser, parse_audit_response
+from app.utils.config import settings
+
+ISSUE = '{"severity": "High", "category": "Access Control", "line": 3, "message": "Missing owner check"}'
+CODE = open("app/templates/token.cpp").read()
+
+
+def test_complete_response():
+    result = parse_audit_response(f'Here you go:\n```json\n{{"score": 72, "issues": [{ISSUE}]}}\n```')
+    assert result["score"] == 72
+    assert [i.message for i in result["issues"]] == ["Missing owner check"]
+
+
+@pytest.mark.parametrize("text", ["no json here", "", '{"unrelated": true}', "{ broken"])
+def test_response_without_audit_fails_closed(text):
+    with pytest.raises(AuditParseError):
+        parse_audit_response(text)
+
+
+def test_truncated_issue_is_dropped():
+    text = f'{{"score": 60, "issues": [{ISSUE}, {{"severity": "High", "category": "X", "line": 9, "message": "i'
+    result = parse_audit_response(text)
+    assert result["score"] == 60
+    assert [i.message for i in result["issues"]] == ["Missing owner check"]
+
+
+def test_truncated_before_score_fails_closed():
+    with pytest.raises(AuditParseError):
+        parse_audit_response(f'{{"issues": [{ISSUE}, {{"severity": "High", "message": "i')
+
+
+def test_streaming_yields_only_closed_issues():
+    parser = StreamingAuditParser()
+    text = f'{{"score": 55, "issues": [{ISSUE}, {ISSUE}]}}'
+    found = []
+    for k in range(0, len(text), 7):
+        found.extend(parser.feed(text[k:k + 7]))
+    assert len(found) == 2
+    assert parser.finish()["score"] == 55
+
+
+class _NoJsonLLM:
+    async def complete(self, *args, **kwargs):
+        return "I could not audit this contract."
+
+
+async def test_unparseable_provider_audit_falls_back_to_static(monkeypatch):
+    service = AIService()
+    service.mock_mode = False
+    service.llm = _NoJsonLLM()
+    monkeypatch.setattr(settings, "AUDIT_TIERED", False)
+    cache_set = []
+
+    async def record_set(key, value):
+        cache_set.append(key)
+
+    monkeypatch.setattr(ai_module.audit_cache, "set", record_set)
+
+    result = await service._audit_uncached(CODE, "Token", "key", 0.0)
+    static = analyze(CODE)
+    assert result.score == static.score
+    assert len(result.issues) == len(static.issues)
+    assert cache_set == []
@@ -0,0 +1,64 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.services.compiler import ArtifactCache, CompilerService
+from app.services.test_runner import contract_struct, harness_glue
+from app.utils.config import Settings, settings
+
+pytestmark = pytest.mark.skipif(shutil.which(settings.COMPILER) is None, reason="no C++ compiler installed")
+
+VOTING = Path("app/templates/voting.cpp").resolve().read_text()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # The default, relative cache directory, resolved from the server's working directory
+    monkeypatch.chdir(tmp_path)
+    cache = ArtifactCache(Settings.model_fields["COMPILE_CACHE_DIR"].default, 100)
+    return CompilerService(
+        compiler=settings.COMPILER,
+        flags=settings.COMPILE_FLAGS,
+        max_parallel=2,
+        timeout=settings.COMPILE_TIMEOUT,
+        memory_limit_mb=settings.COMPILE_MEMORY_LIMIT_MB,
+        cache=cache
+    )
+
+
+def harness_source(code: str) -> str:
+    contract, methods, _ = contract_struct(code)
+    return code + harness_glue(contract, methods)
+
+
+def test_cache_directory_is_absolute(service, tmp_path):
+    assert service.cache.directory.is_absolute()
+    assert service.cache.directory.parent == tmp_path.resolve()
+
+
+@pytest.mark.parametrize("variant", ["test", "fuzz", "profile"])
+async def test_builds_voting_harness_with_default_cache_dir(service, variant):
+    result, executable = await service.build_harness(harness_source(VOTING), variant)
+    assert result.compiled, [e.message for e in result.errors]
+    assert executable is not None and executable.is_file()
+
+    again, _ = await service.build_harness(harness_source(VOTING), variant)
+    assert again.cache_hit
+
+
+async def test_link_failures_are_not_cached(service):
+    await service._resolve_toolchain()
+    result, artifact, cacheable = await service._build(
+        harness_source(VOTING), Path("/nonexistent/driver.o")
+    )
+    assert not result.compiled and artifact is None
+    assert not cacheable
+
+
+async def test_compile_errors_are_cached(service):
+    await service._resolve_toolchain()
+    code = "struct C { PUBLIC void f() { undefined_name(); } };"
+    first = await service.compile(code)
+    assert not first.compiled and first.errors[0].line == 1
+    assert (await service.compile(code)).cache_hit
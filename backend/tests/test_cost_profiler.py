@@ -0,0 +1,101 @@
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import generate
+from app.main import app
+from app.models.schemas import MethodCost, ProfileReport
+from app.services.compiler import compiler_service
+from app.services.cost_profiler import ProfileTooLarge, cost_profiler
+from app.services.test_runner import contract_struct
+from app.utils.config import settings
+
+CODE = open("app/templates/token.cpp").read()
+
+
+def test_planned_calls_bound_the_replays():
+    _, methods, _ = contract_struct(CODE)
+    small = cost_profiler.planned_calls(CODE, [0, 16])
+    large = cost_profiler.planned_calls(CODE, [0, 16, 256])
+    growers = sum(1 for hm in methods if not hm.method.is_const)
+    # Each extra size is replayed for every (grower, identity mode, probed method)
+    assert large - small >= 2 * growers * len(methods) * 256
+
+
+def test_budget_rejects_quadratic_requests():
+    cost_profiler.check_budget(CODE)
+    with pytest.raises(ProfileTooLarge):
+        cost_profiler.check_budget(CODE, list(range(12000 - 15, 12001)))
+
+
+def test_profile_endpoint_rejects_over_budget(monkeypatch):
+    monkeypatch.setattr(type(compiler_service), "available", property(lambda self: True))
+    response = TestClient(app).post(
+        "/api/profile", json={"code": CODE, "state_sizes": list(range(12000 - 15, 12001))}
+    )
+    assert response.status_code == 422
+    assert "calls" in response.json()["detail"]
+
+
+def test_explain_uses_cached_profile_only(monkeypatch):
+    async def never(*args, **kwargs):
+        raise AssertionError("explain must not profile inline")
+
+    monkeypatch.setattr(cost_profiler, "_profile", never)
+    report = ProfileReport(success=True, message="ok", complexity="medium", max_blocks=42)
+    monkeypatch.setitem(cost_profiler._reports, cost_profiler._key(CODE, cost_profiler.state_sizes), report)
+
+    body = TestClient(app).post("/api/explain", params={"code": CODE}).json()
+    assert body["complexity"] == "medium"
+    assert body["estimated_gas"] == 42
+    assert "profile_job_id" not in body
+
+
+def test_explain_without_cached_profile_queues_a_job(monkeypatch):
+    queued = []
+
+    async def fake_profile_contract(request):
+        queued.append(request.code)
+        return {"success": True, "job_id": "job-1"}
+
+    monkeypatch.setattr(generate, "profile_contract", fake_profile_contract)
+
+    body = TestClient(app).post("/api/explain", params={"code": CODE}).json()
+    assert queued == [CODE]
+    assert body["profile_job_id"] == "job-1"
+    assert body["complexity"] is None
+
+
+def test_explain_reports_why_no_profile_was_queued(monkeypatch):
+    monkeypatch.setattr(type(compiler_service), "available", property(lambda self: False))
+
+    body = TestClient(app).post("/api/explain", params={"code": CODE}).json()
+    assert body["complexity"] is None
+    assert body["key_functions"]
+    assert "not installed" in body["profile_error"]
+
+
+@pytest.mark.skipif(shutil.which(settings.COMPILER) is None, reason="no C++ compiler installed")
+async def test_methods_that_always_revert_are_unmeasured():
+    report = await cost_profiler.profile(open("app/templates/lottery.cpp").read(), [0, 16])
+    methods = {m.method: m for m in report.methods}
+    assert methods["startRound"].growth == "O(1)"
+    draw = methods["draw"]
+    assert draw.growth is None
+    assert draw.unmeasured_reason == "every probe reverted as the state grew"
+    assert report.worst_growth == "O(1)"
+    assert "Every method runs in constant time" not in report.message
+    assert "draw (every probe reverted as the state grew)" in report.message
+
+
+def test_explain_reports_unmeasured_methods(monkeypatch):
+    report = ProfileReport(success=True, message="ok", methods=[
+        MethodCost(method="transfer", line=3, growth=None, unmeasured_reason="every probe reverted as the state grew")
+    ])
+    monkeypatch.setitem(cost_profiler._reports, cost_profiler._key(CODE, cost_profiler.state_sizes), report)
+
+    body = TestClient(app).post("/api/explain", params={"code": CODE}).json()
+    assert body["complexity"] is None
+    assert body["methods"][0]["growth"] is None
+    assert body["methods"][0]["unmeasured_reason"] == "every probe reverted as the state grew"
@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.api import deploy
+from app.models.database import DeploymentRecord, add_missing_columns
+from app.models.schemas import Deployment, DeploymentStatus, DeployRequest, NetworkType
+from app.services.deployment_store import deployment_store
+
+
+def pending_deployment() -> Deployment:
+    return deployment_store.create(Deployment(
+        id=str(uuid.uuid4()),
+        contract_id="contract-1",
+        network=NetworkType.TESTNET,
+        address="QUBICTEST",
+        transaction_hash="0x0",
+        timestamp=datetime(2024, 1, 1, 12, 0, 0),
+        status=DeploymentStatus.PENDING
+    ))
+
+
+async def test_pending_is_published_before_the_job_is_submitted(monkeypatch):
+    events = []
+
+    async def publish(topic, data):
+        events.append(data["deployment"]["status"])
+
+    async def submit(kind, func, job_id=None):
+        events.append("submitted")
+
+    monkeypatch.setattr(deploy.pubsub, "publish", publish)
+    monkeypatch.setattr(deploy.job_queue, "submit", submit)
+
+    response = await deploy._deploy_contract(DeployRequest(contract_id="contract-1"), NetworkType.TESTNET)
+    assert response.success
+    # One event each on the deployment and contract topics, then the job
+    assert events == ["pending", "pending", "submitted"]
+
+
+def test_set_status_keeps_the_submission_timestamp():
+    deployment = pending_deployment()
+    confirmed = deployment_store.set_status(deployment.id, DeploymentStatus.CONFIRMED)
+    assert confirmed.timestamp == deployment.timestamp
+    assert confirmed.updated_at is not None and confirmed.updated_at > deployment.timestamp
+    assert deployment_store.get(deployment.id).updated_at == confirmed.updated_at
+
+
+async def test_missing_deployment_fails_the_job_cleanly():
+    deployment = pending_deployment().model_copy(update={"id": str(uuid.uuid4())})
+    with pytest.raises(RuntimeError, match="no longer exists"):
+        await deploy._run_deployment(deployment)
+
+
+def test_updated_at_is_added_to_an_existing_deployments_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        # The deployments table as created before updated_at existed
+        connection.execute(text(
+            "CREATE TABLE deployments (id VARCHAR(36) PRIMARY KEY, contract_id VARCHAR(36), "
+            "network VARCHAR(16), address VARCHAR(128), transaction_hash VARCHAR(128), "
+            "timestamp DATETIME, status VARCHAR(16), gas_used BIGINT, ipo_config TEXT, error_message TEXT)"
+        ))
+        connection.execute(text(
+            "INSERT INTO deployments VALUES ('d1', 'c1', 'testnet', 'Q', '0x0', '2024-01-01 12:00:00', "
+            "'pending', 0, NULL, NULL)"
+        ))
+
+    assert add_missing_columns(engine, DeploymentRecord.__table__) == ["updated_at"]
+    assert add_missing_columns(engine, DeploymentRecord.__table__) == []
+    with Session(engine) as session:
+        record = session.get(DeploymentRecord, "d1")
+        assert record.updated_at is None
+        record.updated_at = datetime(2024, 1, 1, 12, 5, 0)
+        session.commit()
@@ -0,0 +1,85 @@
+import shutil
+
+import pytest
+
+from app.models.schemas import IssueSeverity, TestScenario
+from app.services.compiler import compiler_service
+from app.services.fuzzer import Fuzzer
+from app.services.test_runner import (
+    Encoder,
+    HarnessCrash,
+    HarnessProcess,
+    bounds_checked,
+    contract_struct,
+    harness_glue,
+)
+from app.utils.config import settings
+
+VOTING = open("app/templates/voting.cpp").read()
+VOTE_LINE = next(n for n, line in enumerate(VOTING.splitlines(), 1) if "votes[voteCount++]" in line)
+
+needs_compiler = pytest.mark.skipif(shutil.which(settings.COMPILER) is None, reason="no C++ compiler installed")
+
+
+def test_bounds_checked_wraps_member_subscripts_in_place():
+    checked = bounds_checked(VOTING)
+    assert len(checked.splitlines()) == len(VOTING.splitlines())
+    line = checked.splitlines()[VOTE_LINE - 1]
+    assert f"votes[qh_checked_index((voteCount++), sizeof(votes) / sizeof(votes[0]), {VOTE_LINE}, 25)]" in line
+    # Declarations and fields of other objects are left alone
+    assert "Vote votes[1000];" in checked
+    assert "proposal.votesFor = 0;" in checked
+
+
+def test_bounds_checked_skips_shadowing_locals():
+    code = (
+        "struct C {\n"
+        "    uint64_t table[4];\n"
+        "    PUBLIC uint64_t f(uint64_t i) {\n"
+        "        uint64_t table[8];\n"
+        "        return table[i] + this->table[i];\n"
+        "    }\n"
+        "};\n"
+    )
+    checked = bounds_checked(code)
+    assert "return table[i] + this->table[qh_checked_index((i)" in checked
+
+
+async def fuzz_harness(code: str):
+    contract, methods, _ = contract_struct(code)
+    build, executable = await compiler_service.build_harness(
+        bounds_checked(code) + harness_glue(contract, methods), "fuzz"
+    )
+    assert build.compiled, [e.message for e in build.errors]
+    return Encoder(methods), executable
+
+
+@needs_compiler
+async def test_one_past_the_end_write_is_reported():
+    encoder, executable = await fuzz_harness(VOTING)
+    calls = [{"method": "createProposal", "args": ["p", 10 ** 6], "invocator": "alice", "block": 1}]
+    calls += [{"method": "vote", "args": [0, True], "invocator": f"voter-{n}", "block": 2} for n in range(1001)]
+    lines, _, _ = encoder.encode(TestScenario(name="overflow", inputs={"calls": calls}, expected_outputs={}))
+
+    process = HarnessProcess(executable, 5.0, settings.TEST_MEMORY_LIMIT_MB)
+    try:
+        with pytest.raises(HarnessCrash) as crash:
+            await process.run(lines)
+    finally:
+        await process.close()
+    report = crash.value.report
+    assert (report["check"], report["line"], report["value"]) == ("out_of_bounds", VOTE_LINE, 1000)
+    assert crash.value.calls == 1001  # createProposal and the first 1000 votes succeeded
+
+
+@needs_compiler
+async def test_fuzzing_voting_finds_the_vote_table_overflow():
+    fuzzer = Fuzzer(workers=1, exec_timeout=5.0, memory_limit_mb=settings.TEST_MEMORY_LIMIT_MB)
+    report = await fuzzer.run(VOTING, duration=40, seed=0, max_calls=1500)
+    found = [i for i in report.issues if i.line == VOTE_LINE]
+    assert found, report.message
+    assert found[0].severity == IssueSeverity.CRITICAL
+    assert "out of bounds" in found[0].message
+    crash = next(c for c in report.crashes if c.line == VOTE_LINE)
+    assert crash.kind == "out_of_bounds"
+    assert crash.reproducer.inputs["calls"][-1]["method"] == "vote"
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from app.models.schemas import IssueSeverity
+from app.services import incremental_audit
+from app.services.analysis import analyze
+from app.services.audit_pipeline import select_escalations
+from app.services.incremental_audit import IncrementalAuditor, ai_service
+from app.utils.config import settings
+
+CODE = open("app/templates/token.cpp").read()  # 5 methods with bodies
+
+
+@pytest.fixture
+def reviews(monkeypatch):
+    """Record the snippets sent to AI review; each review finds nothing"""
+    sent = []
+
+    async def review_method(snippet):
+        sent.append(snippet)
+        return []
+
+    monkeypatch.setattr(ai_service, "review_method", review_method)
+    return sent
+
+
+async def test_unchanged_methods_are_reused(reviews):
+    auditor = IncrementalAuditor(max_contracts=8)
+    first = await auditor.audit("c1", CODE)
+    assert (first.methods_reanalyzed, first.methods_reused) == (5, 0)
+
+    second = await auditor.audit("c1", CODE + "\n// trailing comment\n")
+    assert (second.methods_reanalyzed, second.methods_reused) == (0, 5)
+    assert second.score == first.score
+    assert [(i.line, i.message) for i in second.issues] == [(i.line, i.message) for i in first.issues]
+
+
+async def test_only_edited_method_is_reanalyzed(reviews):
+    auditor = IncrementalAuditor(max_contracts=8)
+    await auditor.audit("c1", CODE)
+    edited = CODE.replace("return getBalance(owner);", "return getBalance(owner) + 0;")
+    result = await auditor.audit("c1", edited)
+    assert (result.methods_reanalyzed, result.methods_reused) == (1, 4)
+
+
+async def test_tiered_policy_limits_ai_review(reviews, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_TIERED", True)
+    await IncrementalAuditor(max_contracts=8).audit("c1", CODE)
+    escalated = select_escalations(
+        analyze(CODE),
+        CODE.splitlines(),
+        min_severity=IssueSeverity(settings.AUDIT_ESCALATE_SEVERITY),
+        max_snippets=settings.AUDIT_ESCALATE_MAX_SNIPPETS
+    )
+    assert 0 < len(reviews) < 5
+    assert sorted(reviews) == sorted(s.text for s in escalated)
+
+
+async def test_untiered_reviews_every_changed_method(reviews, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_TIERED", False)
+    await IncrementalAuditor(max_contracts=8).audit("c1", CODE)
+    assert len(reviews) == 5
+
+
+def static_findings(issues):
+    return sorted((i.line, i.message) for i in issues)
+
+
+async def test_reused_findings_follow_shifted_lines(reviews, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_TIERED", False)
+    auditor = IncrementalAuditor(max_contracts=8)
+    await auditor.audit("c1", CODE)
+    shifted = CODE.replace("#include <qubic.h>\n", "#include <qubic.h>\n\n// added\n// lines\n")
+    result = await auditor.audit("c1", shifted)
+    assert (result.methods_reanalyzed, result.methods_reused) == (0, 5)
+    assert static_findings(result.issues) == static_findings(analyze(shifted).issues)
+
+
+async def test_declaration_change_reanalyzes_everything(reviews):
+    auditor = IncrementalAuditor(max_contracts=8)
+    await auditor.audit("c1", CODE)
+    result = await auditor.audit("c1", CODE.replace("uint64_t balanceCount;", "uint64_t balanceCount;\n    uint64_t extra;"))
+    assert (result.methods_reanalyzed, result.methods_reused) == (5, 0)
+
+
+async def test_snapshots_are_per_contract_and_bounded(reviews):
+    auditor = IncrementalAuditor(max_contracts=1)
+    await auditor.audit("c1", CODE)
+    assert (await auditor.audit("c2", CODE)).methods_reanalyzed == 5
+    # c1 was evicted to make room for c2
+    assert (await auditor.audit("c1", CODE)).methods_reanalyzed == 5
+
+
+async def test_rule_pass_runs_off_the_event_loop(reviews, monkeypatch):
+    threads = []
+
+    def parse(code):
+        threads.append(threading.current_thread())
+        return original(code)
+
+    original = incremental_audit.parse
+    monkeypatch.setattr(incremental_audit, "parse", parse)
+    await IncrementalAuditor(max_contracts=8).audit("c1", CODE)
+    assert threads and threads[0] is not threading.main_thread()
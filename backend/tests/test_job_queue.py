@@ -0,0 +1,61 @@
+import asyncio
+
+from app.models.schemas import JobStatus
+from app.services.job_queue import JobQueue
+
+
+async def wait_for(job, status, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while job.status != status:
+        assert asyncio.get_running_loop().time() < deadline, f"{job.kind} stuck in {job.status}"
+        await asyncio.sleep(0.01)
+
+
+async def test_fuzz_lane_does_not_hold_shared_workers():
+    queue = JobQueue(workers=1, max_pending=10, history_limit=100, lanes={"fuzz": 1})
+    release = asyncio.Event()
+
+    async def campaign():
+        await release.wait()
+        return "fuzzed"
+
+    async def compile_job():
+        return "compiled"
+
+    try:
+        first = await queue.submit("fuzz", campaign)
+        second = await queue.submit("fuzz", campaign)
+        compiled = await queue.submit("compile", compile_job)
+
+        # Both fuzz jobs are waiting on the one fuzz worker; compile still runs
+        await wait_for(compiled, JobStatus.COMPLETED)
+        await wait_for(first, JobStatus.RUNNING)
+        assert second.status == JobStatus.QUEUED
+        assert queue.depth == 1
+
+        release.set()
+        await wait_for(second, JobStatus.COMPLETED)
+        assert first.result == second.result == "fuzzed"
+        assert queue.get(first.id) is first
+    finally:
+        await queue.stop()
+
+
+async def test_listeners_see_lane_jobs():
+    queue = JobQueue(workers=1, max_pending=10, history_limit=100, lanes={"fuzz": 1})
+    seen = []
+
+    async def listener(job):
+        seen.append((job.kind, job.status))
+
+    async def campaign():
+        return "fuzzed"
+
+    queue.add_listener(listener)
+    try:
+        job = await queue.submit("fuzz", campaign)
+        await wait_for(job, JobStatus.COMPLETED)
+        await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+    assert seen == [("fuzz", JobStatus.RUNNING), ("fuzz", JobStatus.COMPLETED)]
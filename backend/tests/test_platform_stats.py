@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.contract_store import contract_store  # noqa: F401 - creates the tables
+from app.services.platform_stats import platform_stats
+
+CODE = open("app/templates/token.cpp").read()
+
+
+def template(name: str) -> str:
+    # The audit cache ignores comments, so each test audits a different template
+    return open(f"app/templates/{name}.cpp").read()
+
+
+@pytest.fixture
+def client():
+    platform_stats.seed(lambda: {})
+    return TestClient(app)
+
+
+def audits_total() -> int:
+    return platform_stats.snapshot()["audits_total"]
+
+
+def test_audit_cache_hits_are_not_counted(client):
+    code = template("escrow")
+    before = audits_total()
+    first = client.post("/api/audit", json={"code": code}).json()
+    second = client.post("/api/audit", json={"code": code}).json()
+    assert (first["cache_hit"], second["cache_hit"]) == (False, True)
+    assert audits_total() == before + 1
+
+
+def test_unchanged_editor_saves_are_not_counted(client):
+    body = {"code": CODE, "contract_id": "stats-editor"}
+    before = audits_total()
+    assert client.post("/api/audit", json=body).json()["methods_reanalyzed"] == 5
+    # Same source, then a comment-only edit: nothing re-analyzed either time
+    assert client.post("/api/audit", json=body).json()["cache_hit"] is True
+    body["code"] = CODE + "\n// saved again\n"
+    assert client.post("/api/audit", json=body).json()["methods_reanalyzed"] == 0
+    assert audits_total() == before + 1
+
+
+def test_streamed_cache_hits_are_not_counted(client):
+    code = template("voting")
+    before = audits_total()
+    for _ in range(2):
+        with client.stream("POST", "/api/audit/stream", json={"code": code}) as response:
+            assert "event: done" in response.read().decode()
+    assert audits_total() == before + 1
@@ -0,0 +1,197 @@
+"""
+ProviderRouter against local stub OpenAI/Anthropic servers, wired in through
+the *_BASE_URL settings exactly as a deployment would point at a proxy
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.providers import ProviderRouter, ProviderUnavailableError, create_provider
+from app.utils.config import settings
+
+
+class StubServer:
+    """Answers chat completions (OpenAI) and messages (Anthropic) with a fixed text"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.status = 200
+        self.delay = 0.0
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.hits += 1
+                time.sleep(stub.delay)
+                if stub.status != 200:
+                    body = {"error": {"type": "api_error", "message": "stub failure"}}
+                elif self.path.endswith("/messages"):
+                    body = {
+                        "id": "msg_stub", "type": "message", "role": "assistant", "model": "stub",
+                        "content": [{"type": "text", "text": stub.text}],
+                        "stop_reason": "end_turn", "stop_sequence": None,
+                        "usage": {"input_tokens": 3, "output_tokens": 2},
+                    }
+                else:
+                    body = {
+                        "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": stub.text}}],
+                        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+                    }
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the router cancelled this call
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    openai_stub, anthropic_stub = StubServer("from openai"), StubServer("from anthropic")
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", openai_stub.url + "/v1")
+    monkeypatch.setattr(settings, "ANTHROPIC_BASE_URL", anthropic_stub.url)
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "AI_REQUEST_TIMEOUT", 5.0)
+    yield openai_stub, anthropic_stub
+    openai_stub.close()
+    anthropic_stub.close()
+
+
+def make_router(hedge_delay=0.0, breaker_failures=5, breaker_cooldown=30.0) -> ProviderRouter:
+    return ProviderRouter(
+        [create_provider("openai"), create_provider("anthropic")],
+        hedge_delay=hedge_delay,
+        breaker_failures=breaker_failures,
+        breaker_cooldown=breaker_cooldown,
+        stats_window=50
+    )
+
+
+async def ask(router: ProviderRouter) -> str:
+    return await router.complete("system", "user", 0.0, 16)
+
+
+async def test_primary_answers(stubs):
+    openai_stub, anthropic_stub = stubs
+    router = make_router()
+    try:
+        assert await ask(router) == "from openai"
+    finally:
+        await router.aclose()
+    assert (openai_stub.hits, anthropic_stub.hits) == (1, 0)
+    assert router.stats()["providers"]["openai"]["requests"] == 1
+
+
+async def test_failover_on_error(stubs):
+    openai_stub, anthropic_stub = stubs
+    openai_stub.status = 500
+    router = make_router()
+    try:
+        assert await ask(router) == "from anthropic"
+    finally:
+        await router.aclose()
+    assert router.failovers == 1
+    assert router.stats()["providers"]["openai"]["errors"] == 1
+
+
+async def test_all_providers_failing(stubs):
+    for stub in stubs:
+        stub.status = 500
+    router = make_router()
+    try:
+        with pytest.raises(ProviderUnavailableError):
+            await ask(router)
+    finally:
+        await router.aclose()
+
+
+async def test_hedges_slow_call_after_delay(stubs):
+    openai_stub, anthropic_stub = stubs
+    openai_stub.delay = 2.0
+    router = make_router(hedge_delay=0.2)
+    try:
+        start = time.monotonic()
+        assert await ask(router) == "from anthropic"
+        assert time.monotonic() - start < 1.5
+    finally:
+        await router.aclose()
+    assert (router.hedged, router.hedge_wins) == (1, 1)
+    assert router.failovers == 0
+
+
+async def test_fast_call_is_not_hedged(stubs):
+    openai_stub, anthropic_stub = stubs
+    router = make_router(hedge_delay=1.0)
+    try:
+        assert await ask(router) == "from openai"
+    finally:
+        await router.aclose()
+    assert router.hedged == 0
+    assert anthropic_stub.hits == 0
+
+
+async def test_breaker_opens_then_half_open_trial_closes_it(stubs):
+    openai_stub, anthropic_stub = stubs
+    openai_stub.status = 500
+    router = make_router(breaker_failures=2, breaker_cooldown=0.3)
+    try:
+        for _ in range(2):
+            assert await ask(router) == "from anthropic"
+        assert router.stats()["providers"]["openai"]["circuit"] == "open"
+
+        # Open circuit: openai is skipped without a request
+        assert await ask(router) == "from anthropic"
+        assert openai_stub.hits == 2
+
+        # After the cooldown one trial call goes through and its success closes the circuit
+        await asyncio.sleep(0.35)
+        openai_stub.status = 200
+        assert await ask(router) == "from openai"
+        assert openai_stub.hits == 3
+        assert router.stats()["providers"]["openai"]["circuit"] == "closed"
+    finally:
+        await router.aclose()
+
+
+async def test_failed_half_open_trial_reopens(stubs):
+    openai_stub, anthropic_stub = stubs
+    openai_stub.status = 500
+    router = make_router(breaker_failures=1, breaker_cooldown=0.3)
+    try:
+        assert await ask(router) == "from anthropic"
+        assert router.stats()["providers"]["openai"]["circuit"] == "open"
+
+        await asyncio.sleep(0.35)
+        assert await ask(router) == "from anthropic"
+        assert openai_stub.hits == 2
+        assert router.stats()["providers"]["openai"]["circuit"] == "open"
+
+        # Reopened: skipped again until the next cooldown
+        assert await ask(router) == "from anthropic"
+        assert openai_stub.hits == 2
+    finally:
+        await router.aclose()
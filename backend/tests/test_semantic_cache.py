@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.semantic_cache import SemanticCache, constraints
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(threshold=0.75, max_entries=64, ttl=3600)
+
+
+def test_constraints():
+    assert constraints("lottery with 10 tickets per user") == ("10",)
+    assert constraints("lottery with ten tickets") == ("10",)
+    assert constraints("escrow without an arbiter") == ("no:arbiter",)
+    assert constraints("token that doesn't allow minting") == ("no:mint",)
+    assert constraints("voting with deadlines") == ()
+
+
+def test_paraphrase_hits(cache):
+    cache.store("Create a voting contract with deadlines", {"code": "voting"})
+    found = cache.lookup("voting contract with a deadline")
+    assert found is not None and found[0] == {"code": "voting"}
+
+
+@pytest.mark.parametrize("stored,asked", [
+    ("lottery with 10 tickets per user", "lottery with 1 ticket per user"),
+    ("lottery with 10 tickets per user", "lottery with tickets per user"),
+    ("escrow with arbiter", "escrow without arbiter"),
+    ("token with minting", "token without minting"),
+])
+def test_numbers_and_negations_must_match(cache, stored, asked):
+    cache.store(stored, {"code": stored})
+    assert cache.lookup(asked) is None
+    assert cache.lookup(stored) is not None
+
+
+def test_distinct_concepts_are_not_folded(cache):
+    cache.store("token with an owner", {"code": "token"})
+    assert cache.lookup("multisig wallet") is None
+    cache.store("auction that ends at a block", {"code": "auction"})
+    assert cache.lookup("auction with deadline") is None
+
+
+def test_partitions_are_separate(cache):
+    cache.store("nft collection", {"code": "nft"}, partition="a")
+    assert cache.lookup("nft collection", partition="b") is None
+    assert cache.lookup("nft collection", partition="a") is not None
+
+
+@pytest.mark.parametrize("stored,asked", [
+    ("nft collection", "nft collection with royalties"),
+    ("token transfer", "token transfer with fees"),
+    ("token with balance tracking", "token with balance tracking and pausing"),
+])
+def test_added_requirement_misses(cache, stored, asked):
+    cache.store(stored, {"code": stored})
+    assert cache.lookup(asked) is None
+    assert cache.lookup(stored) is not None
+
+
+def test_phrase_paraphrase_hits(cache):
+    cache.store("voting contract with deadlines", {"code": "voting"})
+    found = cache.lookup("a time-limited voting contract")
+    assert found is not None and found[0] == {"code": "voting"}
+    cache.store("nft collection", {"code": "nft"})
+    assert constraints("non-fungible token collection") == ()
+    assert cache.lookup("non-fungible token collection")[0] == {"code": "nft"}
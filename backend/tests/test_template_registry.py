@@ -0,0 +1,16 @@
+import pytest
+
+from app.services.template_registry import template_registry
+
+
+@pytest.mark.parametrize("prompt,template_id", [
+    ("non-fungible token", "nft"),
+    ("Create a non fungible token collection", "nft"),
+    ("non-fungible tokens for artwork", "nft"),
+    ("fungible token with balances", "token"),
+    ("simple token", "token"),
+    ("voting contract for a DAO", "voting"),
+    ("something unrelated", "generic"),
+])
+def test_prompt_routing(prompt, template_id):
+    assert template_registry.match(prompt).id == template_id
@@ -0,0 +1,38 @@
+import shutil
+
+import pytest
+
+from app.models.schemas import TestScenario
+from app.services.test_runner import test_runner
+from app.utils.config import settings
+
+pytestmark = pytest.mark.skipif(shutil.which(settings.COMPILER) is None, reason="no C++ compiler installed")
+
+VOTING = open("app/templates/voting.cpp").read()
+
+
+async def run(scenarios):
+    encoder, executable, _ = await test_runner.prepare(VOTING)
+    results = [result async for result in test_runner.run(encoder, executable, scenarios)]
+    return sorted(results, key=lambda result: result.index)
+
+
+async def test_scenarios_run_from_zeroed_state():
+    create = {"method": "createProposal", "args": ["p", 100], "invocator": "alice", "block": 1}
+    vote = {"method": "vote", "args": [0, True], "invocator": "bob", "block": 2}
+    results = await run([
+        TestScenario(name="vote", inputs={"calls": [create, vote, dict(vote, invocator="carol")]},
+                     expected_outputs={}),
+        TestScenario(name="double vote", inputs={"calls": [create, vote, vote]},
+                     expected_outputs={"reverts": [False, False, "Already voted"]}),
+        TestScenario(name="no proposal", inputs={"calls": [vote]},
+                     expected_outputs={"reverts": ["Invalid proposal ID"]}),
+    ])
+    assert [r.passed for r in results] == [True, True, True], [r.error_message for r in results]
+
+
+async def test_failed_expectation_is_reported():
+    vote = {"method": "vote", "args": [0, True], "invocator": "bob", "block": 2}
+    [result] = await run([TestScenario(name="expects success", inputs={"calls": [vote]}, expected_outputs={})])
+    assert not result.passed
+    assert result.error_message
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.ws_hub import BroadcastHub
+
+
+class StuckSocket:
+    """A client that never reads: every send blocks"""
+
+    def __init__(self):
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class GatedSocket(StuckSocket):
+    """A client that reads only once the gate opens"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+        self.received = []
+
+    async def send_text(self, frame):
+        await self.gate.wait()
+        self.received.append(json.loads(frame))
+
+
+async def test_send_personal_waits_for_a_slow_reader():
+    hub = BroadcastHub(max_queue=2, slow_consumer_policy="drop_oldest", personal_timeout=5.0)
+    socket = GatedSocket()
+    await hub.connect(socket)
+    try:
+        for n in range(3):  # one in the writer, two queued
+            await hub.send_personal(socket, {"n": n})
+        await asyncio.sleep(0)
+        blocked = asyncio.create_task(hub.send_personal(socket, {"n": 3}))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+
+        socket.gate.set()
+        await asyncio.wait_for(blocked, timeout=1.0)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert [frame["n"] for frame in socket.received] == [0, 1, 2, 3]
+        assert hub.frames_dropped == 0
+    finally:
+        await hub.close()
+
+
+@pytest.mark.parametrize("policy", ["drop_oldest", "drop_newest", "disconnect"])
+async def test_send_personal_closes_a_stuck_socket(policy):
+    hub = BroadcastHub(max_queue=2, slow_consumer_policy=policy, personal_timeout=0.05)
+    socket = StuckSocket()
+    await hub.connect(socket)
+    try:
+        for n in range(4):
+            await asyncio.wait_for(hub.send_personal(socket, {"n": n}), timeout=1.0)
+        await asyncio.sleep(0)
+        assert socket not in hub.connections
+        assert hub.frames_dropped == 0
+        assert hub.slow_disconnects == 1
+        assert socket.closed_with == 1013
+    finally:
+        await hub.close()
+
+
+async def test_broadcasts_never_evict_personal_frames():
+    hub = BroadcastHub(max_queue=2, slow_consumer_policy="drop_oldest")
+    socket = GatedSocket()
+    await hub.connect(socket)
+    try:
+        await hub.send_personal(socket, {"n": "in flight"})
+        await asyncio.sleep(0)
+        await hub.broadcast({"n": "b0"})
+        await hub.send_personal(socket, {"n": "done"})
+        for n in range(1, 5):
+            await hub.broadcast({"n": f"b{n}"})
+        assert hub.frames_dropped == 4
+
+        socket.gate.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert [frame["n"] for frame in socket.received] == ["in flight", "done", "b4"]
+    finally:
+        await hub.close()
+
+
+async def test_broadcast_disconnects_slow_consumer():
+    hub = BroadcastHub(max_queue=2, slow_consumer_policy="disconnect")
+    socket = StuckSocket()
+    await hub.connect(socket)
+    try:
+        for n in range(10):
+            await hub.broadcast({"n": n})
+        await asyncio.sleep(0)
+        assert socket not in hub.connections
+        assert hub.slow_disconnects == 1
+        assert socket.closed_with == 1013
+    finally:
+        await hub.close()
@@ -0,0 +1,46 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def _next_of(ws, kind):
+    while True:
+        frame = ws.receive_json()
+        if frame.get("type") == kind:
+            return frame
+
+
+def test_client_can_publish_to_chat_topic(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "subscribe", "topics": ["chat:lobby"]})
+        _next_of(ws, "subscribed")
+        ws.send_json({"type": "publish", "topic": "chat:lobby", "data": {"text": "hi"}})
+        frame = _next_of(ws, "event")
+        assert frame["topic"] == "chat:lobby"
+        assert frame["data"] == {"text": "hi"}
+
+
+@pytest.mark.parametrize("topic", ["deployment:abc", "job:abc", "audit:abc", "contract:abc", "deployments"])
+def test_client_cannot_publish_to_system_topics(client, topic):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "subscribe", "topics": [topic]})
+        _next_of(ws, "subscribed")
+        ws.send_json({"type": "publish", "topic": topic, "data": {"status": "confirmed"}})
+        frame = ws.receive_json()
+        while frame.get("type") not in ("error", "event"):
+            frame = ws.receive_json()
+        assert frame["type"] == "error"
+        assert "may only publish" in frame["message"]
+
+
+def test_invalid_topic_is_rejected(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "publish", "topic": "Not A Topic", "data": 1})
+        assert _next_of(ws, "error")["message"] == "Invalid topic"